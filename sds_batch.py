@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+SDS Batch Feldolgozó (OpenAI Batch API)
+=======================================
+Nagy, nem sürgős importokhoz (éves felülvizsgálat, több ezer SDS):
+1. Kinyerési kérések JSONL fájlba (OpenAI Batch formátum) → beküldés
+2. Lekérdezés, amíg kész – a kinyert rekordokból kockázatértékelési batch
+3. A végén ugyanaz a results / risk_results lista, amit a generate_full_excel vár
+
+A job állapota JSON fájlban tárolódik, így böngésző-frissítés után is folytatható.
+Az OpenAI kliens az OPENAI_BASE_URL környezeti változóval helyi stub szerverre irányítható.
+"""
+
+import json
+import os
+import uuid
+from io import BytesIO
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Optional, List, Dict, Callable
+from sds_risk_rules import annotate_levels
+from sds_phrases import expand_record
+from sds_schema import coerce, validate
+
+JOB_DIR = os.environ.get("SDS_BATCH_DIR", os.path.join(os.path.expanduser("~"), ".sds_ai", "batch_jobs"))
+ENDPOINT = "/v1/chat/completions"
+PENDING_STATUSES = ("validating", "in_progress", "finalizing", "cancelling")
+
+
+# ============================================================
+# 1. JOB ÁLLAPOT
+# ============================================================
+
+@dataclass
+class BatchJob:
+    """Egy batch feldolgozás perzisztált állapota"""
+    job_id: str
+    lang: str
+    model: str
+    files: List[str]
+    cache_keys: List[Optional[str]] = field(default_factory=list)
+    stage: str = "extract"  # extract → risk → done / failed
+    extract_batch_id: Optional[str] = None
+    risk_batch_id: Optional[str] = None
+    batch_status: str = ""
+    results: List[dict] = field(default_factory=list)
+    risk_results: List[dict] = field(default_factory=list)
+    error: Optional[str] = None
+    created: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+
+    def save(self):
+        os.makedirs(JOB_DIR, exist_ok=True)
+        tmp = os.path.join(JOB_DIR, f"{self.job_id}.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(JOB_DIR, f"{self.job_id}.json"))
+
+    @classmethod
+    def load(cls, job_id: str) -> Optional["BatchJob"]:
+        path = os.path.join(JOB_DIR, f"{os.path.basename(job_id)}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+    @property
+    def finished(self) -> bool:
+        return self.stage in ("done", "failed")
+
+
+# ============================================================
+# 2. BATCH API HÍVÁSOK
+# ============================================================
+
+def build_request(custom_id: str, system: str, user_msg: str, model: str, max_tokens: int = 4000,
+                  fmt: Optional[dict] = None) -> dict:
+    """Egy sor az OpenAI Batch JSONL fájlban – ugyanazokkal a paraméterekkel, mint a call_gpt (fmt: JSON séma)"""
+    return {
+        "custom_id": custom_id, "method": "POST", "url": ENDPOINT,
+        "body": {
+            "model": model, "temperature": 0.1, "max_tokens": max_tokens,
+            "response_format": fmt or {"type": "json_object"},
+            "messages": [{"role": "system", "content": system}, {"role": "user", "content": user_msg}],
+        },
+    }
+
+
+def submit_batch(client, requests: List[dict], job_id: str) -> str:
+    """JSONL feltöltése és a batch indítása; a batch azonosítóval tér vissza"""
+    data = "\n".join(json.dumps(r, ensure_ascii=False) for r in requests).encode("utf-8")
+    upload = client.files.create(file=(f"{job_id}.jsonl", BytesIO(data)), purpose="batch")
+    batch = client.batches.create(input_file_id=upload.id, endpoint=ENDPOINT,
+                                  completion_window="24h", metadata={"sds_job": job_id})
+    return batch.id
+
+
+def parse_output(text: str) -> Dict[str, dict]:
+    """Batch kimeneti / hiba JSONL → {custom_id: kinyert JSON vagy {'_error': ...}}"""
+    out = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        resp = row.get("response") or {}
+        body = resp.get("body") or {}
+        if row.get("error") or resp.get("status_code") != 200:
+            err = row.get("error") or body.get("error") or {}
+            out[row["custom_id"]] = {"_error": err.get("message", str(err)) if isinstance(err, dict) else str(err)}
+            continue
+        try:
+            r = json.loads(body["choices"][0]["message"]["content"])
+            r["_tokens"] = (body.get("usage") or {}).get("total_tokens", 0)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            r = {"_error": f"Érvénytelen válasz: {e}"}
+        out[row["custom_id"]] = r
+    return out
+
+
+def fetch_results(client, batch) -> Dict[str, dict]:
+    out = {}
+    for file_id in (batch.error_file_id, batch.output_file_id):
+        if file_id:
+            out.update(parse_output(client.files.content(file_id).text))
+    return out
+
+
+# ============================================================
+# 3. JOB LÉPTETÉS
+# ============================================================
+
+def start_job(client, items: List[tuple], lang: str, model: str, system_extract: str,
+              cache_keys: Optional[List[Optional[str]]] = None, fmt: Optional[dict] = None) -> BatchJob:
+    """items: (fájlnév, kinyerési user üzenet vagy None ha a PDF olvasása sikertelen); fmt: a kinyerés JSON sémája"""
+    job = BatchJob(job_id=uuid.uuid4().hex[:12], lang=lang, model=model,
+                   files=[name for name, _ in items], cache_keys=cache_keys or [None] * len(items))
+    job.results = [{"_source_file": name, "_status": "⏳ Batch"} for name, _ in items]
+    job.risk_results = [{} for _ in items]
+    for i, (name, msg) in enumerate(items):
+        if msg is None:
+            job.results[i]["_status"] = "❌ PDF hiba"
+    requests = [build_request(f"extract-{i}", system_extract, msg, model, fmt=fmt)
+                for i, (_, msg) in enumerate(items) if msg is not None]
+    if requests:
+        job.extract_batch_id = submit_batch(client, requests, job.job_id)
+    else:
+        job.stage = "done"
+    job.save()
+    return job
+
+
+def advance_job(job: BatchJob, client, system_risk: str, build_risk_msg: Callable[[dict], str],
+                on_record: Optional[Callable[[int, dict, dict], None]] = None,
+                prescore_batch: Optional[Callable[[List[dict], str], List[Optional[dict]]]] = None,
+                substances=None) -> BatchJob:
+    """Egy lekérdezési lépés: ha az aktuális batch kész, feldolgozza és továbblép a következő szakaszra.
+    on_record(index, sds, risk) minden kész, teljes párra meghívódik (pl. gyorsítótár feltöltés) – a hiányzó kötelező
+    mezős (_missing) rekordot batch módban nem pótoljuk, ezért az nem kerül a közös gyorsítótárba.
+    prescore_batch(rekordok, nyelv): a szabály alapján értékelt rekordok nem kerülnek a kockázati batch-be.
+    substances (SubstanceIndex): a kinyert rekordok kiegészítése és felvétele az anyag-indexbe."""
+    if job.finished:
+        return job
+    batch_id = job.extract_batch_id if job.stage == "extract" else job.risk_batch_id
+    batch = client.batches.retrieve(batch_id)
+    job.batch_status = batch.status
+    if batch.status in PENDING_STATUSES:
+        job.save()
+        return job
+    if batch.status != "completed" and not batch.output_file_id:
+        job.stage, job.error = "failed", f"Batch {batch_id}: {batch.status}"
+        job.save()
+        return job
+
+    answers = fetch_results(client, batch)
+    if job.stage == "extract":
+        ok = []
+        for i, name in enumerate(job.files):
+            if job.results[i]["_status"].startswith("❌"):
+                continue
+            sds = answers.get(f"extract-{i}", {"_error": f"Nincs válasz ({batch.status})"})
+            sds["_source_file"] = name
+            if "_error" in sds:
+                sds["_status"] = f"❌ {sds['_error']}"
+            else:
+                sds["_status"] = "✅"
+                # Batch módban nincs utólagos pótló kérés: a hiányzó kötelező mezők csak jelölődnek
+                missing = validate(coerce(sds))[0]
+                if missing:
+                    sds["_missing"] = missing
+                expand_record(sds, job.lang)
+                if substances is not None:
+                    substances.enrich(sds); substances.add_record(sds)
+                ok.append(i)
+            job.results[i] = sds
+        scored = prescore_batch([job.results[i] for i in ok], job.lang) if prescore_batch else [None] * len(ok)
+        requests = []
+        for i, risk in zip(ok, scored):
+            if risk is None:
+                requests.append(build_request(f"risk-{i}", system_risk, build_risk_msg(job.results[i]), job.model))
+                continue
+            job.risk_results[i] = risk
+            if on_record and not job.results[i].get("_missing"):
+                on_record(i, job.results[i], risk)
+        if requests:
+            job.risk_batch_id = submit_batch(client, requests, job.job_id)
+            job.stage, job.batch_status = "risk", ""
+        else:
+            job.stage = "done"
+    else:
+        for i in range(len(job.files)):
+            risk = answers.get(f"risk-{i}")
+            if risk and "_error" not in risk:
+                job.risk_results[i] = annotate_levels(risk)
+                if on_record and not job.results[i].get("_missing"):
+                    on_record(i, job.results[i], risk)
+        job.stage = "done"
+    job.save()
+    return job
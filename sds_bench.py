@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+SDS Teljesítménymérés (benchmark)
+=================================
+Offline mérés a feldolgozási láncra: szintetikus SDS PDF-ek és rögzített / visszajátszott OpenAI válaszok,
+szakaszonként (PDF olvasás, kinyerés, kockázatértékelés, Excel / CSV / JSONL / Parquet írás, teljes process_batch) mért idővel,
+a szakasz alatti csúcs-memóriával és növekménnyel (mintavételezett RSS) és tokenszámmal; a "memory" szakasz
+a munkamenetben tartott nyilvántartás méretét veti össze dict listaként és tömör rekordokként (sds_records).
+Az eredmény JSON, így két futás összevethető.
+
+    python sds_bench.py --scenario small -o bench.json
+    python sds_bench.py --scenario medium --compare bench.json        # lassulás esetén 1-es kilépési kód
+    python sds_bench.py --scenario small --record fixtures.jsonl --api-key sk-...   # valódi API, válaszok rögzítése
+    python sds_bench.py --scenario small --fixtures fixtures.jsonl    # rögzített válaszok visszajátszása
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from types import SimpleNamespace
+from typing import List, Optional
+
+SCENARIOS = {"small": 10, "medium": 1000, "large": 10000}
+EXPORTS = ("excel", "csv", "jsonl", "parquet")
+STAGES = ("parse", "dedup", "extract", "risk") + EXPORTS + ("pipeline", "memory")
+BENCH_KEY = "sds-bench"
+MISSING_EVERY = 5
+RSS_SAMPLE_S = 0.01
+
+# Valódi anyagok a szintetikus termékekhez: (név, CAS, EC, H kódok)
+SUBSTANCES = [
+    ("Toluene", "108-88-3", "203-625-9", "H225 H304 H315 H336 H361d H373"),
+    ("Acetone", "67-64-1", "200-662-2", "H225 H319 H336"),
+    ("Ethanol", "64-17-5", "200-578-6", "H225 H319"),
+    ("Xylene", "1330-20-7", "215-535-7", "H226 H304 H312 H332 H315 H319 H335 H373"),
+    ("Propan-2-ol", "67-63-0", "200-661-7", "H225 H319 H336"),
+    ("Sodium hydroxide", "1310-73-2", "215-185-5", "H290 H314"),
+    ("Formaldehyde", "50-00-0", "200-001-8", "H301 H311 H314 H317 H331 H341 H350"),
+    ("Water", "7732-18-5", "231-791-2", ""),
+]
+CATEGORIES = ["Thinner", "Cleaner", "Adhesive", "Coating", "Degreaser", "Disinfectant"]
+SECTION_TITLES = [
+    "Identification of the substance/mixture and of the company", "Hazards identification",
+    "Composition/information on ingredients", "First aid measures", "Firefighting measures",
+    "Accidental release measures", "Handling and storage", "Exposure controls/personal protection",
+    "Physical and chemical properties", "Stability and reactivity", "Toxicological information",
+    "Ecological information", "Disposal considerations", "Transport information",
+    "Regulatory information", "Other information",
+]
+FILLER = ("Observe the general rules of industrial hygiene and the instructions of the manufacturer. "
+          "Keep away from incompatible materials and store in the original container. ")
+PRODUCT_RE = re.compile(r"BENCH-(\d{5})")
+
+
+# ============================================================
+# 1. SZINTETIKUS SDS
+# ============================================================
+
+def synthetic_record(i: int, seed: int = 0) -> dict:
+    """Az i. szintetikus termék kinyerési rekordja (determinisztikus: ugyanaz a seed → ugyanaz az adat)"""
+    rnd = random.Random(seed * 1_000_003 + i)
+    comps = rnd.sample(SUBSTANCES, rnd.randint(1, 3))
+    concs = sorted((rnd.randint(1, 60) for _ in comps), reverse=True)
+    h_codes = sorted({c for _, _, _, h in comps for c in h.split()})
+    rec = {"product_name": f"BENCH-{i:05d} {rnd.choice(CATEGORIES)}", "manufacturer": f"Bench Chemicals {i % 97} Ltd.",
+           "manufacturer_address": f"{i % 97 + 1} Industrial Road, Budapest", "emergency_phone": "+36 80 201 199",
+           "sds_version": str(rnd.randint(1, 9)), "sds_date": f"20{rnd.randint(18, 25)}.0{rnd.randint(1, 9)}.1{rnd.randint(0, 9)}",
+           "substance_or_mixture": "Substance" if len(comps) == 1 else "Mixture", "physical_state": "liquid",
+           "signal_word": "Danger" if any(c in h_codes for c in ("H225", "H314", "H350")) else ("Warning" if h_codes else ""),
+           "clp_classification": ", ".join(h_codes) or "Not classified",
+           "h_statements": ", ".join(h_codes), "p_statements": "P210, P280, P305+P351+P338" if h_codes else "",
+           "flash_point": str(rnd.randint(-20, 60)), "ak_value": str(rnd.randint(10, 500)) if len(comps) == 1 else "",
+           "exposure_routes": "inhalation, skin"}
+    for n, ((name, cas, ec, h), conc) in enumerate(zip(comps, concs), 1):
+        rec.update({f"comp{n}_name": name, f"comp{n}_cas": cas, f"comp{n}_conc": f"{conc}-{conc + 10}",
+                    f"comp{n}_clp": ", ".join(h.split())})
+        if n < 3:
+            rec[f"comp{n}_ec"] = ec
+    return rec
+
+
+def make_pdf(pages: List[List[str]]) -> bytes:
+    """Minimális, függőség nélküli PDF (Helvetica, WinAnsi): oldalanként szövegsorok"""
+    objs = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>", b""]
+    kids = []
+    for lines in pages:
+        body = "".join("(%s) '\n" % l.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for l in lines)
+        stream = ("BT /F1 9 Tf 40 800 Td 11 TL\n" + body + "ET").encode("latin-1", "replace")
+        objs.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objs.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents %d 0 R "
+                    b"/Resources << /Font << /F1 1 0 R >> >> >>" % len(objs))
+        kids.append(len(objs))
+    objs[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+    objs.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for n, obj in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (n, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1) + b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, len(objs), xref)
+    return bytes(out)
+
+
+def synthetic_pdf(rec: dict, lines_per_section: int = 40) -> bytes:
+    """16 szakaszos angol SDS a rekord adataival, szakaszonként egy oldal"""
+    facts = {1: [f"Trade name: {rec['product_name']}", f"Supplier: {rec['manufacturer']}, {rec['manufacturer_address']}",
+                 f"Emergency telephone: {rec['emergency_phone']}", f"Version: {rec['sds_version']}  Date: {rec['sds_date']}"],
+             2: [f"Classification: {rec['clp_classification']}", f"Signal word: {rec['signal_word'] or 'none'}", f"Hazard statements: {rec['h_statements'] or 'none'}",
+                 f"Precautionary statements: {rec['p_statements'] or 'none'}"],
+             3: [f"{rec.get(f'comp{n}_name')}  CAS {rec.get(f'comp{n}_cas')}  EC {rec.get(f'comp{n}_ec', '-')}  "
+                 f"{rec.get(f'comp{n}_conc')} %  {rec.get(f'comp{n}_clp')}" for n in (1, 2, 3) if rec.get(f"comp{n}_name")],
+             8: [f"Occupational exposure limit (8 h): {rec['ak_value'] or 'not established'} mg/m3"],
+             9: [f"Physical state: {rec['physical_state']}", f"Flash point: {rec['flash_point']} C"]}
+    pages = []
+    for n, title in enumerate(SECTION_TITLES, 1):
+        body = facts.get(n, [])
+        pages.append([f"SECTION {n}: {title}"] + body + [f"{n}.{k} {FILLER[:90]}" for k in range(lines_per_section - len(body))])
+    return make_pdf(pages)
+
+
+# ============================================================
+# 2. RÖGZÍTŐ / VISSZAJÁTSZÓ KLIENS
+# ============================================================
+
+def request_key(kw: dict) -> str:
+    """Kérés azonosító: modell + üzenetek hash-e (a rögzített válasz ehhez tartozik)"""
+    raw = json.dumps([kw.get("model"), kw.get("messages")], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def _response(content: str, prompt_tokens: int, completion_tokens: int):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+                           usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                                 total_tokens=prompt_tokens + completion_tokens))
+
+
+class ReplayClient:
+    """OpenAI kliens helyettesítő: a rögzített választ adja vissza kérés-hash szerint; ha nincs, a szintetikus
+    rekordból épített determinisztikus választ. latency: szimulált API késleltetés (mp/hívás)."""
+
+    def __init__(self, fixtures: Optional[str] = None, seed: int = 0, latency: float = 0.0):
+        self.seed, self.latency = seed, latency
+        self.replayed = self.synthetic = 0
+        self._fixtures = {}
+        if fixtures and os.path.isfile(fixtures):
+            with open(fixtures, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        item = json.loads(line)
+                        self._fixtures[item["key"]] = item
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kw):
+        from sds_tokens import count_tokens
+        if self.latency:
+            time.sleep(self.latency)
+        item = self._fixtures.get(request_key(kw))
+        if item:
+            self.replayed += 1
+            return _response(item["content"], item["prompt_tokens"], item["completion_tokens"])
+        self.synthetic += 1
+        system, user = kw["messages"][0]["content"], kw["messages"][-1]["content"]
+        m = PRODUCT_RE.search(user)
+        rec = synthetic_record(int(m.group(1)), self.seed) if m else {}
+        schema = (kw.get("response_format") or {}).get("json_schema")
+        if schema:
+            # Strukturált kimenet: pontosan a séma mezői; minden MISSING_EVERY. termék első kinyeréséből
+            # hiányzik egy kötelező mező, hogy a pótló kérés is mérve legyen
+            rec = {k: str(rec.get(k, "")) for k in schema["schema"]["properties"]}
+            if schema["name"] == "sds_extract" and m and int(m.group(1)) % MISSING_EVERY == 0:
+                rec["emergency_phone"] = ""
+        if '"main_hazardous_component"' in system:
+            sev = 4 if "H350" in user or "H340" in user else 3 if "H314" in user or "H225" in user else 2
+            content = json.dumps({"main_hazardous_component": rec.get("comp1_name", ""), "exposure_mode": "inhalation, skin",
+                                  "ppe_specification": "Nitrile gloves 0.4 mm, >480 min, EN ISO 374", "probability": 2,
+                                  "severity": sev, "risk_score": 2 * sev, "required_action": "Local exhaust ventilation",
+                                  "post_action_probability": 1, "post_action_severity": sev, "residual_risk": sev})
+        else:
+            content = json.dumps(rec, ensure_ascii=False)
+        return _response(content, count_tokens(system + user), count_tokens(content))
+
+
+class RecordingClient:
+    """Valódi OpenAI kliens köré: minden választ a fixtures JSONL fájlba ír a ReplayClient számára"""
+
+    def __init__(self, client, path: str):
+        self._client, self.path = client, path
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kw):
+        resp = self._client.chat.completions.create(**kw)
+        usage = resp.usage
+        item = {"key": request_key(kw), "content": resp.choices[0].message.content,
+                "prompt_tokens": usage.prompt_tokens if usage else 0, "completion_tokens": usage.completion_tokens if usage else 0}
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        return resp
+
+
+# ============================================================
+# 3. MÉRÉS
+# ============================================================
+
+def peak_rss_mb() -> Optional[float]:
+    """A folyamat eddigi csúcs-memóriája (RSS, MB; ru_maxrss – csak nő, szakaszonként nem nullázódik); Windows alatt None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def rss_mb() -> Optional[float]:
+    """A folyamat pillanatnyi memóriája (RSS, MB) /proc/self/statm-ből; ahol nincs /proc, None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class Stage:
+    """Egy szakasz mérése: with blokk ideje és memóriája; a tokeneket és hívásokat a blokk adja hozzá.
+    A pillanatnyi RSS-t egy háttérszál mintavételezi (RSS_SAMPLE_S), így a jelentésben szakaszonként:
+    rss_start_mb (induláskor), stage_peak_rss_mb (a szakasz alatti csúcs), stage_rss_growth_mb (csúcs − induló),
+    process_peak_rss_mb (a folyamat addigi csúcsa, ru_maxrss – a korábbi szakaszokét is tartalmazza)."""
+
+    def __init__(self, name: str, report: dict):
+        self.name, self.report = name, report
+        self.tokens_in = self.tokens_out = self.calls = 0
+        self.rss_start = self.rss_peak = None
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def _sample(self):
+        while not self._stop.wait(RSS_SAMPLE_S):
+            self.rss_peak = max(self.rss_peak, rss_mb() or 0.0)
+
+    def __enter__(self):
+        self.rss_start = self.rss_peak = rss_mb()
+        if self.rss_start is not None:
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.t0
+        if self._sampler:
+            self._stop.set(); self._sampler.join()
+            self.rss_peak = max(self.rss_peak, rss_mb() or 0.0)
+        start, peak = self.rss_start, self.rss_peak
+        n = self.report["products"]
+        self.report["stages"][self.name] = {
+            "seconds": round(seconds, 3), "ms_per_product": round(seconds * 1000 / max(1, n), 2),
+            "rss_start_mb": None if start is None else round(start, 1),
+            "stage_peak_rss_mb": None if peak is None else round(peak, 1),
+            "stage_rss_growth_mb": None if start is None else round(peak - start, 1),
+            "process_peak_rss_mb": peak_rss_mb(),
+            "calls": self.calls, "tokens_in": self.tokens_in, "tokens_out": self.tokens_out}
+        return False
+
+
+def run_benchmark(n: int, lang: str = "en", workers: int = 4, rules: bool = True, stages=STAGES, seed: int = 0,
+                  client=None, progress=None) -> dict:
+    """n szintetikus termék végigvitele a kért szakaszokon; a jelentés szótár (JSON-ba írható).
+    client: OpenAI-kompatibilis kliens (alapértelmezés: ReplayClient); progress(szakasz) a szakaszok elején."""
+    from sds_rate_limit import set_client, get_limiter
+    from sds_pdf import available_backends
+    from sds_pipeline import (PDFFile, SYSTEM_PROMPT_EXTRACT, SYSTEM_PROMPT_RISK, extract_text_from_pdf,
+                              build_extract_msg, build_risk_msg, call_gpt, process_batch, refill_missing,
+                              EXTRACT_FORMAT)
+    from sds_phrases import expand_record
+    from sds_risk_rules import prescore, annotate_levels
+    from sds_tokens import usage_tokens
+    from sds_excel import generate_full_excel
+    from sds_export import export_zip, available_formats
+    from sds_dedup import cluster, fingerprint_text
+    from sds_metrics import RunMetrics
+    from sds_registry import DB_KEYS
+
+    client = client or ReplayClient(seed=seed)
+    set_client(BENCH_KEY, client)
+    get_limiter(BENCH_KEY, 10**9, 10**12)
+    report = {"products": n, "lang": lang, "workers": workers, "rules": rules, "seed": seed,
+              "pdf_backend": (available_backends() or ["-"])[0], "python": platform.python_version(),
+              "platform": platform.platform(), "started": datetime.now().isoformat(timespec="seconds"), "stages": {}}
+    t_start = time.perf_counter()
+    files = [PDFFile(f"bench_{i:05d}.pdf", synthetic_pdf(synthetic_record(i, seed))) for i in range(n)]
+    report["generate_seconds"] = round(time.perf_counter() - t_start, 3)
+    report["pdf_mb"] = round(sum(len(f.getvalue()) for f in files) / 1024 / 1024, 1)
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+
+    def step(name):
+        if progress:
+            progress(name)
+        return Stage(name, report)
+
+    def extract(pdf, msg):
+        """Kinyerés (JSON séma) + a hiányzó kötelező mezők pótlása, mint a process_single_sds-ben"""
+        if not msg:
+            return {"_error": "PDF"}
+        sds = call_gpt(BENCH_KEY, SYSTEM_PROMPT_EXTRACT, msg, EXTRACT_FORMAT)
+        if "_error" not in sds:
+            refill_missing(BENCH_KEY, pdf, sds, lang)
+        return sds
+
+    pdfs = results = risks = None
+    if any(s in stages for s in ("parse", "dedup", "extract", "risk") + EXPORTS):
+        with step("parse"):
+            pdfs = [extract_text_from_pdf(f) for f in files]
+    if "dedup" in stages:
+        # Ujjlenyomat + LSH klaszterezés a kinyert szövegekből; a szintetikus termékek mind különbözők (klaszter = n)
+        with step("dedup"):
+            dd = cluster([fingerprint_text(f.name, p.text, sections=p.sections) for f, p in zip(files, pdfs)], lang)
+        report["dedup_clusters"], report["dedup_pairs"] = len(dd.clusters), dd.pairs
+    if any(s in stages for s in ("extract", "risk") + EXPORTS):
+        with step("extract") as s:
+            msgs = [build_extract_msg(p, lang) for p in pdfs]
+            results = list(pool.map(extract, pdfs, msgs))
+            report["refilled"] = sum(1 for sds in results if sds.get("_refilled"))
+            report["missing"] = sum(1 for sds in results if sds.get("_missing"))
+            for f, sds in zip(files, results):
+                sds["_source_file"] = f.name
+                sds["_status"] = f"❌ {sds['_error']}" if "_error" in sds else "✅"
+                expand_record(sds, lang)
+                p_in, p_out = usage_tokens(sds)
+                s.tokens_in += p_in; s.tokens_out += p_out; s.calls += bool(p_in)
+    if any(s in stages for s in ("risk",) + EXPORTS):
+        with step("risk") as s:
+            risks = [prescore(sds, lang) if rules and sds["_status"] == "✅" else None for sds in results]
+            todo = [i for i, r in enumerate(risks) if r is None and results[i]["_status"] == "✅"]
+            for i, risk in zip(todo, pool.map(lambda i: call_gpt(BENCH_KEY, SYSTEM_PROMPT_RISK, build_risk_msg(results[i], lang)), todo)):
+                p_in, p_out = usage_tokens(risk)
+                s.tokens_in += p_in; s.tokens_out += p_out; s.calls += 1
+                risks[i] = {} if "_error" in risk else annotate_levels(risk)
+            risks = [r or {} for r in risks]
+            report["rule_based"] = sum(1 for r in risks if r.get("_rule_based"))
+    if "excel" in stages:
+        with step("excel"):
+            today = date.today()
+            size = len(generate_full_excel(results, risks, "Benchmark", today, today, today, lang))
+        report["excel_mb"] = round(size / 1024 / 1024, 2)
+    for fmt in EXPORTS[1:]:
+        if fmt not in stages:
+            continue
+        if fmt not in available_formats():
+            report[f"{fmt}_skipped"] = "pyarrow nincs telepítve"
+            continue
+        # Ugyanaz a három tábla (adatbázis, kockázat, intézkedés), mint az Excelben – formátumonkénti áteresztés
+        with step(fmt):
+            today = date.today()
+            size = len(export_zip(results, risks, fmt, "Benchmark", today, today, today, lang))
+        report[f"{fmt}_mb"] = round(size / 1024 / 1024, 2)
+    if "pipeline" in stages:
+        metrics = RunMetrics(n, "benchmark")
+        with step("pipeline") as s:
+            pairs = process_batch(files, BENCH_KEY, lang, workers, None, None, False, rules, None, metrics)
+            for sds, risk in pairs:
+                s.tokens_in += sds.get("_tokens_in", 0); s.tokens_out += sds.get("_tokens_out", 0)
+        report["pipeline_failed"] = sum(1 for sds, _ in pairs if sds.get("_status", "").startswith("❌"))
+        # a process_batch belső szakaszai (szálanként összegzett idő, p50/p95)
+        report["pipeline_spans"] = metrics.summary()["stages"]
+    if "memory" in stages:
+        with step("memory"):
+            if results is None:
+                results = [dict(synthetic_record(i, seed), _source_file=f.name, _status="✅") for i, f in enumerate(files)]
+                risks = [{} for _ in results]
+            # A modell a séma minden kulcsát visszaadja (üresen is), a szintetikus rekord csak a kitöltötteket
+            blank = {k: "" for k in DB_KEYS if k and not k.startswith("_")}
+            report["session_memory"] = session_memory([{**blank, **sds} for sds in results], risks)
+    pool.shutdown()
+    report["total_seconds"] = round(time.perf_counter() - t_start, 3)
+    if isinstance(client, ReplayClient):
+        report["replayed"], report["synthetic"] = client.replayed, client.synthetic
+    return report
+
+
+def session_memory(results: List[dict], risks: List[dict]) -> dict:
+    """A nyilvántartás memóriaigénye (tracemalloc) és pickle mérete dict listaként és tömör rekordokként.
+    Mindkét változat friss (JSON-ból visszaolvasott) objektumokból épül, mint a valódi munkamenetben."""
+    import pickle
+    import tracemalloc
+    from sds_records import compact_records, compact_risks
+    raw = json.dumps([results, risks], ensure_ascii=False, default=str)
+
+    def measure(build):
+        tracemalloc.start()
+        try:
+            data = build(*json.loads(raw))
+            size = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        return size, len(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+
+    before = measure(lambda r, k: (r, k))
+    after = measure(lambda r, k: (compact_records(r), compact_risks(k)))
+    n = max(1, len(results))
+    return {"dict_mb": round(before[0] / 2**20, 2), "compact_mb": round(after[0] / 2**20, 2),
+            "dict_bytes_per_product": before[0] // n, "compact_bytes_per_product": after[0] // n,
+            "pickle_dict_mb": round(before[1] / 2**20, 2), "pickle_compact_mb": round(after[1] / 2**20, 2),
+            "ratio": round(after[0] / max(1, before[0]), 3)}
+
+
+def compare(old: dict, new: dict, threshold: float = 1.2) -> List[str]:
+    """Szakaszonkénti összevetés; a threshold-nál nagyobb lassulású szakaszok nevei"""
+    slower = []
+    for name, cur in new["stages"].items():
+        prev = old.get("stages", {}).get(name)
+        if not prev or not prev["seconds"]:
+            continue
+        ratio = cur["seconds"] / prev["seconds"]
+        mark = "⚠️" if ratio > threshold else "  "
+        print(f"{mark} {name:<9} {prev['seconds']:>9.3f}s → {cur['seconds']:>9.3f}s  ×{ratio:.2f}  "
+              f"RSS +{prev.get('stage_rss_growth_mb')} → +{cur.get('stage_rss_growth_mb')} MB")
+        if ratio > threshold:
+            slower.append(name)
+    return slower
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="sds_bench.py", description="Offline teljesítménymérés a feldolgozási láncra")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="small",
+                        help=", ".join(f"{k}: {v} termék" for k, v in SCENARIOS.items()))
+    parser.add_argument("-n", "--products", type=int, help="Termékszám (felülírja a --scenario értékét)")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Mért szakaszok ({','.join(STAGES)})")
+    parser.add_argument("--lang", default="en", help="Kimeneti nyelv kódja")
+    parser.add_argument("--workers", type=int, default=4, help="Párhuzamos hívások száma")
+    parser.add_argument("--no-rules", action="store_true", help="Szabály-alapú előértékelés nélkül (minden kockázat GPT-vel)")
+    parser.add_argument("--seed", type=int, default=0, help="Szintetikus adatok seed-je")
+    parser.add_argument("--latency", type=float, default=0.0, help="Szimulált API késleltetés hívásonként (mp)")
+    parser.add_argument("--fixtures", help="Rögzített válaszok (JSONL) visszajátszása")
+    parser.add_argument("--record", help="Valódi API hívások, a válaszok ide (JSONL) rögzítve")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY", ""), help="Csak --record esetén")
+    parser.add_argument("-o", "--output", help="Eredmény JSON (alapértelmezés: bench_<scenario>_<idő>.json)")
+    parser.add_argument("--compare", help="Korábbi eredmény JSON – szakaszonkénti összevetés")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Ennyiszeres lassulás felett 1-es kilépési kód")
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        print(f"Ismeretlen szakasz: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    if args.record:
+        if not args.api_key:
+            print("--record esetén kell API kulcs (--api-key vagy OPENAI_API_KEY)", file=sys.stderr)
+            return 2
+        from sds_rate_limit import get_client
+        client = RecordingClient(get_client(args.api_key), args.record)
+    else:
+        client = ReplayClient(args.fixtures, args.seed, args.latency)
+    n = args.products or SCENARIOS[args.scenario]
+    report = run_benchmark(n, args.lang, args.workers, not args.no_rules, stages, args.seed, client,
+                           lambda name: print(f"▶ {name} ({n} termék)", file=sys.stderr))
+    report["scenario"] = args.scenario if not args.products else "custom"
+    output = args.output or f"bench_{report['scenario']}_{datetime.now():%Y%m%d_%H%M}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    for name, st in report["stages"].items():
+        print(f"{name:<9} {st['seconds']:>9.3f}s  {st['ms_per_product']:>8.2f} ms/termék  "
+              f"RSS {st['stage_peak_rss_mb']} MB (+{st['stage_rss_growth_mb']})  "
+              f"token {st['tokens_in']:,}/{st['tokens_out']:,}")
+    mem = report.get("session_memory")
+    if mem:
+        print(f"Munkamenet  dict {mem['dict_mb']} MB → tömör {mem['compact_mb']} MB (×{mem['ratio']}), "
+              f"pickle {mem['pickle_dict_mb']} → {mem['pickle_compact_mb']} MB")
+    print(f"Összesen {report['total_seconds']}s → {output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            return 1 if compare(json.load(f), report, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+SDS Eredmény-gyorsítótár
+========================
+Tartalom-alapú, lemezen tárolt (SQLite) gyorsítótár a kinyerési és kockázatértékelési eredményekhez.
+Kulcs: PDF tartalom SHA-256 + célnyelv + prompt verzió (a szabály-alapú előértékelés be/ki állapotával) + modell.
+Ugyanaz a PDF újrafeltöltve (másik futás, éves felülvizsgálat) nem fizet újra a GPT hívásokért.
+"""
+
+import sqlite3
+import json
+import hashlib
+import threading
+import time
+import os
+from typing import Optional, Tuple
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "SDS_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".sds_ai", "cache.sqlite3"))
+# Hosszan futó folyamatban (Streamlit szerver, worker) a kilakoltatás ennyi beírásonként / ennyi idő után fut újra
+EVICT_EVERY = 100
+EVICT_INTERVAL = 3600
+
+
+def content_hash(data: bytes) -> str:
+    """PDF tartalom SHA-256 hash-e"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def prompt_version(*prompts: str) -> str:
+    """A system promptokból képzett rövid verzió-azonosító – prompt módosításkor a régi bejegyzések érvénytelenek"""
+    return hashlib.sha256("\x00".join(prompts).encode("utf-8")).hexdigest()[:16]
+
+
+class SDSCache:
+    """Szálbiztos SQLite gyorsítótár (sds, risk) párokhoz, kor- és méretalapú kilakoltatással"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_mb: float = 200, max_age_days: int = 400):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_age_s = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._evicted = 0.0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY, sds TEXT NOT NULL, risk TEXT NOT NULL,
+            size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed ON results(accessed)")
+        self._db.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(pdf_hash: str, lang: str, prompt_ver: str, model: str) -> str:
+        return f"{pdf_hash}:{lang}:{prompt_ver}:{model}"
+
+    def get(self, key: str) -> Optional[Tuple[dict, dict]]:
+        with self._lock:
+            row = self._db.execute("SELECT sds, risk, created FROM results WHERE key=?", (key,)).fetchone()
+            if row is None or time.time() - row[2] > self.max_age_s:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE results SET accessed=? WHERE key=?", (time.time(), key))
+            self._db.commit()
+            self.hits += 1
+        return json.loads(row[0]), json.loads(row[1])
+
+    def put(self, key: str, sds: dict, risk: dict):
+        sds_json = json.dumps(sds, ensure_ascii=False)
+        risk_json = json.dumps(risk, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?,?,?,?,?,?)",
+                             (key, sds_json, risk_json, len(sds_json) + len(risk_json), now, now))
+            self._db.commit()
+            self._puts += 1
+            due = self._puts % EVICT_EVERY == 0 or now - self._evicted > EVICT_INTERVAL
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Lejárt bejegyzések törlése, majd a legrégebben használtak törlése a méretkorlátig"""
+        with self._lock:
+            self._evicted = time.time()
+            self._db.execute("DELETE FROM results WHERE created < ?", (time.time() - self.max_age_s,))
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total > self.max_bytes:
+                freed = 0
+                for key, size in self._db.execute("SELECT key, size FROM results ORDER BY accessed").fetchall():
+                    if total - freed <= self.max_bytes:
+                        break
+                    self._db.execute("DELETE FROM results WHERE key=?", (key,))
+                    freed += size
+            self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            n, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {"entries": n, "size_mb": size / 1024 / 1024, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM results")
+            self._db.commit()
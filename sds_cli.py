@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+SDS Feldolgozó – Parancssor
+===========================
+Ugyanaz a folyamat, mint a Streamlit felületen (PDF → kinyerés → kockázatértékelés → Excel), böngésző nélkül,
+pl. cron-ból vagy szkriptből:
+    python sds_cli.py --lang de --workers 8 in/*.pdf -o out.xlsx --evaluator "Kiss Anna"
+    python sds_cli.py --registry SDS_Database_2025.xlsx uj/*.pdf -o SDS_Database_2026.xlsx
+    python sds_cli.py --resume 3f2a9c1b7d4e -o out.xlsx      # megszakadt futás folytatása (csak a hiányzó SDS-ek)
+    python sds_cli.py --dedup --registry SDS_Database_2025.xlsx uj/*.pdf   # klaszterenként egy SDS
+
+A modulok (openai, openpyxl, PDF motorok) csak az argumentumok feldolgozása után töltődnek be,
+így a --help azonnal válaszol.
+"""
+
+import argparse
+import glob
+import os
+import sys
+from datetime import datetime, date
+from typing import Optional, List
+
+
+def _date(value: str) -> date:
+    for fmt in ("%Y-%m-%d", "%Y.%m.%d", "%Y.%m.%d."):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Érvénytelen dátum: {value} (ÉÉÉÉ-HH-NN)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    today = date.today()
+    parser = argparse.ArgumentParser(prog="sds_cli.py",
+                                     description="SDS PDF-ek feldolgozása SDS_Database Excel munkafüzetbe")
+    parser.add_argument("pdfs", nargs="*", help="PDF fájlok (glob minta is megadható, pl. 'in/*.pdf')")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Megszakadt futás folytatása a futás-tárolóból (PDF-ek nélkül)")
+    parser.add_argument("-o", "--output", help="Kimeneti .xlsx (alapértelmezés: SDS_Database_<nyelv>_<idő>.xlsx)")
+    parser.add_argument("--format", default="xlsx",
+                        help="Kimeneti formátum(ok) vesszővel: xlsx, csv, jsonl, parquet – a nem xlsx formátum "
+                             "táblánként egy fájl (<output>_database / _risk / _actions)")
+    parser.add_argument("--lang", default="hu", help="Kimeneti nyelv kódja (hu, en, de, ... – 24 EU nyelv)")
+    parser.add_argument("--workers", type=int, default=4, help="Párhuzamosan feldolgozott SDS-ek száma")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY", ""),
+                        help="OpenAI API kulcs (alapértelmezés: OPENAI_API_KEY)")
+    parser.add_argument("--evaluator", default="", help="Értékelő neve")
+    parser.add_argument("--eval-date", type=_date, default=today, help="Értékelés dátuma")
+    parser.add_argument("--review-date", type=_date, default=None, help="Felülvizsgálat (alapértelmezés: +1 év)")
+    parser.add_argument("--deadline", type=_date, default=date(today.year, 6, 30), help="Intézkedés határideje")
+    parser.add_argument("--registry", help="Meglévő SDS_Database_*.xlsx, amelyhez az új SDS-ek fűződnek")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Közel-duplikátumok (több nyelvű / revíziós SDS-ek) közül csak a klaszter képviselője kerül "
+                             "feldolgozásra; --registry mellett a nyilvántartásban azonos dátummal már szereplők is kimaradnak")
+    parser.add_argument("--no-cache", action="store_true", help="Gyorsítótár megkerülése")
+    parser.add_argument("--no-rules", action="store_true",
+                        help="Szabály-alapú előértékelés kikapcsolása (minden kockázatértékelés GPT-vel)")
+    parser.add_argument("--no-index", action="store_true",
+                        help="Anyag-index (CAS/EC) kihagyása: nem pótol összetevő-adatot és nem bővül")
+    parser.add_argument("--report", help="Futás-jelentés: szakaszonkénti idő és token (.json összesítő + spanok, .csv spanonként)")
+    parser.add_argument("--cost-center", default="", help="Költséghely / osztály a futás-jelentésben")
+    parser.add_argument("--rpm", type=int, help="OpenAI kérés / perc keret")
+    parser.add_argument("--tpm", type=int, help="OpenAI token / perc keret")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Csak hibák és az összesítő")
+    return parser
+
+
+def expand_paths(patterns: List[str]) -> List[str]:
+    """Glob minták kibontása (Windows shell nem bontja ki), ismétlődések nélkül, a megadási sorrendben"""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(p for p in matches if p not in paths)
+    return paths
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    from sds_languages import LANG_NAMES
+    if args.lang not in LANG_NAMES:
+        print(f"Ismeretlen nyelv: {args.lang} (elérhető: {', '.join(LANG_NAMES)})", file=sys.stderr)
+        return 2
+    from sds_export import available_formats
+    formats = [f.strip().lower() for f in args.format.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in available_formats()]
+    if unknown or not formats:
+        print(f"Ismeretlen vagy nem elérhető formátum: {', '.join(unknown) or '-'} "
+              f"(elérhető: {', '.join(available_formats())})", file=sys.stderr)
+        return 2
+    if not args.api_key:
+        print("Hiányzó OpenAI API kulcs (--api-key vagy OPENAI_API_KEY)", file=sys.stderr)
+        return 2
+    paths = expand_paths(args.pdfs)
+    if not paths and not args.resume:
+        print("Adj meg PDF fájlokat vagy egy folytatandó futást (--resume)", file=sys.stderr)
+        return 2
+    missing = [p for p in paths if not os.path.isfile(p)]
+    if missing:
+        print(f"Nem található: {', '.join(missing)}", file=sys.stderr)
+        return 2
+
+    from sds_cache import SDSCache
+    from sds_substances import SubstanceIndex
+    from sds_metrics import RunMetrics
+    from sds_rate_limit import get_limiter, DEFAULT_RPM, DEFAULT_TPM
+    from sds_pipeline import PDFFile, MODEL
+    from sds_runs import RunStore, run_pending
+    from sds_export import export_registry
+    get_limiter(args.api_key, args.rpm or DEFAULT_RPM, args.tpm or DEFAULT_TPM)
+
+    def on_done(done, total, sds, risk):
+        if not args.quiet or sds.get('_status', '').startswith('❌'):
+            print(f"[{done}/{total}] {sds.get('_status', '?')} {sds.get('_source_file', '?')} – "
+                  f"{sds.get('product_name', '?')} | {risk.get('risk_level', '—') if risk else '—'}", file=sys.stderr)
+
+    store = RunStore()
+    if args.resume:
+        run = store.get(args.resume)
+        if run is None:
+            print(f"Ismeretlen futás: {args.resume}", file=sys.stderr)
+            return 2
+        run_id = run["run_id"]; args.lang = run["lang"]
+    else:
+        files = [PDFFile.from_path(p) for p in paths]
+        if args.dedup:
+            from sds_dedup import find_duplicates, dedup_table
+            from sds_registry import load_registry
+            known = load_registry(args.registry)[0] if args.registry else None
+            dd = find_duplicates(files, args.lang, known, args.workers)
+            keep = dd.keep(skip_registry=known is not None)
+            for row in [] if args.quiet else dedup_table(dd, known):
+                print(f"  [{row['Klaszter']}] {row['Feldolgozásra']} {row['Fájl']} ({row['Nyelv']}, {row['Dátum']}) "
+                      f"{row['Indok']} {row['Nyilvántartásban']}".rstrip(), file=sys.stderr)
+            ds = dd.summary()
+            print(f"Közel-duplikátumok: {len(files)} PDF → {len(keep)} feldolgozandó ({ds['duplicates']} duplikátum"
+                  + (f", {ds['registry']} már a nyilvántartásban" if known is not None else "") + f"; {dd.seconds:.1f} s)",
+                  file=sys.stderr)
+            files = [files[i] for i in keep]
+        run_id = store.create(files, args.lang, args.cost_center, {"rules": not args.no_rules, "use_cache": not args.no_cache})
+    run = store.get(run_id)
+    print(f"Futás: {run_id} ({run['pending'] + run['failed']}/{run['total']} SDS feldolgozandó; "
+          f"folytatás: --resume {run_id})", file=sys.stderr)
+    index = None if args.no_index else SubstanceIndex()
+    metrics = RunMetrics(run["pending"] + run["failed"], run["label"], MODEL, run_id=run_id)
+    results, risks = run_pending(store, run_id, args.api_key, args.workers, on_done, SDSCache(), index, metrics)
+    total = len(results)
+    failed = sum(1 for s in results if s.get('_status', '').startswith('❌'))
+    saved = sum(1 for s, r in zip(results, risks) if r and r.get('_rule_based') and not s.get('_cached'))
+
+    if args.registry:
+        from sds_registry import load_registry, merge_registry
+        old_r, old_k = load_registry(args.registry)
+        results, risks, stats = merge_registry(old_r, old_k, results, risks)
+        print(f"Összefésülve: {stats['added']} új, {stats['updated']} frissített, "
+              f"{stats['unchanged']} változatlan → {len(results)} termék", file=sys.stderr)
+        if index is not None:
+            index.add_records(results)
+
+    ev = args.eval_date
+    review = args.review_date or ev.replace(year=ev.year + 1, day=28 if (ev.month, ev.day) == (2, 29) else ev.day)
+    output = args.output or f"SDS_Database_{args.lang}_{datetime.now():%Y%m%d_%H%M}.xlsx"
+    written = []
+    for fmt in formats:
+        with metrics.span("excel" if fmt == "xlsx" else f"export_{fmt}"):
+            written += export_registry(results, risks, fmt, output, args.evaluator, args.eval_date, review, args.deadline,
+                                       args.lang, index)
+    metrics.finish()
+    if args.report:
+        metrics.save(args.report)
+        rep = metrics.summary()
+        print(f"Futás-jelentés → {args.report} ({rep['wall_seconds']:.1f} s, {rep['tokens_in']:,}/{rep['tokens_out']:,} token, "
+              f"${rep['cost_usd']:.2f}, szűk keresztmetszet: {rep['bottleneck']})", file=sys.stderr)
+    print(f"{total - failed}/{total} SDS feldolgozva, {saved} GPT hívás megspórolva "
+          f"(szabály-alapú kockázatértékelés) → {', '.join(written)}")
+    return 1 if total and failed == total else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+SDS Közel-duplikátumok
+======================
+Feldolgozás előtti olcsó szűrés: ugyanannak a terméknek több nyelvű vagy kissé eltérő revíziójú adatlapja
+egy klaszterbe kerül, és klaszterenként elég egy SDS-t feldolgozni (GPT hívás nélkül, csak PDF szöveg alapján).
+Ujjlenyomat PDF-enként:
+  - tartalom-hash (bájtra azonos fájl), UFI kód(ok), ellenőrzött CAS számok
+  - MinHash a nyelvfüggetlen kódokból (CAS/EC, H/P/EUH, UN szám, dátum, számértékek) – a fordítások is egyeznek
+  - MinHash a normalizált szöveg 5 szavas shingle-jeiből – azonos nyelvű revíziók
+  - a fejléc és az 1. szakasz azonosítói (cikkszám, telefon, irányítószám – dátum nélkül): a termék személyazonossága
+A jelölt párokat LSH (sávos MinHash) adja, így a költség ~lineáris a fájlszámmal (nem minden pár összevetése).
+Összevonás: azonos hash vagy közös UFI; különben a kód-hasonlóság ≥ CODE_SIM és az azonosítók egyezése ≥ IDENT_SIM,
+azonos nyelvnél a szöveg-hasonlóság ≥ TEXT_SIM is kell (a sablonos szöveg egymagában nem elég). Eltérő UFI kódú klaszterek nem vonódnak össze. A meglévő nyilvántartás sorai UFI, illetve
+CAS-halmaz + a PDF szövegében szereplő terméknév alapján illeszkednek.
+Azonos összetételű termékváltozatok (pl. színek) is egy klaszterbe kerülhetnek – a felületen felülbírálható.
+"""
+
+import re
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from sds_cache import content_hash
+from sds_pdf import SECTION_WORDS
+from sds_registry import normalize_text
+from sds_substances import CAS_RE, COMPONENTS, normalize_cas
+
+NUM_PERM = 128
+BANDS, ROWS = 20, 6          # LSH: 20 sáv × 6 sor (a 128 permutációból 120) → küszöb ~0.6
+SHINGLE = 5
+CODE_SIM = 0.7               # kód-halmaz becsült Jaccard-hasonlósága
+TEXT_SIM = 0.6               # szöveg-shingle becsült Jaccard-hasonlósága (azonos nyelv)
+IDENT_SIM = 0.6              # az 1. szakasz azonosítóinak (cikkszám, telefon, cím) Jaccard-hasonlósága
+MIN_CODES = 8                # ennél kevesebb kód (pl. szkennelt PDF) → csak hash / UFI alapján
+SEED = 20240501
+
+UFI_RE = re.compile(r"(?<![0-9A-Z])([0-9A-Z]{4}-[0-9A-Z]{4}-[0-9A-Z]{4}-[0-9A-Z]{4})(?![0-9A-Z])")
+UFI_TEXT_RE = re.compile(r"\bUFI\s*[:：]?\s*([0-9A-Z]{4}-[0-9A-Z]{4}-[0-9A-Z]{4}-[0-9A-Z]{4})(?![0-9A-Z])")
+DATE_RE = re.compile(r"(?<!\d)(?:(\d{4})[./-] ?(\d{1,2})[./-] ?(\d{1,2})|(\d{1,2})[./-] ?(\d{1,2})[./-] ?(\d{4}))(?!\d)")
+CODE_RE = re.compile(r"(?P<date>(?<!\d)(?:\d{4}[./-] ?\d{1,2}[./-] ?\d{1,2}|\d{1,2}[./-] ?\d{1,2}[./-] ?\d{4})(?!\d))"
+                     r"|(?P<id>(?<!\d)\d{2,7}-\d{2,3}-\d(?!\d))"
+                     r"|(?P<code>\b(?:EUH|H|P)\d{3}(?:\+P\d{3})*\b)"
+                     r"|(?P<un>\bUN ?\d{4}\b)"
+                     r"|(?P<num>\d+(?:[.,]\d+)*)")
+SUBSECTION_RE = re.compile(r"\d{1,2}(?:\.\d{1,2})?")   # 1.1, 16.2, 3 – minden SDS-ben azonos
+WORD_LANGS: Dict[str, List[str]] = {}
+for _lang, _words in SECTION_WORDS.items():
+    for _w in _words:
+        WORD_LANGS.setdefault(_w.casefold(), []).append(_lang)
+LANG_RE = re.compile(rf"\b(?:{'|'.join(sorted(map(re.escape, WORD_LANGS), key=len, reverse=True))})\b", re.IGNORECASE)
+
+_perm = None
+
+
+@dataclass
+class Fingerprint:
+    """Egy feltöltött PDF ujjlenyomata és a klaszterezés eredménye"""
+    name: str
+    content_hash: str
+    lang: str = ""
+    ufi: FrozenSet[str] = frozenset()
+    cas: FrozenSet[str] = frozenset()
+    dates: FrozenSet[str] = frozenset()
+    ident: FrozenSet[str] = frozenset()  # a fejléc / 1. szakasz nyelvfüggetlen azonosítói
+    newest: str = ""                     # a fejléc legújabb dátuma (revízió / kiadás) – ÉÉÉÉ-HH-NN
+    codes: int = 0
+    code_sig: Optional[object] = None    # numpy uint32[NUM_PERM]
+    text_sig: Optional[object] = None
+    error: Optional[str] = None
+    cluster: int = -1
+    representative: bool = True
+    reason: str = ""                     # miért duplikátuma a klaszter képviselőjének
+    registry_row: Optional[int] = None
+    registry_reason: str = ""
+    registry_same: bool = False          # a nyilvántartásbeli sor dátuma egyezik (nem újabb revízió)
+
+
+@dataclass
+class DedupResult:
+    fingerprints: List[Fingerprint]
+    clusters: List[List[int]] = field(default_factory=list)   # tagok indexei, az első a képviselő
+    pairs: int = 0                                            # LSH jelölt párok (ellenőrzött összevetések)
+    seconds: float = 0.0
+
+    def keep(self, skip_registry: bool = False) -> List[int]:
+        """A feldolgozandó fájlok indexei: klaszterenként a képviselő; skip_registry esetén kimarad az a klaszter,
+        amelynek valamely tagja a nyilvántartás azonos dátumú sorával egyezik"""
+        fps = self.fingerprints
+        return sorted(c[0] for c in self.clusters
+                      if not (skip_registry and any(fps[i].registry_same for i in c)))
+
+    def summary(self) -> Dict[str, int]:
+        return {"files": len(self.fingerprints), "clusters": len(self.clusters),
+                "duplicates": sum(len(c) - 1 for c in self.clusters),
+                "registry": sum(1 for c in self.clusters if any(self.fingerprints[i].registry_same for i in c))}
+
+
+# ============================================================
+# 1. MINHASH
+# ============================================================
+
+def _permutations():
+    """Multiply-shift hash család: (a·x + b) mod 2^64 felső 32 bitje, a páratlan"""
+    global _perm
+    if _perm is None:
+        import numpy as np
+        rng = np.random.default_rng(SEED)
+        a = rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+        b = rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+        _perm = a, b
+    return _perm
+
+
+def minhash(hashes) -> Optional[object]:
+    """64 bites elem-hashek (numpy uint64) → uint32[NUM_PERM] aláírás; üres halmazra None"""
+    import numpy as np
+    if len(hashes) == 0:
+        return None
+    a, b = _permutations()
+    sig = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(hashes), 4096):   # a köztes mátrix legfeljebb 4096 × NUM_PERM
+        chunk = hashes[start:start + 4096, None]
+        np.minimum(sig, ((chunk * a + b) >> np.uint64(32)).min(axis=0), out=sig)
+    return sig.astype(np.uint32)
+
+
+def similarity(sig1, sig2) -> float:
+    """Becsült Jaccard-hasonlóság (egyező aláírás-pozíciók aránya)"""
+    if sig1 is None or sig2 is None:
+        return 0.0
+    return float((sig1 == sig2).mean())
+
+
+def _hash_tokens(tokens: List[str]):
+    import numpy as np
+    return np.fromiter((zlib.crc32(t.encode("utf-8")) for t in tokens), dtype=np.uint64, count=len(tokens))
+
+
+def shingle_hashes(words: List[str], k: int = SHINGLE):
+    """k szavas shingle-ök 64 bites hashei vektorosan (szóhash-ek súlyozott összege mod 2^64), egyedi értékek"""
+    import numpy as np
+    w = _hash_tokens(words)
+    if len(w) < k:
+        return np.unique(w)
+    n = len(w) - k + 1
+    h = np.zeros(n, dtype=np.uint64)
+    for j in range(k):
+        h = h * np.uint64(0x100000001B3) + w[j:j + n]
+    return np.unique(h)
+
+
+# ============================================================
+# 2. UJJLENYOMAT
+# ============================================================
+
+def _date(m) -> Optional[str]:
+    y, mo, d = (m.group(1), m.group(2), m.group(3)) if m.group(1) else (m.group(6), m.group(5), m.group(4))
+    if 1 <= int(mo) <= 12 and 1 <= int(d) <= 31 and 1950 <= int(y) <= 2100:
+        return f"{y}-{int(mo):02d}-{int(d):02d}"
+    return None
+
+
+def _is_date(token: str) -> bool:
+    return len(token) == 10 and token[4] == "-" and token[7] == "-"
+
+
+def parse_date(value) -> Optional[str]:
+    """Az első dátum ÉÉÉÉ-HH-NN alakban (ÉÉÉÉ.HH.NN, NN.HH.ÉÉÉÉ, NN/HH/ÉÉÉÉ)"""
+    for m in DATE_RE.finditer(str(value or "")):
+        d = _date(m)
+        if d:
+            return d
+    return None
+
+
+def code_tokens(text: str) -> List[str]:
+    """Nyelvfüggetlen tokenek: dátum (egységes alakban), CAS/EC, H/P/EUH, UN szám, legalább 3 jegyű számértékek.
+    A szakaszszámok (1.1, 16.2) és az 1–2 jegyű számok kimaradnak – ezek minden SDS-ben ugyanazok."""
+    out = []
+    for m in CODE_RE.finditer(text):
+        kind, tok = m.lastgroup, m.group(0)
+        if kind == "date":
+            tok = _date(DATE_RE.match(tok))
+        elif kind == "un":
+            tok = tok.replace(" ", "")
+        elif kind == "num":
+            tok = tok.replace(",", ".")
+            if SUBSECTION_RE.fullmatch(tok) or sum(c.isdigit() for c in tok) < 3:
+                continue
+        if tok:
+            out.append(tok)
+    return out
+
+
+def detect_language(text: str) -> str:
+    """A szakaszfejlécek szavai alapján (SECTION / SZAKASZ / ABSCHNITT ...); "" ha nem ismerhető fel"""
+    counts: Dict[str, int] = {}
+    for word in LANG_RE.findall(text):
+        for lang in WORD_LANGS[word.casefold()]:
+            counts[lang] = counts.get(lang, 0) + 1
+    lang = max(counts, key=counts.get, default="")
+    return lang if counts.get(lang, 0) >= 3 else ""
+
+
+def ufi_codes(value) -> FrozenSet[str]:
+    return frozenset(UFI_RE.findall(str(value or "").upper()))
+
+
+def cas_numbers(text: str) -> FrozenSet[str]:
+    """A szövegben szereplő, ellenőrző számjegyük szerint érvényes CAS számok"""
+    return frozenset(filter(None, (normalize_cas(m.group(0)) for m in CAS_RE.finditer(text))))
+
+
+def fingerprint_text(name: str, text: str, digest: str = "", sections: Optional[Dict[int, str]] = None) -> Fingerprint:
+    """Ujjlenyomat a már kinyert szövegből (sections: sds_pdf szakaszok – a fejléc dátumaihoz)"""
+    codes = code_tokens(text)
+    words = re.findall(r"\w+", text.casefold())
+    sections = sections or {}
+    head = "\n".join(v for k, v in sections.items() if k in (0, 1)) or text[:3000]
+    code_set = sorted(set(codes))
+    return Fingerprint(
+        name, digest or content_hash(text.encode("utf-8")), detect_language(text),
+        frozenset(UFI_TEXT_RE.findall(text.upper())), cas_numbers(text), frozenset(filter(_is_date, codes)),
+        frozenset(t for t in code_tokens(head) if not _is_date(t)),
+        max(filter(None, (_date(m) for m in DATE_RE.finditer(head + "\n" + sections.get(16, "")))), default=""),
+        len(code_set),
+        minhash(_hash_tokens(code_set)) if len(code_set) >= MIN_CODES else None,
+        minhash(shingle_hashes(words)) if len(words) >= SHINGLE else None)
+
+
+def fingerprint_file(pdf_file) -> Tuple[Fingerprint, str]:
+    """PDF fájl (name, getvalue) → (ujjlenyomat, normalizált szöveg a nyilvántartás-illesztéshez)"""
+    from sds_pdf import extract_pdf
+    data = pdf_file.getvalue()
+    pdf = extract_pdf(data)
+    if pdf.error or not pdf.text.strip():
+        return Fingerprint(pdf_file.name, content_hash(data), error=pdf.error or "üres szöveg"), ""
+    return fingerprint_text(pdf_file.name, pdf.text, content_hash(data), pdf.sections), normalize_text(pdf.text)
+
+
+# ============================================================
+# 3. NYILVÁNTARTÁS ILLESZTÉS
+# ============================================================
+
+class RegistryIndex:
+    """A meglévő nyilvántartás sorai UFI és CAS szerint indexelve (fájlonként csak a jelölt sorok ellenőrzése)"""
+
+    def __init__(self, records):
+        self.by_ufi: Dict[str, int] = {}
+        self.by_cas: Dict[str, List[int]] = {}
+        self.rows: Dict[int, Tuple[FrozenSet[str], str, Optional[str]]] = {}
+        for i, rec in enumerate(records):
+            for u in ufi_codes(rec.get("ufi_code")):
+                self.by_ufi.setdefault(u, i)
+            cas = frozenset(filter(None, (normalize_cas(rec.get(c)) for _, c, *_ in COMPONENTS)))
+            name = normalize_text(rec.get("product_name"))
+            self.rows[i] = (cas, name, parse_date(rec.get("sds_revision_date")) or parse_date(rec.get("sds_date")))
+            if cas and len(name) >= 3:
+                for c in cas:
+                    self.by_cas.setdefault(c, []).append(i)
+
+    def match(self, fp: Fingerprint, norm_text: str) -> Optional[Tuple[int, str]]:
+        """(sor, indok) – közös UFI, vagy a sor összes CAS száma a PDF-ben és a terméknév szerepel a szövegben"""
+        for u in sorted(fp.ufi):
+            if u in self.by_ufi:
+                return self.by_ufi[u], "UFI"
+        rows = sorted({i for c in fp.cas for i in self.by_cas.get(c, ())})
+        for i in rows:
+            cas, name, _ = self.rows[i]
+            if cas <= fp.cas and name in norm_text:
+                return i, "CAS + terméknév"
+        return None
+
+    def same_version(self, row: int, fp: Fingerprint) -> bool:
+        """A nyilvántartásbeli dátum szerepel a PDF-ben, és a PDF fejlécében nincs újabb"""
+        date = self.rows[row][2]
+        return bool(date) and date in fp.dates and (not fp.newest or fp.newest <= date)
+
+
+# ============================================================
+# 4. KLASZTEREZÉS
+# ============================================================
+
+def _lsh_pairs(fps: List[Fingerprint]) -> set:
+    """Jelölt párok a kód-aláírás sávjaiból: két fájl jelölt, ha legalább egy sávjuk teljesen egyezik"""
+    pairs = set()
+    for band in range(BANDS):
+        buckets: Dict[bytes, List[int]] = {}
+        for i, fp in enumerate(fps):
+            if fp.code_sig is not None:
+                buckets.setdefault(fp.code_sig[band * ROWS:(band + 1) * ROWS].tobytes(), []).append(i)
+        for members in buckets.values():
+            for x, i in enumerate(members):
+                for j in members[x + 1:]:
+                    pairs.add((i, j))
+    return pairs
+
+
+def link_reason(a: Fingerprint, b: Fingerprint) -> str:
+    """Miért közel-duplikátum b az a-nak; "" ha nem az"""
+    if a.content_hash == b.content_hash:
+        return "azonos fájl"
+    if a.ufi & b.ufi:
+        return "azonos UFI"
+    if a.ufi and b.ufi:
+        return ""
+    code = similarity(a.code_sig, b.code_sig)
+    if code < CODE_SIM or (a.ident or b.ident) and len(a.ident & b.ident) < IDENT_SIM * len(a.ident | b.ident):
+        return ""
+    if a.lang and b.lang and a.lang != b.lang:
+        return f"más nyelv ({b.lang}), kódok {code:.0%}"
+    text = similarity(a.text_sig, b.text_sig)
+    return f"revízió, szöveg {text:.0%}, kódok {code:.0%}" if text >= TEXT_SIM else ""
+
+
+def cluster(fps: List[Fingerprint], lang: str = "hu", registry: Optional[RegistryIndex] = None,
+            texts: Optional[List[str]] = None) -> DedupResult:
+    """Union-find a hash / UFI egyezésekből és az LSH jelöltek közül az ellenőrzötten hasonlókból.
+    Képviselő: a legújabb fejléc-dátumú, azon belül a kimeneti nyelvű, végül a korábban feltöltött."""
+    t0 = time.perf_counter()
+    parent = list(range(len(fps)))
+    ufis = [set(fp.ufi) for fp in fps]
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        ri, rj = find(i), find(j)
+        if ri == rj or (ufis[ri] and ufis[rj] and not ufis[ri] & ufis[rj]):
+            return   # eltérő UFI: különböző termékek, akkor is, ha a szöveg hasonló
+        parent[rj] = ri
+        ufis[ri] |= ufis[rj]
+
+    first: Dict[str, int] = {}
+    for i, fp in enumerate(fps):
+        for key in [fp.content_hash] + sorted(fp.ufi):
+            if key in first:
+                union(first[key], i)
+            else:
+                first[key] = i
+    pairs = _lsh_pairs(fps)
+    for i, j in sorted(pairs):
+        if link_reason(fps[i], fps[j]):
+            union(i, j)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(fps)):
+        groups.setdefault(find(i), []).append(i)
+    clusters = []
+    for members in groups.values():
+        rep = min(members, key=lambda i: (-int(fps[i].newest.replace("-", "") or 0), fps[i].lang != lang, i))
+        members = [rep] + [i for i in members if i != rep]
+        for i in members:
+            fps[i].cluster, fps[i].representative = len(clusters), i == rep
+            fps[i].reason = link_reason(fps[rep], fps[i]) or "hasonló klasztertag" if i != rep else ""
+        clusters.append(members)
+    if registry is not None:
+        for i, fp in enumerate(fps):
+            hit = registry.match(fp, texts[i] if texts else "")
+            if hit:
+                fp.registry_row, fp.registry_reason = hit
+                fp.registry_same = registry.same_version(hit[0], fp)
+    clusters.sort(key=lambda c: c[0])
+    return DedupResult(fps, clusters, len(pairs), time.perf_counter() - t0)
+
+
+def find_duplicates(pdf_files, lang: str = "hu", registry_records=None, max_workers: int = 4) -> DedupResult:
+    """Feltöltött PDF-ek (name, getvalue) klaszterezése; registry_records: a meglévő nyilvántartás rekordjai"""
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        prints = list(pool.map(fingerprint_file, pdf_files))
+    registry = RegistryIndex(registry_records) if registry_records else None
+    result = cluster([fp for fp, _ in prints], lang, registry, [t for _, t in prints])
+    result.seconds = time.perf_counter() - t0
+    return result
+
+
+def dedup_table(result: DedupResult, records=None) -> List[dict]:
+    """Felületi / parancssori táblázat: a többtagú klaszterek és a nyilvántartással egyező fájlok soronként"""
+    fps, out = result.fingerprints, []
+    for n, members in enumerate(result.clusters, 1):
+        if len(members) == 1 and fps[members[0]].registry_row is None:
+            continue
+        for i in members:
+            fp = fps[i]
+            reg = ""
+            if fp.registry_row is not None:
+                name = (records[fp.registry_row].get("product_name") if records else "") or f"#{fp.registry_row + 1}"
+                reg = f"{name} ({fp.registry_reason}{', azonos dátum' if fp.registry_same else ''})"
+            out.append({"Klaszter": n, "Fájl": fp.name, "Nyelv": fp.lang or "?", "Dátum": fp.newest or "—",
+                        "Feldolgozásra": "✅" if fp.representative else "—",
+                        "Indok": fp.reason or ("képviselő" if len(members) > 1 else ""), "Nyilvántartásban": reg})
+    return out
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+SDS Excel Export
+================
+A 6 munkalapos SDS_Database munkafüzet (útmutató, adatbázis, kockázatértékelés, expozíciós nyilvántartás,
+intézkedési terv, segédtáblák) stream-elt írása. Az openpyxl csak híváskor töltődik be.
+"""
+
+from io import BytesIO
+from datetime import datetime
+from sds_languages import get_lang
+from sds_registry import DB_KEYS
+from sds_records import row_values
+from sds_risk_rules import RiskLevel, level_of
+from sds_substances import COMPONENTS
+
+# ============================================================
+# EXCEL GENERÁLÁS
+# ============================================================
+
+def indexed_components(sds, substances):
+    """A termék anyag-indexben szereplő, H kóddal rendelkező összetevői, a legsúlyosabb elöl"""
+    found = []
+    for _, cas_f, ec_f, _, _ in COMPONENTS:
+        sub = substances.lookup(sds.get(cas_f)) or (substances.lookup(sds.get(ec_f)) if ec_f else None)
+        if sub and sub['h_codes'] and sub['key'] not in {f['key'] for f in found}:
+            found.append(sub)
+    return sorted(found, key=lambda sub: -sub['severity'])
+
+def db_rows(results, L):
+    """Az adatbázis munkalap sorai (szövegként); a vállalat által kitöltendő oszlopok egyszer, a többi érték
+    a rekordból sorrendben (row_values) – ugyanezt írja az Excel és a CSV / JSONL / Parquet export"""
+    fixed = {0: None, **{ci: L["use_location"] if k == "_loc" else L["company_fills"] if k in ("_qty","_freq","_workers") else ""
+                         for ci, k in enumerate(DB_KEYS) if k and k.startswith("_")}}
+    for ri, data in enumerate(results, 1):
+        vals = row_values(data)
+        fixed[0] = ri
+        for ci, val in fixed.items(): vals[ci] = val
+        yield [str(val) for val in vals]
+
+def risk_rows(results, risk_results, L, evaluator, eval_date, review_date, deadline_date, substances=None):
+    """A kockázatértékelés munkalap sorai (szövegként, az üres / 0 érték "")"""
+    for ri, (sds, risk) in enumerate(zip(results, risk_results), 1):
+        if not risk: risk = {}
+        component = risk.get('main_hazardous_component')
+        if not component:
+            main = indexed_components(sds, substances) if substances is not None else []
+            component = main[0]['name'] if main else sds.get('comp1_name','')
+        rd = [ri, sds.get('product_name',''), component,
+              sds.get('clp_classification',''), sds.get('h_statements',''), sds.get('p_statements',''),
+              risk.get('exposure_mode',sds.get('exposure_routes','')), risk.get('exposure_frequency',''),
+              risk.get('exposure_duration',''), risk.get('affected_body_parts',''),
+              risk.get('protection_present',''), risk.get('ppe_specification',''),
+              risk.get('probability',''), risk.get('severity',''), risk.get('risk_score',''),
+              risk.get('risk_level',''), risk.get('required_action',''),
+              risk.get('bem_required',''), risk.get('exposure_registry_required',''),
+              deadline_date.strftime('%Y.%m.%d'), L["employer"],
+              risk.get('post_action_probability',''), risk.get('post_action_severity',''),
+              risk.get('residual_risk',''), risk.get('residual_risk_level',''),
+              evaluator, eval_date.strftime('%Y.%m.%d'), review_date.strftime('%Y.%m.%d'), '']
+        yield [str(val) if val else '' for val in rd]
+
+def action_rows(results, risk_results, L, deadline_date):
+    """Az intézkedési terv sorai: a tűrhető vagy annál magasabb kockázatú termékek"""
+    ar = 1
+    for sds, risk in zip(results, risk_results):
+        level = level_of(risk)
+        if level is not None and level >= RiskLevel.TOLERABLE:
+            yield [str(val) if val else '' for val in [ar, sds.get('product_name',''),
+                   risk.get('risk_level',''), risk.get('required_action',''), L["employer"],
+                   deadline_date.strftime('%Y.%m.%d'), L["in_progress"], '', '']]
+            ar += 1
+
+def generate_full_excel(results, risk_results, evaluator, eval_date, review_date, deadline_date, lang_code="hu", out=None,
+                        substances=None):
+    """Stream-elt (write_only) Excel export: a sorok azonnal kiíródnak, a stílusok előre regisztrált named style-ok.
+    out: fájl elérési út vagy fájl objektum – ha nincs megadva, a munkafüzet bájtjaival tér vissza.
+    substances (SubstanceIndex): a fő veszélyes összetevő és az expozíciós nyilvántartás sorai az anyag-indexből."""
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import PatternFill, Font, Alignment, Border, Side, NamedStyle, DEFAULT_FONT
+    from openpyxl.utils import get_column_letter
+    wb = openpyxl.Workbook(write_only=True)
+    L = get_lang(lang_code)
+    # Értékelés nélküli termék is kap kockázati sort (mint az sds_export.table_rows)
+    risk_results = list(risk_results) + [{}] * (len(results) - len(risk_results))
+
+    DARK_BLUE = PatternFill(start_color="1F4E79", end_color="1F4E79", fill_type="solid")
+    GREEN = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
+    YELLOW = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
+    ORANGE = PatternFill(start_color="F4B084", end_color="F4B084", fill_type="solid")
+    RED_FILL = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
+    WHITE_FONT = Font(color="FFFFFF", bold=True, size=10)
+    BOLD = Font(bold=True, size=10)
+    NORMAL = Font(size=9)
+    WRAP = Alignment(wrap_text=True, vertical='top')
+    CENTER = Alignment(horizontal='center', vertical='top', wrap_text=True)
+    THIN = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+
+    def named(name, **kw):
+        wb.add_named_style(NamedStyle(name=name, **kw)); return name
+    HEADER = named("sds_header", fill=DARK_BLUE, font=WHITE_FONT, alignment=CENTER, border=THIN)
+    DATA = named("sds_data", font=NORMAL, alignment=WRAP, border=THIN)
+    DATA_FILL = {f: named(f"sds_data_{n}", font=NORMAL, alignment=WRAP, border=THIN, fill=f)
+                 for n, f in (("green", GREEN), ("yellow", YELLOW), ("orange", ORANGE), ("red", RED_FILL))}
+    ACTION = named("sds_action", font=DEFAULT_FONT, alignment=WRAP, border=THIN)
+
+    def cell(ws, value, style=None, **attrs):
+        c = WriteOnlyCell(ws, value)
+        if style: c.style = style
+        for k, v in attrs.items(): setattr(c, k, v)
+        return c
+
+    def header_row(ws, headers):
+        ws.append([cell(ws, h, HEADER) for h in headers])
+
+    def append_sparse(ws, rows):
+        """Sorszám → cellák; write_only módban a kihagyott sorokat üres sorként kell kiírni"""
+        for r in range(1, max(rows) + 1):
+            ws.append(rows.get(r, []))
+
+    # 1. ÚTMUTATÓ
+    ws1 = wb.create_sheet(L["sheet_names"][0]); ws1.sheet_properties.tabColor = "1F4E79"
+    guide = [
+        (L["main_title"], True), ("", False), (L["prepared_by"], False),
+        (f"{L['prep_date']}: {datetime.now().strftime('%Y.%m.%d.')}", False),
+        (f"{L['processed_count']}: {len(results)} db", False), ("", False),
+        (L["legal_bg"], True),
+        ("• 1993. évi XCIII. tv. (Mvt.) - 54.§, 63/A.§", False),
+        ("• 2000. évi XXV. tv. (Kbtv.)", False),
+        ("• 5/2020. (II. 6.) ITM rendelet", False),
+        ("• 25/2000. (IX. 30.) EüM-SzCsM rendelet", False),
+        ("• 1272/2008/EK (CLP)", False), ("• 1907/2006/EK (REACH)", False),
+        ("• (EU) 2020/878", False), ("", False),
+        (L["sheets_content"], True),
+    ]
+    for i, desc in enumerate(L["sheet_desc"]):
+        guide.append((f"{i+1}. {desc}", False))
+    guide += [("", False), (L["markings"], False), (L["empty_cells"], False)]
+    ws1.column_dimensions['A'].width = 120
+    for ri, (txt, bold) in enumerate(guide, 1):
+        c = cell(ws1, txt, font=Font(bold=bold, size=14 if ri==1 else 10, color="FFFFFF" if ri==1 else "000000"))
+        if ri == 1: c.fill = DARK_BLUE
+        ws1.append([c])
+
+    # 2. SEGÉDTÁBLÁK
+    ws6 = wb.create_sheet(L["sheet_names"][1]); ws6.sheet_properties.tabColor = "7030A0"
+    ws6.column_dimensions['A'].width = 40; ws6.column_dimensions['B'].width = 30; ws6.column_dimensions['C'].width = 50
+    rows = {1: [cell(ws6, L["risk_matrix_title"], fill=DARK_BLUE, font=WHITE_FONT)]}
+    ws6.merged_cells.add('A1:E1')
+    rows[3] = [cell(ws6, h, font=BOLD, alignment=CENTER, border=THIN) for h in [""] + L["severity"]]
+    matrix = [[L["probability"][0],4,8,12,16],[L["probability"][1],3,6,9,12],[L["probability"][2],2,4,6,8],[L["probability"][3],1,2,3,4]]
+    for ri, row in enumerate(matrix, 4):
+        rows[ri] = []
+        for val in row:
+            c = cell(ws6, val, border=THIN, alignment=CENTER)
+            if isinstance(val, int):
+                c.fill = GREEN if val <= 2 else YELLOW if val <= 4 else ORANGE if val <= 9 else RED_FILL
+            rows[ri].append(c)
+    rl_data = [(9, L["risk_levels_title"], None),(10, L["risk_levels"][0], GREEN),(11, L["risk_levels"][1], YELLOW),(12, L["risk_levels"][2], ORANGE),(13, L["risk_levels"][3], RED_FILL)]
+    for ri, txt, fill in rl_data:
+        rows[ri] = [cell(ws6, txt, font=BOLD if ri==9 else NORMAL, **({'fill': fill} if fill else {}))]
+    rows[15] = [cell(ws6, L["ghs_title"], font=BOLD)]
+    ghs_codes = ["GHS01","GHS02","GHS03","GHS04","GHS05","GHS06","GHS07","GHS08","GHS09"]
+    for ri, (gc, gs, gd) in enumerate(zip(ghs_codes, L["ghs_symbols"], L["ghs_desc"]), 16):
+        rows[ri] = [cell(ws6, gc, font=BOLD), gs, gd]
+    rows[26] = [cell(ws6, L["prob_scale_title"], font=BOLD)]
+    for ri, (lev, desc) in enumerate(L["prob_scale"], 27):
+        rows[ri] = [cell(ws6, lev, font=BOLD), desc]
+    rows[32] = [cell(ws6, L["sev_scale_title"], font=BOLD)]
+    for ri, (lev, desc) in enumerate(L["sev_scale"], 33):
+        rows[ri] = [cell(ws6, lev, font=BOLD), desc]
+    append_sparse(ws6, rows)
+
+    # 3. ADATBÁZIS
+    ws2 = wb.create_sheet(L["sheet_names"][2]); ws2.sheet_properties.tabColor = "00B050"
+    db_h = L["db_headers"]
+    for ci in range(1, len(db_h)+1):
+        ws2.column_dimensions[get_column_letter(ci)].width = 60 if ci in (35,36) else 20 if ci > 5 else 12
+    ws2.column_dimensions['C'].width = 30
+    ws2.auto_filter.ref = f"A1:{get_column_letter(len(db_h))}1"; ws2.freeze_panes = 'D2'
+    header_row(ws2, db_h)
+    for vals in db_rows(results, L):
+        ws2.append([cell(ws2, val, DATA) for val in vals])
+
+    # 4. KOCKÁZATÉRTÉKELÉS
+    ws3 = wb.create_sheet(L["sheet_names"][3]); ws3.sheet_properties.tabColor = "FF0000"
+    rh = L["risk_headers"]
+    for ci in range(1, len(rh)+1):
+        ws3.column_dimensions[get_column_letter(ci)].width = 60 if ci==12 else 50 if ci in (5,6) else 25 if ci > 3 else 12
+    ws3.auto_filter.ref = f"A1:{get_column_letter(len(rh))}1"; ws3.freeze_panes = 'C2'
+    header_row(ws3, rh)
+    # Szint → stílus egyszer; a színezést a numerikus szint adja, nem a (nyelvfüggő) szöveg
+    LEVEL_STYLE = {None: DATA, RiskLevel.ACCEPTABLE: DATA_FILL[GREEN], RiskLevel.TOLERABLE: DATA_FILL[YELLOW],
+                   RiskLevel.SIGNIFICANT: DATA_FILL[ORANGE], RiskLevel.UNACCEPTABLE: DATA_FILL[RED_FILL]}
+    rows = risk_rows(results, risk_results, L, evaluator, eval_date, review_date, deadline_date, substances)
+    for risk, rd in zip(risk_results, rows):
+        styles = {16: LEVEL_STYLE[level_of(risk or {})], 25: LEVEL_STYLE[level_of(risk or {}, residual=True)]}
+        ws3.append([cell(ws3, val, styles.get(ci, DATA)) for ci, val in enumerate(rd, 1)])
+
+    # 5. EXPOZÍCIÓS NYILVÁNTARTÁS
+    ws4 = wb.create_sheet(L["sheet_names"][4]); ws4.sheet_properties.tabColor = "FFC000"
+    eh = L["exp_headers"]
+    for ci in range(1, len(eh)+1):
+        ws4.column_dimensions[get_column_letter(ci)].width = 20
+    ws4.merged_cells.add(f'A2:{get_column_letter(len(eh))}2')
+    header_row(ws4, eh)
+    ws4.append([cell(ws4, L["exp_note"], font=Font(bold=True, italic=True, size=10, color="FF0000"))])
+    if substances is not None:
+        # Termék × veszélyes összetevő sorok (CAS, ÁK, CMR) az indexből; a munkavállalói adatokat a cég tölti ki
+        er = 1
+        for sds in results:
+            for sub in indexed_components(sds, substances):
+                note = " | ".join(v for v in (sub['name'], sub['h_codes'], f"CMR: {sub['cmr']}" if sub['cmr'] else "") if v)
+                ws4.append([cell(ws4, str(val), DATA) for val in [er, '', '', '', '', '', sds.get('product_name','') or '',
+                            sub['cas'] or sub['ec'] or '', sds.get('exposure_routes','') or '', '', '', '', '',
+                            sub['ak_value'], '', '', '', note]])
+                er += 1
+
+    # 6. INTÉZKEDÉSI TERV
+    ws5 = wb.create_sheet(L["sheet_names"][5]); ws5.sheet_properties.tabColor = "FF6600"
+    ah = L["action_headers"]
+    for ci in range(1, len(ah)+1):
+        ws5.column_dimensions[get_column_letter(ci)].width = 50 if ci==4 else 20
+    header_row(ws5, ah)
+    for vals in action_rows(results, risk_results, L, deadline_date):
+        ws5.append([cell(ws5, val, ACTION) for val in vals])
+
+    wb.move_sheet(L["sheet_names"][1], offset=-2)
+
+    if out is not None:
+        wb.save(out)
+        return out
+    output = BytesIO(); wb.save(output)
+    return output.getvalue()
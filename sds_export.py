@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+SDS Export (CSV / JSON Lines / Parquet)
+=======================================
+Az Excel munkafüzet adatbázis, kockázatértékelés és intézkedési terv táblái stílus nélkül, sorról sorra írva,
+más rendszerek (EHS szoftver, BI) számára. A sorok ugyanazokból a függvényekből jönnek, mint az Excelé
+(sds_excel.db_rows / risk_rows / action_rows), így a tartalom azonos.
+  - CSV: a kimeneti nyelv fejléceivel, UTF-8 BOM-mal (Excelben is jól nyílik)
+  - JSON Lines / Parquet: nyelvfüggetlen oszlopnevekkel (a db_keys kiosztás szerint)
+Parquet csak telepített pyarrow esetén.
+"""
+
+import csv
+import io
+import json
+import os
+import zipfile
+from importlib.util import find_spec
+from typing import List
+from sds_excel import db_rows, risk_rows, action_rows, generate_full_excel
+from sds_languages import get_lang
+from sds_registry import DB_KEYS
+
+FORMATS = ("xlsx", "csv", "jsonl", "parquet")
+FORMAT_LABELS = {"xlsx": "📊 Excel (6 munkalap)", "csv": "📄 CSV", "jsonl": "🧾 JSON Lines", "parquet": "🗃️ Parquet"}
+TABLES = ("database", "risk", "actions")
+PARQUET_BATCH = 5000
+
+# Nyelvfüggetlen oszlopnevek (JSONL / Parquet); az adatbázisé a db_keys, a vállalat által kitöltendőké beszédes névvel
+COMPANY_COLUMNS = {"_loc": "use_location", "_qty": "quantity_per_year", "_freq": "use_frequency",
+                   "_workers": "exposed_workers", "_notes": "notes"}
+COLUMNS = {
+    "database": ["row"] + [COMPANY_COLUMNS.get(k, k) for k in DB_KEYS[1:]],
+    "risk": ["row", "product_name", "main_hazardous_component", "clp_classification", "h_statements", "p_statements",
+             "exposure_mode", "exposure_frequency", "exposure_duration", "affected_body_parts", "protection_present",
+             "ppe_specification", "probability", "severity", "risk_score", "risk_level", "required_action",
+             "bem_required", "exposure_registry_required", "deadline", "responsible", "post_action_probability",
+             "post_action_severity", "residual_risk", "residual_risk_level", "evaluator", "eval_date", "review_date",
+             "notes"],
+    "actions": ["row", "product_name", "risk_level", "required_action", "responsible", "deadline", "status",
+                "completed", "notes"],
+}
+HEADERS = {"database": "db_headers", "risk": "risk_headers", "actions": "action_headers"}
+
+
+def available_formats() -> List[str]:
+    return [f for f in FORMATS if f != "parquet" or find_spec("pyarrow") is not None]
+
+
+def table_rows(table: str, results, risk_results, L, evaluator, eval_date, review_date, deadline_date, substances=None):
+    """Egy tábla sorai (szöveglisták) – ugyanazok, mint az Excel munkalapé"""
+    risk_results = list(risk_results) + [{}] * (len(results) - len(risk_results))
+    if table == "database":
+        return db_rows(results, L)
+    if table == "risk":
+        return risk_rows(results, risk_results, L, evaluator, eval_date, review_date, deadline_date, substances)
+    return action_rows(results, risk_results, L, deadline_date)
+
+
+# ============================================================
+# 1. ÍRÓK (bináris fájl objektumba)
+# ============================================================
+
+def write_csv(f, headers: List[str], rows) -> int:
+    text = io.TextIOWrapper(f, encoding="utf-8-sig", newline="", write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(headers)
+    n = 0
+    for row in rows:
+        writer.writerow(row); n += 1
+    text.detach()
+    return n
+
+
+def write_jsonl(f, columns: List[str], rows) -> int:
+    n = 0
+    for row in rows:
+        f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False).encode("utf-8") + b"\n"); n += 1
+    return n
+
+
+def write_parquet(f, columns: List[str], rows, batch: int = PARQUET_BATCH) -> int:
+    """Szöveg oszlopok, batch-enként egy row group – a memória a batch méretével arányos, nem a táblával"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([(c, pa.string()) for c in columns])
+    n, buf = 0, []
+    with pq.ParquetWriter(f, schema) as writer:
+        def flush():
+            writer.write_batch(pa.RecordBatch.from_arrays([pa.array(col, pa.string()) for col in zip(*buf)], schema=schema))
+        for row in rows:
+            buf.append(row)
+            if len(buf) >= batch:
+                flush(); n += len(buf); buf = []
+        if buf:
+            flush(); n += len(buf)
+    return n
+
+
+def write_table(fmt: str, f, table: str, rows, L) -> int:
+    """Egy tábla kiírása a kért formátumban; a kiírt sorok száma"""
+    if fmt == "csv":
+        return write_csv(f, L[HEADERS[table]], rows)
+    if fmt == "jsonl":
+        return write_jsonl(f, COLUMNS[table], rows)
+    if fmt == "parquet":
+        return write_parquet(f, COLUMNS[table], rows)
+    raise ValueError(f"Ismeretlen formátum: {fmt}")
+
+
+# ============================================================
+# 2. EXPORT
+# ============================================================
+
+def export_files(results, risk_results, fmt, stem, evaluator, eval_date, review_date, deadline_date, lang_code="hu",
+                 substances=None, tables=TABLES) -> List[str]:
+    """Táblánként egy fájl: <stem>_<tábla>.<formátum>; a létrehozott fájlok útvonalai"""
+    L = get_lang(lang_code)
+    paths = []
+    for table in tables:
+        path = f"{stem}_{table}.{fmt}"
+        with open(path, "wb") as f:
+            write_table(fmt, f, table, table_rows(table, results, risk_results, L, evaluator, eval_date, review_date,
+                                                  deadline_date, substances), L)
+        paths.append(path)
+    return paths
+
+
+def export_zip(results, risk_results, fmt, evaluator, eval_date, review_date, deadline_date, lang_code="hu",
+               out=None, substances=None, tables=TABLES, prefix="SDS"):
+    """Az összes tábla egy ZIP-ben (letöltéshez). out: fájl útvonal vagy fájl objektum – ha nincs megadva,
+    a ZIP bájtjaival tér vissza. A CSV / JSONL közvetlenül a ZIP-be íródik; a Parquet (már tömörített) memóriából."""
+    L = get_lang(lang_code)
+    target = out if out is not None else io.BytesIO()
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zf:
+        for table in tables:
+            name = f"{prefix}_{table}.{fmt}"
+            rows = table_rows(table, results, risk_results, L, evaluator, eval_date, review_date, deadline_date, substances)
+            if fmt == "parquet":
+                buf = io.BytesIO()
+                write_table(fmt, buf, table, rows, L)
+                zf.writestr(name, buf.getvalue(), compress_type=zipfile.ZIP_STORED)
+            else:
+                with zf.open(name, "w") as f:
+                    write_table(fmt, f, table, rows, L)
+    return out if out is not None else target.getvalue()
+
+
+def export_registry(results, risk_results, fmt, output, evaluator, eval_date, review_date, deadline_date, lang_code="hu",
+                    substances=None) -> List[str]:
+    """Parancssori kimenet: xlsx → a munkafüzet; más formátum → táblánként egy fájl az output nevéből képezve"""
+    if fmt == "xlsx":
+        generate_full_excel(results, risk_results, evaluator, eval_date, review_date, deadline_date, lang_code, out=output,
+                            substances=substances)
+        return [output]
+    if fmt not in available_formats():
+        raise ValueError(f"A(z) {fmt} formátumhoz hiányzó csomag (pip install pyarrow)")
+    stem = os.path.splitext(output)[0]
+    return export_files(results, risk_results, fmt, stem, evaluator, eval_date, review_date, deadline_date, lang_code,
+                        substances)
+
+
+def export_name(fmt: str, lang_code: str, ts: str, prefix: str = "SDS_Database") -> str:
+    """Letöltési fájlnév: xlsx → munkafüzet, más formátum → ZIP a táblákkal"""
+    return f"{prefix}_{lang_code}_{ts}.xlsx" if fmt == "xlsx" else f"{prefix}_{lang_code}_{ts}_{fmt}.zip"
+
+
+def export_mime(fmt: str) -> str:
+    return "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet" if fmt == "xlsx" else "application/zip"
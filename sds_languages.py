@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+SDS Nyelvi Szótárak
+===================
+A 24 EU kimeneti nyelv: felületi választó, a GPT-nek átadott nyelvnév és az Excel munkafüzet szövegei.
+A munkafüzet-szövegek nyelvenként a lang/<kód>.json fájlokban vannak; csak az első használatkor töltődnek be.
+Ellenőrzés: python sds_languages.py
+"""
+
+import json
+import os
+import sys
+from functools import lru_cache
+from typing import List
+
+LANGUAGES = {
+    "🇭🇺 Magyar": "hu", "🇬🇧 English": "en", "🇩🇪 Deutsch": "de",
+    "🇫🇷 Français": "fr", "🇪🇸 Español": "es", "🇮🇹 Italiano": "it",
+    "🇵🇱 Polski": "pl", "🇷🇴 Română": "ro", "🇳🇱 Nederlands": "nl",
+    "🇵🇹 Português": "pt", "🇨🇿 Čeština": "cs", "🇸🇰 Slovenčina": "sk",
+    "🇭🇷 Hrvatski": "hr", "🇧🇬 Български": "bg", "🇸🇪 Svenska": "sv",
+    "🇩🇰 Dansk": "da", "🇫🇮 Suomi": "fi", "🇬🇷 Ελληνικά": "el",
+    "🇸🇮 Slovenščina": "sl", "🇪🇪 Eesti": "et", "🇱🇻 Latviešu": "lv",
+    "🇱🇹 Lietuvių": "lt", "🇮🇪 Gaeilge": "ga", "🇲🇹 Malti": "mt",
+}
+
+LANG_NAMES = {
+    "hu": "magyar", "en": "English", "de": "Deutsch", "fr": "français",
+    "es": "español", "it": "italiano", "pl": "polski", "ro": "română",
+    "nl": "Nederlands", "pt": "português", "cs": "čeština", "sk": "slovenčina",
+    "hr": "hrvatski", "bg": "български", "sv": "svenska", "da": "dansk",
+    "fi": "suomi", "el": "ελληνικά", "sl": "slovenščina", "et": "eesti",
+    "lv": "latviešu", "lt": "lietuvių", "ga": "Gaeilge", "mt": "Malti",
+}
+
+
+LANG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lang")
+
+# Kötelező listahosszak (a db_headers / risk_headers hosszát a nyilvántartás oszlopkiosztása adja, lásd validate_bundles)
+LIST_LENGTHS = {"sheet_names": 6, "sheet_desc": 6, "severity": 4, "probability": 4, "risk_levels": 4, "ghs_symbols": 9,
+                "ghs_desc": 9, "prob_scale": 4, "sev_scale": 4, "exp_headers": 18, "action_headers": 9,
+                "level_names": 4, "level_actions": 4}
+PPE_HINT_KEYS = {"hand", "eye", "resp", "skin"}
+
+
+@lru_cache(maxsize=None)
+def load_bundle(lang_code):
+    """Egy nyelv szótára a lang/ mappából (memoizálva); None, ha nincs ilyen fájl."""
+    path = os.path.join(LANG_DIR, f"{lang_code}.json")
+    if not os.path.isfile(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_lang(lang_code):
+    return load_bundle(lang_code) or load_bundle("en")
+
+
+def validate_bundles() -> List[str]:
+    """Minden LANG_NAMES nyelv szótárának ellenőrzése az angolhoz képest; a talált hibák listája (üres = rendben)."""
+    from sds_registry import DB_KEYS, RISK_KEYS
+    lengths = dict(LIST_LENGTHS, db_headers=len(DB_KEYS), risk_headers=len(RISK_KEYS))
+    ref = load_bundle("en") or {}
+    problems = []
+    for code in LANG_NAMES:
+        L = load_bundle(code)
+        if L is None:
+            problems.append(f"{code}: hiányzó fájl ({code}.json)")
+            continue
+        for key in sorted(ref.keys() - L.keys()):
+            problems.append(f"{code}: hiányzó kulcs: {key}")
+        for key in sorted(L.keys() - ref.keys()):
+            problems.append(f"{code}: fölösleges kulcs: {key}")
+        for key, n in lengths.items():
+            if key in L and len(L[key]) != n:
+                problems.append(f"{code}: {key} hossza {len(L[key])}, elvárt {n}")
+        for key in ("prob_scale", "sev_scale"):
+            if any(len(pair) != 2 for pair in L.get(key, [])):
+                problems.append(f"{code}: {key} elemei (szint, leírás) párok legyenek")
+        if set(L.get("ppe_hints", {})) != PPE_HINT_KEYS:
+            problems.append(f"{code}: ppe_hints kulcsai: {sorted(PPE_HINT_KEYS)}")
+        names = L.get("sheet_names", [])
+        for name in names:
+            if len(name) > 31 or any(ch in name for ch in "[]:*?/\\"):
+                problems.append(f"{code}: érvénytelen munkalapnév: {name!r}")
+        if len(set(names)) != len(names):
+            problems.append(f"{code}: ismétlődő munkalapnév")
+        for key, value in L.items():
+            if isinstance(value, str) and not value.strip():
+                problems.append(f"{code}: üres szöveg: {key}")
+    return problems
+
+
+if __name__ == "__main__":
+    found = validate_bundles()
+    for p in found:
+        print(p)
+    print(f"{len(LANG_NAMES)} nyelv, {len(found)} hiba")
+    sys.exit(1 if found else 0)
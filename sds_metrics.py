@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+SDS Futás-mérés
+===============
+Szakaszonkénti (span) időmérés és tokenszámlálás egy feldolgozási futásra: PDF olvasás, szövegkinyerés,
+minden GPT hívás (késleltetés, prompt/completion token, újrapróbálkozás, keret-várakozás) és Excel írás.
+Élő áteresztőképesség / hátralévő idő a felületnek, a futás végén JSON vagy CSV jelentés
+(szűk keresztmetszet keresése, költséghelyenkénti elszámolás a tényleges tokenek alapján).
+"""
+
+import csv
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional
+from sds_tokens import estimate_cost
+
+# Szakaszok a jelentés sorrendjében
+STAGES = ("pdf_read", "pdf_text", "extract_llm", "extract_fix_llm", "risk_rules", "risk_llm", "excel")
+CSV_FIELDS = ["run_id", "label", "stage", "file", "started", "seconds", "prompt_tokens", "completion_tokens",
+              "retries", "wait", "ok"]
+
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(q * (len(s) - 1))))]
+
+
+class RunMetrics:
+    """Szálbiztos span-gyűjtő egy futáshoz. total: a feldolgozandó SDS-ek száma (az ETA-hoz),
+    label: költséghely / osztály a jelentésben. enabled=False esetén minden hívás üres művelet."""
+
+    def __init__(self, total: int = 0, label: str = "", model: str = "gpt-4o", run_id: Optional[str] = None,
+                 enabled: bool = True):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.total, self.label, self.model, self.enabled = total, label, model, enabled
+        self.spans: List[dict] = []
+        self.done_count = 0
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float, file: str = "", **fields):
+        if not self.enabled:
+            return
+        span = {"stage": stage, "file": file, "started": round(time.time() - seconds, 3), "seconds": round(seconds, 4),
+                "prompt_tokens": 0, "completion_tokens": 0, "retries": 0, "wait": 0.0, "ok": True}
+        span.update(fields)
+        with self._lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def span(self, stage: str, file: str = ""):
+        """with metrics.span("pdf_text", név) as s: ... – a blokk ideje; s-be további mezők írhatók"""
+        fields = {}
+        t0 = time.perf_counter()
+        try:
+            yield fields
+        except Exception:
+            fields["ok"] = False
+            raise
+        finally:
+            self.add(stage, time.perf_counter() - t0, file, **fields)
+
+    def llm(self, stage: str, file: str, result: Optional[dict]):
+        """Egy call_gpt eredmény (_latency, _prompt_tokens, _completion_tokens, _retries, _wait, _error) felvétele"""
+        r = result or {}
+        self.add(stage, r.get("_latency", 0.0), file, prompt_tokens=r.get("_prompt_tokens", 0),
+                 completion_tokens=r.get("_completion_tokens", 0), retries=r.get("_retries", 0),
+                 wait=r.get("_wait", 0.0), ok="_error" not in r)
+
+    def done(self, n: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.done_count += n
+
+    def finish(self):
+        self.finished = self.finished or time.time()
+
+    def progress(self) -> dict:
+        """Kész / összes, eltelt idő, áteresztőképesség (SDS/perc), hátralévő idő (mp), eddigi token és költség"""
+        with self._lock:
+            done = self.done_count
+            tok_in = sum(s["prompt_tokens"] for s in self.spans)
+            tok_out = sum(s["completion_tokens"] for s in self.spans)
+        elapsed = (self.finished or time.time()) - self.started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - done) / rate if rate and self.total > done else 0.0
+        return {"done": done, "total": self.total, "elapsed": elapsed, "per_min": rate * 60, "eta": eta,
+                "tokens_in": tok_in, "tokens_out": tok_out, "cost": estimate_cost(tok_in, tok_out, self.model)}
+
+    def summary(self) -> dict:
+        """Szakaszonkénti összesítő (darab, idő, átlag, p50/p95/max, token, újrapróbálkozás, hiba, részarány)"""
+        with self._lock:
+            spans = list(self.spans)
+        stages = {}
+        for name in list(STAGES) + sorted({s["stage"] for s in spans} - set(STAGES)):
+            group = [s for s in spans if s["stage"] == name]
+            if not group:
+                continue
+            secs = [s["seconds"] for s in group]
+            stages[name] = {"count": len(group), "seconds": round(sum(secs), 3), "mean": round(sum(secs) / len(secs), 4),
+                            "p50": round(_pct(secs, 0.5), 4), "p95": round(_pct(secs, 0.95), 4), "max": round(max(secs), 4),
+                            "prompt_tokens": sum(s["prompt_tokens"] for s in group),
+                            "completion_tokens": sum(s["completion_tokens"] for s in group),
+                            "retries": sum(s["retries"] for s in group), "wait": round(sum(s["wait"] for s in group), 3),
+                            "errors": sum(1 for s in group if not s["ok"])}
+        busy = sum(st["seconds"] for st in stages.values()) or 1.0
+        for st in stages.values():
+            st["share"] = round(st["seconds"] / busy, 3)
+        p = self.progress()
+        return {"run_id": self.run_id, "label": self.label, "model": self.model,
+                "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                "finished": datetime.fromtimestamp(self.finished).isoformat(timespec="seconds") if self.finished else None,
+                "files": self.total, "done": p["done"], "wall_seconds": round(p["elapsed"], 3),
+                "per_min": round(p["per_min"], 2), "tokens_in": p["tokens_in"], "tokens_out": p["tokens_out"],
+                "cost_usd": round(p["cost"], 4),
+                "bottleneck": max(stages, key=lambda k: stages[k]["seconds"]) if stages else None, "stages": stages}
+
+    def to_json(self, spans: bool = True) -> str:
+        report = self.summary()
+        if spans:
+            with self._lock:
+                report["spans"] = list(self.spans)
+        return json.dumps(report, ensure_ascii=False, indent=2)
+
+    def write_csv(self, f):
+        """Spanonként egy sor (fájl objektumba, newline=''-vel nyitva)"""
+        w = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        w.writeheader()
+        with self._lock:
+            for s in self.spans:
+                w.writerow({"run_id": self.run_id, "label": self.label, **s})
+
+    def save(self, path: str):
+        """Jelentés mentése: .csv kiterjesztésnél spanonkénti CSV, egyébként JSON"""
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                self.write_csv(f)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.to_json())
+
+
+def format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}" if seconds >= 3600 else f"{seconds // 60}:{seconds % 60:02d}"
+
+
+NO_METRICS = RunMetrics(enabled=False)
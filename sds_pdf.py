@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+SDS PDF Szövegkinyerő
+=====================
+Cserélhető motor: pypdfium2 (gyors, C) → pdfminer.six (layout-érzékeny) → PyPDF2 (tartalék), ami telepítve van.
+Hosszú PDF-eknél az oldalakat folyamat-poolban (process pool) dolgozza fel.
+Felismeri a 16 szabványos SDS szakasz fejlécét mind a 24 nyelven, így a szöveg szakaszonként
+rövidíthető egy globális karakterlimit helyett (nem vesznek el a 8–16. szakaszok: expozíciós határértékek, PPE).
+"""
+
+import atexit
+import os
+import re
+import threading
+import time
+import multiprocessing
+from io import BytesIO
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, List, Dict
+
+BACKENDS = ("pypdfium2", "pdfminer", "PyPDF2")
+PDF_PROCESSES = int(os.environ.get("SDS_PDF_PROCESSES", min(4, os.cpu_count() or 1)))
+PAGES_PER_TASK = 4
+DEFAULT_BUDGET = 25000
+
+# "SECTION 1" / "1. SZAKASZ" szakaszfejlécek nyelvenként (az angol "SECTION" a francia fejlécet is lefedi)
+SECTION_WORDS = {
+    "hu": ["SZAKASZ"], "en": ["SECTION"], "de": ["ABSCHNITT"], "fr": ["RUBRIQUE"],
+    "es": ["SECCIÓN", "SECCION", "EPÍGRAFE"], "it": ["SEZIONE"], "pl": ["SEKCJA"],
+    "ro": ["SECȚIUNEA", "SECŢIUNEA", "SECTIUNEA"], "nl": ["RUBRIEK"], "pt": ["SECÇÃO", "SEÇÃO", "SECCAO", "SECAO"],
+    "cs": ["ODDÍL", "ODDIL"], "sk": ["ODDIEL"], "hr": ["ODJELJAK"], "bg": ["РАЗДЕЛ"],
+    "sv": ["AVSNITT"], "da": ["PUNKT", "AFSNIT"], "fi": ["KOHTA"], "el": ["ΤΜΗΜΑ", "ΤΜΉΜΑ"],
+    "sl": ["ODDELEK"], "et": ["JAGU"], "lv": ["IEDAĻA", "IEDALA"], "lt": ["SKIRSNIS"],
+    "ga": ["ROINN", "CUID"], "mt": ["TAQSIMA"],
+}
+_WORDS = "|".join(sorted({re.escape(w) for ws in SECTION_WORDS.values() for w in ws}, key=len, reverse=True))
+SECTION_RE = re.compile(
+    rf"^[ \t•\-]*(?:(?:{_WORDS})[ \t]*(?P<n1>\d{{1,2}})(?![.,]\d)|(?P<n2>\d{{1,2}})\.?[ \t]*(?:{_WORDS}))(?!\w)",
+    re.IGNORECASE | re.MULTILINE)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# ============================================================
+# 1. EREDMÉNY
+# ============================================================
+
+@dataclass
+class PDFText:
+    """Egy PDF kinyert szövege szakaszokra bontva, mérési adatokkal"""
+    text: str
+    pages: int = 0
+    backend: str = ""
+    seconds: float = 0.0
+    sections: Dict[int, str] = field(default_factory=dict)  # 0 = az 1. szakasz előtti rész
+    error: Optional[str] = None
+
+    @property
+    def chars(self) -> int:
+        return len(self.text)
+
+    def trimmed(self, budget: int = DEFAULT_BUDGET) -> str:
+        """Szöveg a karakterkeretig: szakaszonként arányosan rövidítve, ha a fejlécek felismerhetők"""
+        if len(self.text) <= budget:
+            return self.text
+        if not self.sections:
+            return self.text[:budget] + "\n[...]"
+        return trim_sections(self.sections, budget)
+
+
+# ============================================================
+# 2. SZAKASZOK
+# ============================================================
+
+def split_sections(text: str) -> Dict[int, str]:
+    """Szöveg → {szakasz szám: szöveg}. Csak növekvő sorszámú fejléceket fogad el (oldal-fejlécek, hivatkozások ellen);
+    3-nál kevesebb felismert szakasz esetén üres dict (a hívó globálisan vág)."""
+    starts = []
+    for m in SECTION_RE.finditer(text):
+        n = int(m.group("n1") or m.group("n2"))
+        if 1 <= n <= 16 and (not starts or n > starts[-1][0]):
+            starts.append((n, m.start()))
+    if len(starts) < 3:
+        return {}
+    sections = {0: text[:starts[0][1]]} if starts[0][1] > 0 else {}
+    for (n, pos), (_, end) in zip(starts, starts[1:] + [(None, len(text))]):
+        sections[n] = text[pos:end]
+    return sections
+
+
+def trim_sections(sections: Dict[int, str], budget: int) -> str:
+    """Keret szétosztása (water-filling): a rövid szakaszok teljesen bekerülnek, a hosszúak egyenlő arányban vágódnak"""
+    alloc, remaining = {}, budget
+    by_len = sorted(sections, key=lambda k: len(sections[k]))
+    for i, k in enumerate(by_len):
+        alloc[k] = min(len(sections[k]), remaining // (len(by_len) - i))
+        remaining -= alloc[k]
+    parts = []
+    for k in sorted(sections):
+        txt = sections[k]
+        parts.append(txt if alloc[k] >= len(txt) else txt[:alloc[k]] + "\n[...]\n")
+    return "".join(parts)
+
+
+# ============================================================
+# 3. MOTOROK
+# ============================================================
+
+def available_backends() -> List[str]:
+    found = []
+    for name, module in (("pypdfium2", "pypdfium2"), ("pdfminer", "pdfminer.high_level"), ("PyPDF2", "PyPDF2")):
+        try:
+            __import__(module)
+            found.append(name)
+        except ImportError:
+            pass
+    return found
+
+
+def _page_count(data: bytes, backend: str) -> int:
+    if backend == "pypdfium2":
+        import pypdfium2
+        doc = pypdfium2.PdfDocument(data)
+        try:
+            return len(doc)
+        finally:
+            doc.close()
+    if backend == "pdfminer":
+        from pdfminer.pdfpage import PDFPage
+        return sum(1 for _ in PDFPage.get_pages(BytesIO(data)))
+    import PyPDF2
+    return len(PyPDF2.PdfReader(BytesIO(data)).pages)
+
+
+def _extract_range(data: bytes, backend: str, start: int, stop: int) -> List[str]:
+    """Oldalak [start, stop) szövege – a process pool workerben is fut"""
+    if backend == "pypdfium2":
+        import pypdfium2
+        doc = pypdfium2.PdfDocument(data)
+        try:
+            out = []
+            for i in range(start, stop):
+                page = doc[i]
+                textpage = page.get_textpage()
+                out.append(textpage.get_text_range())
+                textpage.close(); page.close()
+            return out
+        finally:
+            doc.close()
+    if backend == "pdfminer":
+        from pdfminer.high_level import extract_text
+        pages = extract_text(BytesIO(data), page_numbers=range(start, stop)).split("\f")
+        return (pages + [""] * (stop - start))[:stop - start]
+    import PyPDF2
+    reader = PyPDF2.PdfReader(BytesIO(data))
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """Közös folyamat-pool; 'spawn' indítás, mert a Streamlit szerver többszálú (fork nem biztonságos).
+    A process_batch szálai egyszerre is ide érhetnek: zárral egyetlen pool jön létre, kilépéskor leáll."""
+    global _pool
+    if _pool is None and PDF_PROCESSES > 1:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=PDF_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+                atexit.register(_shutdown_pool)
+    return _pool
+
+
+def _shutdown_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_pages(data: bytes, backend: str, n_pages: int) -> List[str]:
+    pool = _get_pool() if n_pages > PAGES_PER_TASK else None
+    if pool is None:
+        return _extract_range(data, backend, 0, n_pages)
+    futures = [pool.submit(_extract_range, data, backend, s, min(s + PAGES_PER_TASK, n_pages))
+               for s in range(0, n_pages, PAGES_PER_TASK)]
+    return [page for f in futures for page in f.result()]
+
+
+def extract_pdf(data: bytes, backend: str = "auto") -> PDFText:
+    """PDF bájtok → PDFText. 'auto': az első telepített motor; hiba esetén a következővel próbálkozik."""
+    t0 = time.perf_counter()
+    candidates = available_backends() if backend == "auto" else [backend]
+    error = "Nincs telepített PDF motor (pypdfium2 / pdfminer.six / PyPDF2)"
+    for name in candidates:
+        try:
+            n_pages = _page_count(data, name)
+            pages = _extract_pages(data, name, n_pages)
+        except Exception as e:
+            error = f"{name}: {e}"
+            continue
+        text = "\n".join(pages).replace("\r\n", "\n").replace("\r", "\n")
+        return PDFText(text=text, pages=n_pages, backend=name, seconds=time.perf_counter() - t0,
+                       sections=split_sections(text))
+    return PDFText(text="", seconds=time.perf_counter() - t0, error=error)
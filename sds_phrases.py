@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+SDS H/EUH/P Mondattár
+=====================
+A CLP rendelet hivatalos H, EUH és P mondatszövegei nyelvenként (phrases/<kód>.json). Ahol van mondattár,
+a modell csak a kódokat adja vissza, a teljes szöveget ez a modul illeszti be – a hatósági szöveg így szó
+szerint egyezik, és nem fizetünk a sablonszöveg fordításáért. Mondattár nélküli nyelven marad a modell szövege.
+Ellenőrzés: python sds_phrases.py
+"""
+
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+from typing import List, Optional
+
+PHRASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "phrases")
+PHRASES_VERSION = "1"
+
+# Mezők, amelyekben a modell csak kódot ad vissza (az összetevők CLP mezőjében osztály-rövidítés is állhat)
+STATEMENT_FIELDS = ("h_statements", "euh_statements", "p_statements")
+INLINE_FIELDS = ("comp1_clp", "comp2_clp", "comp3_clp")
+
+_ONE = r"(?:EUH\d{3}A?|H\d{3}(?:FD|Fd|Df|fd|[FDfdi])?|P\d{3})"
+# Kód vagy összevont kód (P303+P361+P353), ha utána vég vagy elválasztó jön – a már kifejtett kódot nem bántja
+CODE_RE = re.compile(rf"(?<![A-Za-z0-9])({_ONE}(?:\s*\+\s*{_ONE})*)(?=\s*(?:$|[,;/\n]))")
+CODES_ONLY_RE = re.compile(rf"^(?:[\s,;/]|{_ONE}|\+)*$")
+
+
+@lru_cache(maxsize=None)
+def load_phrases(lang_code):
+    """Egy nyelv mondattára (memoizálva); None, ha nincs ilyen fájl."""
+    path = os.path.join(PHRASE_DIR, f"{lang_code}.json")
+    if not os.path.isfile(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def has_phrases(lang_code) -> bool:
+    return load_phrases(lang_code) is not None
+
+
+def phrase(code, table) -> Optional[str]:
+    """Egy (összevont) kód szövege: előbb a hivatalos összevont mondat, különben a részek egymás után; None, ha ismeretlen."""
+    code = re.sub(r"\s*\+\s*", "+", code)
+    if code in table:
+        return table[code]
+    parts = [table.get(c) for c in code.split("+")]
+    return " ".join(parts) if all(parts) else None
+
+
+def _label(code, table):
+    code = re.sub(r"\s*\+\s*", "+", code)
+    text = phrase(code, table)
+    return f"{code} ({text.rstrip('.')})" if text else code
+
+
+def expand_text(text, lang_code) -> str:
+    """A kódok mellé a hivatalos szöveg; a csak kódokat tartalmazó mezőből egységes "KÓD (szöveg); …" lista lesz."""
+    table = load_phrases(lang_code)
+    if not table or not isinstance(text, str) or not text.strip():
+        return text
+    if CODES_ONLY_RE.match(text):
+        return "; ".join(_label(m.group(1), table) for m in CODE_RE.finditer(text))
+    return CODE_RE.sub(lambda m: _label(m.group(1), table), text)
+
+
+def expand_record(sds, lang_code):
+    """A kinyert rekord H/EUH/P és összetevő-CLP mezőinek kifejtése helyben (mondattár nélküli nyelven nem változik)."""
+    if not has_phrases(lang_code):
+        return sds
+    for key in STATEMENT_FIELDS + INLINE_FIELDS:
+        if sds.get(key):
+            sds[key] = expand_text(sds[key], lang_code)
+    return sds
+
+
+def validate_phrases() -> List[str]:
+    """Minden mondattár kulcskészlete egyezzen az angollal, és ne legyen üres szöveg; a hibák listája (üres = rendben)."""
+    ref = load_phrases("en") or {}
+    problems = []
+    for name in sorted(os.listdir(PHRASE_DIR)):
+        code = name[:-5]
+        table = load_phrases(code) if name.endswith(".json") else None
+        if table is None:
+            continue
+        for key in sorted(ref.keys() - table.keys()):
+            problems.append(f"{code}: hiányzó kód: {key}")
+        for key in sorted(table.keys() - ref.keys()):
+            problems.append(f"{code}: fölösleges kód: {key}")
+        for key, value in table.items():
+            if not CODE_RE.fullmatch(key):
+                problems.append(f"{code}: érvénytelen kód: {key}")
+            if not str(value).strip():
+                problems.append(f"{code}: üres szöveg: {key}")
+    return problems
+
+
+if __name__ == "__main__":
+    found = validate_phrases()
+    for p in found:
+        print(p)
+    print(f"{len(load_phrases('en') or {})} kód, {len(found)} hiba")
+    sys.exit(1 if found else 0)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+SDS Feldolgozási Mag
+====================
+PDF → adatkinyerés (GPT) → kockázatértékelés (GPT), Streamlit nélkül importálható.
+A felület (sds_processor_v3.py) és a parancssor (sds_cli.py) ugyanezt a folyamatot futtatja.
+A nehéz függőségek (openai, PDF motorok) csak az első tényleges hívásnál töltődnek be.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sds_cache import SDSCache, content_hash, prompt_version
+from sds_rate_limit import get_client, get_limiter, call_with_retry, estimate_tokens
+from sds_pdf import extract_pdf, PDFText
+from sds_tokens import select_extract_text, compact_risk_input, count_tokens, usage_tokens, EXTRACT_TOKEN_BUDGET
+from sds_languages import LANG_NAMES
+from sds_risk_rules import prescore, annotate_levels, RULES_VERSION
+from sds_phrases import has_phrases, expand_record, PHRASES_VERSION
+from sds_metrics import NO_METRICS
+from sds_schema import FIELDS, SCHEMA_VERSION, json_template, response_format, coerce, validate, followup_text
+
+
+class PDFFile:
+    """Fájlrendszerből olvasott PDF ugyanazzal a felülettel (name, getvalue), mint a Streamlit UploadedFile"""
+
+    def __init__(self, name: str, data: bytes):
+        self.name = name
+        self._data = data
+
+    @classmethod
+    def from_path(cls, path: str) -> "PDFFile":
+        with open(path, "rb") as f:
+            return cls(os.path.basename(path), f.read())
+
+    def getvalue(self) -> bytes:
+        return self._data
+
+
+# ============================================================
+# SYSTEM PROMPTS
+# ============================================================
+
+SYSTEM_PROMPT_EXTRACT = f"""Te egy veszélyes anyagok szakértője vagy, aki biztonsági adatlapokból (SDS/MSDS) nyer ki strukturált adatokat.
+FELADATOD: Olvasd el a biztonsági adatlapot és válaszolj KIZÁRÓLAG érvényes JSON formátumban.
+NYELVI SZABÁLYOK:
+- Bármilyen nyelvű SDS-t elfogadsz → kimenet a MEGADOTT CÉLNYELVEN
+- A célnyelvet a user message tartalmazza
+- Kémiai neveknél a célnyelv szakkifejezéseit használd
+KRITIKUS: A H és P mondatoknál a KÓDOT ÉS a TELJES SZÖVEGET add meg A MEGADOTT CÉLNYELVEN!
+Példa (magyar): "H225 (Fokozottan tűzveszélyes folyadék és gőz); H319 (Súlyos szemirritációt okoz)"
+Példa (English): "H225 (Highly flammable liquid and vapour); H319 (Causes serious eye irritation)"
+Példa (Deutsch): "H225 (Flüssigkeit und Dampf leicht entzündbar); H319 (Verursacht schwere Augenreizung)"
+FORDÍTSD le a célnyelvre!
+Az összetevők CLP osztályzásánál is add meg a H mondatot kifejtve.
+KIVÉTEL: ha a user message-ben "H/EUH/P MONDATOK: CSAK KÓDOK" áll, a h_statements, euh_statements, p_statements és compN_clp mezőkben CSAK a kódokat add meg szöveg nélkül (pl. "H225, H319"; összevont P mondat: "P303+P361+P353"; EUH208 az anyag nevével együtt) – a teljes szöveget a rendszer illeszti be.
+JSON SÉMA:
+{json_template()}
+FONTOS: Válaszolj KIZÁRÓLAG a fenti JSON-nal!"""
+
+SYSTEM_PROMPT_RISK = """Te egy munkavédelmi kockázatértékelési szakértő vagy.
+4x4 mátrix: V(1-4) × S(1-4). Szintek: 1-2 Alacsony, 3-4 Közepes, 5-9 Magas, 10-16 Elfogadhatatlan.
+VÉDŐESZKÖZ SPECIFIKÁCIÓ: kesztyű anyag+vastagság+áttörési idő+EN szabvány; szűrő típus; szemvédő típus; bőrvédelem EN szab.
+BEM: ólom/CMR → kötelező. Expozíciós nyilv.: CLP veszélyes → kötelező.
+A CÉLNYELVEN válaszolj (a user message tartalmazza)!
+JSON: {"main_hazardous_component":"","exposure_mode":"","exposure_frequency":"","exposure_duration":"","affected_body_parts":"","protection_present":"","ppe_specification":"","probability":2,"severity":3,"risk_score":6,"risk_level":"","required_action":"","bem_required":"","exposure_registry_required":"","post_action_probability":1,"post_action_severity":3,"residual_risk":3,"residual_risk_level":""}
+FONTOS: Válaszolj KIZÁRÓLAG JSON-nal!"""
+
+SYSTEM_PROMPT_FOLLOWUP = """Te egy veszélyes anyagok szakértője vagy. Egy biztonsági adatlap (SDS) kinyeréséből néhány mező hiányzik
+vagy hibás. Az alábbi SDS szakaszokból CSAK a kért mezőket add meg a MEGADOTT CÉLNYELVEN, KIZÁRÓLAG JSON-ban.
+Ha az adat a szövegben nem szerepel, a mező értéke üres szöveg legyen – ne találj ki adatot!
+CAS szám formátuma: 64-17-5; EC szám: 200-578-6 (az ellenőrző számjegyet is add meg)."""
+
+MODEL = "gpt-4o"
+EXTRACT_FORMAT = response_format()
+PROMPT_VERSION = prompt_version(SYSTEM_PROMPT_EXTRACT, SYSTEM_PROMPT_RISK, SYSTEM_PROMPT_FOLLOWUP, RULES_VERSION,
+                                PHRASES_VERSION, SCHEMA_VERSION)
+
+def result_cache_key(data: bytes, target_lang: str, rules: bool = True) -> str:
+    """Gyorsítótár kulcs egy PDF-hez; a szabály-alapú előértékelés be/ki állapota is része, mert a kockázati
+    rekord ettől függ (szabály vagy modell)"""
+    return SDSCache.make_key(content_hash(data), target_lang, f"{PROMPT_VERSION}-{'rules' if rules else 'llm'}", MODEL)
+
+# ============================================================
+# PDF + GPT
+# ============================================================
+
+def extract_text_from_pdf(pdf_file) -> PDFText:
+    """PDF szöveg a leggyorsabb telepített motorral (pypdfium2 / pdfminer / PyPDF2), szakaszokra bontva"""
+    return extract_pdf(pdf_file.getvalue())
+
+def pdf_stats(pdf: PDFText) -> dict:
+    return {'_pdf_pages': pdf.pages, '_pdf_chars': pdf.chars, '_pdf_seconds': round(pdf.seconds, 2), '_pdf_backend': pdf.backend}
+
+def call_gpt(api_key, system, user_msg, fmt=None, max_tokens=4000):
+    """GPT hívás JSON válasszal (fmt: strukturált kimenet JSON sémával, alapértelmezés: json_object); az eredményben
+    a tokenszámok, a késleltetés (_latency), az újrapróbálkozások (_retries) és a keretre várt idő (_wait) is benne
+    vannak – hiba esetén {'_error': ...} ugyanezekkel a mérési mezőkkel"""
+    client = get_client(api_key)
+    stats = {}; t0 = time.perf_counter()
+    try:
+        resp = call_with_retry(lambda: client.chat.completions.create(
+            model=MODEL, messages=[{"role":"system","content":system},{"role":"user","content":user_msg}],
+            temperature=0.1, max_tokens=max_tokens, response_format=fmt or {"type":"json_object"}),
+            get_limiter(api_key), estimate_tokens(system, user_msg, max_output=max_tokens), stats=stats)
+        r = json.loads(resp.choices[0].message.content)
+        r['_tokens'] = resp.usage.total_tokens if resp.usage else 0
+        r['_prompt_tokens'] = resp.usage.prompt_tokens if resp.usage else 0
+        r['_completion_tokens'] = resp.usage.completion_tokens if resp.usage else 0
+    except Exception as e:
+        r = {'_error': str(e)}
+    r['_latency'] = round(time.perf_counter() - t0, 3); r['_retries'] = stats.get('retries', 0)
+    r['_wait'] = round(stats.get('wait', 0.0), 3)
+    return r
+
+def build_extract_msg(pdf: PDFText, target_lang="hu"):
+    """Kinyerési user üzenet a releváns SDS szakaszokból, token kereten belül; None, ha a PDF nem olvasható"""
+    lang_name = LANG_NAMES.get(target_lang, target_lang)
+    if pdf.error or len(pdf.text.strip()) < 100:
+        return None
+    pdf_text = select_extract_text(pdf, EXTRACT_TOKEN_BUDGET)
+    codes_only = "H/EUH/P MONDATOK: CSAK KÓDOK\n" if has_phrases(target_lang) else ""
+    return f"CÉLNYELV: {lang_name}\nA kimenet {lang_name} nyelven legyen!\n{codes_only}\n{pdf_text}"
+
+def refill_missing(api_key, pdf: PDFText, sds, target_lang="hu", metrics=None, name=""):
+    """Ellenőrzés a séma szerint: a hiányzó kötelező és a hibás formátumú mezők egy kis utólagos kérésben, csak a
+    forrás-szakaszokkal. A pótolt mezők: sds['_refilled'], a továbbra is hiányzók: sds['_missing'].
+    A tokenek az SDS kinyerési számlálóihoz adódnak; a kérés üzenete (becsléshez), vagy None, ha nem volt kérés."""
+    coerce(sds)
+    missing, malformed = validate(sds)
+    names = missing + malformed
+    text = followup_text(pdf, names) if names else None
+    if text is None:
+        if missing: sds['_missing'] = missing
+        return None
+    lang_name = LANG_NAMES.get(target_lang, target_lang)
+    msg = f"CÉLNYELV: {lang_name}\nKÉRT MEZŐK: {', '.join(names)}\nJSON: {json_template(names)}\n\n{text}"
+    fix = call_gpt(api_key, SYSTEM_PROMPT_FOLLOWUP, msg, response_format(names, "sds_refill"), max_tokens=800)
+    (metrics or NO_METRICS).llm("extract_fix_llm", name, fix)
+    for k in ('_tokens', '_prompt_tokens', '_completion_tokens'):
+        sds[k] = sds.get(k, 0) + fix.get(k, 0)
+    if '_error' not in fix:
+        coerce(fix)
+        sds['_refilled'] = [n for n in names if str(fix.get(n) or "").strip()
+                            and (n not in malformed or FIELDS[n].check(fix[n]))]
+        for n in sds['_refilled']:
+            sds[n] = fix[n].strip()
+    missing = validate(sds)[0]
+    if missing: sds['_missing'] = missing
+    return msg
+
+def build_risk_msg(sds, target_lang="hu"):
+    lang_name = LANG_NAMES.get(target_lang, target_lang)
+    return f"CÉLNYELV: {lang_name}\nKészíts kockázatértékelést {lang_name} nyelven:\n\n{compact_risk_input(sds)}"
+
+def process_single_sds(pdf_file, api_key, target_lang="hu", cache=None, use_cache=True, rules=True, substances=None,
+                       metrics=None):
+    """Egy SDS: kinyerés, majd kockázatértékelés – egyértelmű esetben (rules) szabály alapján, GPT hívás nélkül.
+    substances (SubstanceIndex): a hiányzó összetevő-adatok pótlása a kockázatértékelés előtt, majd a rekord felvétele.
+    metrics (RunMetrics): szakaszonkénti időmérés (pdf_read, pdf_text, extract_llm, risk_rules, risk_llm)."""
+    m = metrics or NO_METRICS
+    cache_key = None
+    if cache is not None:
+        with m.span("pdf_read", pdf_file.name):
+            cache_key = result_cache_key(pdf_file.getvalue(), target_lang, rules)
+            hit = cache.get(cache_key) if use_cache else None
+        if hit:
+            sds, risk = hit
+            sds['_source_file'] = pdf_file.name; sds['_status'] = '✅ ♻️'; sds['_cached'] = True
+            if substances is not None:
+                substances.add_record(sds)   # az index előtt gyorsítótárazott / törölt index: a termék így is bekerül
+            return sds, risk
+    with m.span("pdf_text", pdf_file.name) as span:
+        pdf = extract_text_from_pdf(pdf_file)
+        extract_msg = build_extract_msg(pdf, target_lang)
+        span["ok"] = extract_msg is not None
+    if extract_msg is None:
+        return {'_source_file': pdf_file.name, '_status': '❌ PDF hiba', **pdf_stats(pdf)}, {}
+    sds = call_gpt(api_key, SYSTEM_PROMPT_EXTRACT, extract_msg, EXTRACT_FORMAT)
+    m.llm("extract_llm", pdf_file.name, sds)
+    sds.update(pdf_stats(pdf))
+    if '_error' in sds:
+        sds['_source_file'] = pdf_file.name; sds['_status'] = f"❌ {sds['_error']}"
+        return sds, {}
+    sds['_source_file'] = pdf_file.name; sds['_status'] = '✅'
+    fix_msg = refill_missing(api_key, pdf, sds, target_lang, m, pdf_file.name)
+    expand_record(sds, target_lang)
+    if substances is not None:
+        substances.enrich(sds); substances.add_record(sds)
+    with m.span("risk_rules", pdf_file.name):
+        risk = prescore(sds, target_lang) if rules else None
+    sds['_tokens_est'] = count_tokens(SYSTEM_PROMPT_EXTRACT + extract_msg)
+    if fix_msg: sds['_tokens_est'] += count_tokens(SYSTEM_PROMPT_FOLLOWUP + fix_msg)
+    if risk is None:
+        risk_msg = build_risk_msg(sds, target_lang)
+        risk = call_gpt(api_key, SYSTEM_PROMPT_RISK, risk_msg)
+        m.llm("risk_llm", pdf_file.name, risk)
+        sds['_tokens_est'] += count_tokens(SYSTEM_PROMPT_RISK + risk_msg)
+    (p1, c1), (p2, c2) = usage_tokens(sds), usage_tokens(risk)
+    sds['_tokens_in'] = p1 + p2; sds['_tokens_out'] = c1 + c2
+    if '_error' in risk: risk = {}
+    else: annotate_levels(risk)
+    if risk and cache_key:
+        # a pótlás után is hiányzó mezők jelölése megmarad, hogy a gyorsítótárból visszaadott rekordnál is látszódjon
+        cache.put(cache_key, {k:v for k,v in sds.items() if not k.startswith('_') or k == '_missing'}, risk)
+    return sds, risk
+
+def process_batch(pdf_files, api_key, target_lang="hu", max_workers=4, on_done=None, cache=None, use_cache=True, rules=True,
+                  substances=None, metrics=None, checkpoint=None):
+    """Több SDS párhuzamos feldolgozása; az eredmények a feltöltési sorrendben térnek vissza.
+    Az on_done(kész, összes, sds, risk) callback a hívó szálában fut, így Streamlit elemeket frissíthet
+    (a metrics.progress() ekkor már a kész SDS-t is tartalmazza).
+    A checkpoint(i, sds, risk) a munkaszálban, rögtön az SDS elkészülte után fut – akkor is, ha a hívó szál
+    közben megszakadt (Streamlit újrafuttatás), így az eredmény tartósan menthető."""
+    def run(i, f):
+        try: pair = process_single_sds(f, api_key, target_lang, cache, use_cache, rules, substances, metrics)
+        except Exception as e: pair = ({'_source_file': f.name, '_status': f"❌ {e}"}, {})
+        if checkpoint: checkpoint(i, *pair)
+        return pair
+    out = [None] * len(pdf_files)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(run, i, f): i for i, f in enumerate(pdf_files)}
+        for done, fut in enumerate(as_completed(futures), 1):
+            i = futures[fut]
+            try: out[i] = fut.result()
+            except Exception as e: out[i] = ({'_source_file': pdf_files[i].name, '_status': f"❌ {e}"}, {})
+            if metrics: metrics.done()
+            if on_done: on_done(done, len(pdf_files), *out[i])
+    return out
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+OpenAI Kliens, Sebességkorlát és Újrapróbálkozás
+=================================================
+Közös OpenAI kliens API kulcsonként, token-bucket korlátozó a percenkénti kérés (RPM)
+és token (TPM) keretre, valamint jitteres exponenciális visszalépés a 429 / timeout / 5xx hibákra.
+A feldolgozó és a verzió-ellenőrző ugyanazt a keretet használja.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+DEFAULT_RPM = int(os.environ.get("SDS_OPENAI_RPM", 500))
+DEFAULT_TPM = int(os.environ.get("SDS_OPENAI_TPM", 30000))
+
+_clients = {}
+_limiters = {}
+_registry_lock = threading.Lock()
+
+
+# ============================================================
+# 1. TOKEN BUCKET
+# ============================================================
+
+class TokenBucket:
+    """Percenkénti kerettel folyamatosan töltődő vödör"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def set_rate(self, per_minute: float):
+        with self._lock:
+            self._refill()
+            self.capacity = float(per_minute)
+            self.level = min(self.level, self.capacity)
+
+    def take(self, amount: float):
+        """Blokkol, amíg a kért mennyiség rendelkezésre nem áll"""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                wait = (amount - self.level) * 60 / self.capacity
+            time.sleep(wait)
+
+    def adjust(self, delta: float):
+        """Becsült és tényleges fogyasztás különbségének elszámolása (lehet negatív egyenleg is)"""
+        with self._lock:
+            self._refill()
+            self.level = max(-self.capacity, min(self.capacity, self.level - delta))
+
+
+class RateLimiter:
+    """RPM + TPM korlát egy API kulcshoz; 429 után az összes szál közösen vár"""
+
+    def __init__(self, rpm: int = DEFAULT_RPM, tpm: int = DEFAULT_TPM):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def configure(self, rpm: int, tpm: int):
+        if self.requests.capacity != rpm:
+            self.requests.set_rate(rpm)
+        if self.tokens.capacity != tpm:
+            self.tokens.set_rate(tpm)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self, est_tokens: int):
+        while True:
+            wait = self._paused_until - time.monotonic()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+        self.requests.take(1)
+        self.tokens.take(est_tokens)
+
+    def settle(self, est_tokens: int, used_tokens: int):
+        self.tokens.adjust(used_tokens - est_tokens)
+
+
+# ============================================================
+# 2. KÖZÖS KLIENS ÉS KORLÁTOZÓ
+# ============================================================
+
+def get_client(api_key: str):
+    """API kulcsonként egyetlen OpenAI kliens (kapcsolat-újrahasznosítás); az újrapróbálkozást mi kezeljük"""
+    with _registry_lock:
+        if api_key not in _clients:
+            from openai import OpenAI
+            _clients[api_key] = OpenAI(api_key=api_key, max_retries=0)
+        return _clients[api_key]
+
+
+def set_client(api_key: str, client):
+    """Saját kliens (pl. benchmark visszajátszó) regisztrálása az API kulcshoz – a get_client ezt adja vissza"""
+    with _registry_lock:
+        _clients[api_key] = client
+
+
+def get_limiter(api_key: str, rpm: Optional[int] = None, tpm: Optional[int] = None) -> RateLimiter:
+    """API kulcsonként (fiókonként) közös korlátozó; rpm/tpm megadásakor a keret frissül"""
+    with _registry_lock:
+        limiter = _limiters.setdefault(api_key, RateLimiter())
+    if rpm and tpm:
+        limiter.configure(rpm, tpm)
+    return limiter
+
+
+def estimate_tokens(*texts: str, max_output: int = 0) -> int:
+    """Durva becslés (~4 karakter / token) + a kimeneti keret, ahogy az OpenAI is elszámolja a TPM-et"""
+    return sum(len(t) for t in texts) // 4 + max_output
+
+
+# ============================================================
+# 3. ÚJRAPRÓBÁLKOZÁS
+# ============================================================
+
+def _retry_after(exc) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def _is_retryable(exc) -> bool:
+    import openai
+    if isinstance(exc, openai.RateLimitError):
+        return getattr(exc, "code", None) != "insufficient_quota"
+    return isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError))
+
+
+def call_with_retry(request: Callable, limiter: RateLimiter, est_tokens: int,
+                    max_retries: int = 6, base_delay: float = 1.0, max_delay: float = 60.0, stats: Optional[dict] = None):
+    """A kérés végrehajtása a kereten belül; 429/timeout/5xx esetén Retry-After vagy jitteres exp. visszalépés.
+    stats: ha meg van adva, ide kerül az újrapróbálkozások száma (retries) és a keretre/visszalépésre várt idő (wait, mp)"""
+    import openai
+    stats = stats if stats is not None else {}
+    stats.setdefault("retries", 0); stats.setdefault("wait", 0.0)
+    for attempt in range(max_retries + 1):
+        t0 = time.perf_counter()
+        limiter.acquire(est_tokens)
+        stats["wait"] += time.perf_counter() - t0
+        try:
+            resp = request()
+        except Exception as e:
+            limiter.settle(est_tokens, 0)   # elutasított / meg sem érkezett kérés: nem számláznak, a keret visszajár
+            if attempt == max_retries or not _is_retryable(e):
+                raise
+            delay = _retry_after(e) or random.uniform(base_delay, min(max_delay, base_delay * 2 ** attempt))
+            if isinstance(e, openai.RateLimitError):
+                limiter.pause(delay)
+            time.sleep(delay)
+            stats["retries"] += 1; stats["wait"] += delay
+            continue
+        usage = getattr(resp, "usage", None)
+        limiter.settle(est_tokens, getattr(usage, "total_tokens", None) or est_tokens)
+        return resp
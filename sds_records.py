@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+SDS Tömör Rekordok
+==================
+A munkamenetben tartott nyilvántartás (st.session_state.results / risk_results) tömör ábrázolása.
+Termékenként ~84 kulcsú dict helyett __slots__ osztály: a mezők fix helyen, a kulcsok nem ismétlődnek
+soronként, a gyakran ismétlődő értékek (gyártó, nyelv, piktogramok, szintek) egyszer vannak a memóriában
+(sys.intern). A rekordok dict-szerűen viselkednek (get, [], in, items, **), így a meglévő kód változatlanul
+használja őket; az Excel adatbázis munkalap sorai közvetlenül a mezőkből készülnek (row_values).
+"""
+
+import sys
+from collections.abc import MutableMapping
+from typing import Iterable, List, NamedTuple, Optional
+from sds_registry import DB_KEYS
+
+# Rövid értékek (igen/nem, szintek, mértékegységek, kódok) mezőtől függetlenül internálódnak
+INTERN_MAX_LEN = 16
+# Kevés különböző értékű mezők: ezeknél a hosszabb szöveg is internálódik
+INTERN_FIELDS = frozenset({
+    "product_category", "sds_language", "manufacturer", "manufacturer_address", "manufacturer_phone",
+    "manufacturer_email", "emergency_phone", "product_form", "use_category", "substance_or_mixture", "ghs_pictograms",
+    "signal_word", "physical_state", "color", "odor", "svhc", "pbt_vpvb", "un_number", "adr_class", "packing_group",
+    "marine_pollutant", "ewc_code", "exposure_routes", "_status", "_pdf_backend", "_source_file",
+    "exposure_mode", "exposure_frequency", "exposure_duration", "risk_level", "residual_risk_level", "required_action",
+    "bem_required", "exposure_registry_required", "protection_present", "affected_body_parts"})
+
+SDS_META = ("_source_file", "_status", "_cached", "_pdf_pages", "_pdf_chars", "_pdf_seconds", "_pdf_backend",
+            "_tokens_est", "_tokens_in", "_tokens_out", "_from_index", "_tokens", "_prompt_tokens",
+            "_completion_tokens", "_latency", "_retries", "_wait", "_refilled", "_missing")
+SDS_FIELDS = tuple(k for k in DB_KEYS if k and not k.startswith("_")) + SDS_META
+RISK_FIELDS = ("main_hazardous_component", "exposure_mode", "exposure_frequency", "exposure_duration",
+               "affected_body_parts", "protection_present", "ppe_specification", "probability", "severity",
+               "risk_score", "risk_level", "required_action", "bem_required", "exposure_registry_required",
+               "post_action_probability", "post_action_severity", "residual_risk", "residual_risk_level",
+               "risk_level_num", "residual_risk_level_num", "_rule_based", "_tokens", "_prompt_tokens",
+               "_completion_tokens", "_latency", "_retries", "_wait")
+
+
+def intern_value(key: str, value):
+    if type(value) is str and (len(value) <= INTERN_MAX_LEN or key in INTERN_FIELDS):
+        return sys.intern(value)
+    return value
+
+
+def _rebuild(cls, values: tuple, extra: Optional[dict]):
+    rec = cls.__new__(cls)
+    for name, value in zip(cls.__slots__, values):
+        if value is not None:
+            object.__setattr__(rec, name, value)
+    rec._extra = extra
+    return rec
+
+
+class _Record(MutableMapping):
+    """Fix mezős, dict-szerű rekord. Hiányzó kulcs = üres slot; a None érték a hiányzóval egyenértékű.
+    A mezőlistán kívüli kulcsok (pl. _error, ritka modell-mezők) a _extra szótárba kerülnek."""
+    __slots__ = ("_extra",)
+
+    def __init__(self, data=(), **kw):
+        self._extra = None
+        for key, value in dict(data, **kw).items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def get(self, key, default=None):
+        if key in self._fields:
+            return getattr(self, key, default)
+        return default if self._extra is None else self._extra.get(key, default)
+
+    def __contains__(self, key):
+        if key in self._fields:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __setitem__(self, key, value):
+        if key in self._fields:
+            if value is not None:
+                object.__setattr__(self, key, intern_value(key, value))
+            elif hasattr(self, key):
+                object.__delattr__(self, key)
+        elif value is not None:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = intern_value(key, value)
+        elif self._extra and key in self._extra:
+            self.__delitem__(key)
+
+    def __delitem__(self, key):
+        if key in self._fields:
+            try:
+                object.__delattr__(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        else:
+            if self._extra is None:
+                raise KeyError(key)
+            del self._extra[key]
+            self._extra = self._extra or None
+
+    def __iter__(self):
+        for key in self.__slots__:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for k in self.__slots__ if hasattr(self, k)) + len(self._extra or ())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __reduce__(self):
+        # Pickle (Streamlit munkamenet): a kulcsok helyett csak az értékek sorrendben
+        return _rebuild, (type(self), tuple(getattr(self, k, None) for k in self.__slots__), self._extra)
+
+    def to_dict(self) -> dict:
+        """Sima dict (JSON, gyorsítótár, futás-tároló)"""
+        return dict(self.items())
+
+    def copy(self):
+        return _rebuild(type(self), tuple(getattr(self, k, None) for k in self.__slots__),
+                        dict(self._extra) if self._extra else None)
+
+
+class SDSRecord(_Record):
+    """Egy termék kinyert SDS adatai (az adatbázis munkalap mezői + feldolgozási meta-adatok)"""
+    __slots__ = SDS_FIELDS
+    _fields = frozenset(SDS_FIELDS)
+
+    @property
+    def components(self) -> List["ComponentRecord"]:
+        return [ComponentRecord(*(self.get(f"comp{n}_{f}", "") or "" for f in ("name", "cas", "ec", "conc", "clp")))
+                for n in (1, 2, 3) if self.get(f"comp{n}_name") or self.get(f"comp{n}_cas")]
+
+
+class RiskRecord(_Record):
+    """Egy termék kockázatértékelése (a modell vagy a szabályok kockázati rekordja)"""
+    __slots__ = RISK_FIELDS
+    _fields = frozenset(RISK_FIELDS)
+
+
+class ComponentRecord(NamedTuple):
+    name: str
+    cas: str
+    ec: str
+    conc: str
+    clp: str
+
+
+def compact_records(records: Iterable) -> List[SDSRecord]:
+    """dict lista → SDSRecord lista (a már tömör rekordok változatlanul maradnak)"""
+    return [r if isinstance(r, SDSRecord) else SDSRecord(r) for r in records]
+
+
+def compact_risks(risks: Iterable) -> List[RiskRecord]:
+    return [r if isinstance(r, RiskRecord) else RiskRecord(r or {}) for r in risks]
+
+
+def row_values(rec, keys=DB_KEYS) -> list:
+    """A rekord értékei a keys sorrendjében (hiányzó / üres → ""); a None és _ kulcsokat a hívó tölti ki"""
+    if isinstance(rec, SDSRecord):
+        return [(getattr(rec, k, "") or "") if k in SDSRecord._fields else (rec.get(k) or "") if k else ""
+                for k in keys]
+    return [(rec.get(k) or "") if k else "" for k in keys]
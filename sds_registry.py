@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+SDS Nyilvántartás Import és Összefésülés
+=========================================
+Egy korábban generált SDS_Database_*.xlsx visszaolvasása rekordokká (a db_keys / kockázati oszlop-kiosztás alapján),
+majd az újonnan feldolgozott SDS-ek összefésülése termék + gyártó + SDS verzió szerint.
+Így 5 új termékért nem kell a teljes, több ezer soros nyilvántartást újra feldolgozni.
+"""
+
+import re
+from typing import List, Tuple, Dict
+
+# A Veszélyes_anyag_adatbázis munkalap oszlopai (None = sorszám, "_" kezdetű = vállalat tölti ki / fix érték)
+DB_KEYS = [None,"product_category","product_name","sds_language","sds_version","sds_date","sds_revision_date","manufacturer","manufacturer_address","manufacturer_phone","manufacturer_email","emergency_phone","ufi_code","product_form","intended_use","use_category","substance_or_mixture","comp1_name","comp1_cas","comp1_ec","comp1_conc","comp1_clp","comp2_name","comp2_cas","comp2_ec","comp2_conc","comp2_clp","comp3_name","comp3_cas","comp3_conc","comp3_clp","clp_classification","ghs_pictograms","signal_word","h_statements","p_statements","euh_statements","svhc","pbt_vpvb","physical_state","color","odor","melting_point","boiling_point","flash_point","autoignition_temp","density","water_solubility","ph","vapor_pressure","ak_value","ck_value","mk_value","dnel_inhalation","dnel_dermal","boelv","respiratory_protection","hand_protection","eye_protection","skin_protection","engineering_controls","suitable_extinguishing","unsuitable_extinguishing","hazardous_decomposition","firefighter_ppe","ld50_oral","ld50_dermal","lc50_inhalation","skin_irritation","eye_irritation","sensitization","cmr_effects","un_number","shipping_name","adr_class","packing_group","marine_pollutant","ewc_code","disposal_method","_loc","_qty","_freq","exposure_routes","_workers","_notes"]
+
+# A Kémiai_kockázatértékelés munkalap oszlopai közül a kockázati rekordba visszaolvasandók
+# (None = SDS-ből / beállításokból származó oszlop: név, CLP, H/P, határidő, felelős, értékelő, dátumok)
+RISK_KEYS = [None, None, "main_hazardous_component", None, None, None, "exposure_mode", "exposure_frequency",
+             "exposure_duration", "affected_body_parts", "protection_present", "ppe_specification",
+             "probability", "severity", "risk_score", "risk_level", "required_action", "bem_required",
+             "exposure_registry_required", None, None, "post_action_probability", "post_action_severity",
+             "residual_risk", "residual_risk_level", None, None, None, None]
+
+
+# ============================================================
+# 1. IMPORT
+# ============================================================
+
+def _sheet_rows(ws) -> List[list]:
+    return [["" if v is None else str(v) for v in row] for row in ws.iter_rows(values_only=True)]
+
+
+def load_registry(file) -> Tuple[List[dict], List[dict]]:
+    """Korábbi SDS_Database_*.xlsx → (results, risk_results). A munkalapokat az oszlopszám alapján azonosítja,
+    így bármelyik kimeneti nyelven készült munkafüzet visszaolvasható."""
+    import openpyxl
+    wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    db_rows = risk_rows = None
+    try:
+        for ws in wb.worksheets:
+            header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+            width = len([h for h in header if h is not None])
+            if width == len(DB_KEYS) and db_rows is None:
+                db_rows = _sheet_rows(ws)[1:]
+            elif width == len(RISK_KEYS) and risk_rows is None:
+                risk_rows = _sheet_rows(ws)[1:]
+    finally:
+        wb.close()
+    if db_rows is None:
+        raise ValueError("A munkafüzetben nincs SDS adatbázis munkalap (nem SDS_Database_*.xlsx?)")
+
+    results, risk_results = [], []
+    for row in db_rows:
+        if not any(row):
+            continue
+        sds = {k: (row[ci] if ci < len(row) else "") for ci, k in enumerate(DB_KEYS) if k and not k.startswith("_")}
+        sds["_source_file"] = "📂 nyilvántartás"
+        sds["_status"] = "📂"
+        results.append(sds)
+    risk_rows = [r for r in (risk_rows or []) if any(r)]
+    for i in range(len(results)):
+        row = risk_rows[i] if i < len(risk_rows) else []
+        risk = {k: row[ci] for ci, k in enumerate(RISK_KEYS) if k and ci < len(row) and row[ci] != ""}
+        risk_results.append(risk)
+    return results, risk_results
+
+
+# ============================================================
+# 2. ÖSSZEFÉSÜLÉS
+# ============================================================
+
+def normalize_text(value) -> str:
+    """Összehasonlításhoz: szóközök összevonva, kis-nagybetű nélkül (a duplikátum-szűrés is ezt használja)"""
+    return re.sub(r"\s+", " ", str(value or "")).strip().casefold()
+
+
+def registry_key(sds: dict) -> Tuple[str, str]:
+    return normalize_text(sds.get("product_name")), normalize_text(sds.get("manufacturer"))
+
+
+def merge_registry(old_results: List[dict], old_risks: List[dict],
+                   new_results: List[dict], new_risks: List[dict]) -> Tuple[List[dict], List[dict], Dict[str, int]]:
+    """Új SDS-ek beolvasztása a meglévő nyilvántartásba (termék + gyártó + SDS verzió):
+    - azonos termék, gyártó és verzió → a meglévő sor marad (változatlan)
+    - azonos termék és gyártó, más verzió → a sor helyben frissül
+    - új termék → a lista végére kerül
+    Sikertelen feldolgozás (❌) nem írja felül a meglévő adatot. A sorszámot az Excel export újraszámozza."""
+    results, risks = list(old_results), list(old_risks) + [{}] * (len(old_results) - len(old_risks))
+    index = {registry_key(s): i for i, s in enumerate(results)}
+    stats = {"added": 0, "updated": 0, "unchanged": 0, "failed": 0}
+    for sds, risk in zip(new_results, new_risks):
+        if str(sds.get("_status", "")).startswith("❌"):
+            stats["failed"] += 1
+            continue
+        key = registry_key(sds)
+        i = index.get(key)
+        if i is None:
+            index[key] = len(results)
+            results.append(sds); risks.append(risk or {})
+            stats["added"] += 1
+        elif normalize_text(results[i].get("sds_version")) == normalize_text(sds.get("sds_version")):
+            stats["unchanged"] += 1
+        else:
+            results[i], risks[i] = sds, risk or {}
+            stats["updated"] += 1
+    return results, risks, stats
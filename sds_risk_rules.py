@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+SDS Szabály-alapú Kockázati Előértékelés
+=======================================
+A H/EUH/P kódokból táblázat alapján súlyosság, védőeszköz és V×S kockázati szint – a Segédtáblák
+munkalap 4x4 mátrixával és sávjaival (1-2 / 3-4 / 5-9 / 10-16) egyezően.
+Egyértelmű esetekben (nincs egészségi/fizikai veszély, illetve 1. kategóriás CMR: H340/H350/H360)
+nincs szükség a második GPT hívásra; a többi rekord továbbra is a modellhez megy.
+"""
+
+import re
+from enum import IntEnum
+from typing import List, Optional, Dict, Set
+from sds_languages import load_bundle
+
+RULES_VERSION = "2"
+
+# H / EUH kód → súlyosság (1-4), a Segédtáblák súlyossági skálája szerint
+SEVERITY_CODES = {
+    4: "H200 H201 H202 H203 H300 H310 H330 H340 H350 H360 H370 H372",
+    3: "H204 H205 H220 H222 H224 H230 H231 H240 H241 H250 H260 H270 H271 H301 H304 H311 H314 H317 H318 H331 "
+       "H334 H341 H351 H361 H362 H371 H373 EUH001 EUH014 EUH029 EUH031 EUH032 EUH070 EUH071",
+    2: "H221 H223 H225 H226 H228 H229 H242 H251 H252 H261 H272 H280 H281 H290 H302 H312 H315 H319 H332 H335 "
+       "H336 EUH018 EUH019 EUH044 EUH201 EUH202 EUH203 EUH204 EUH205 EUH206 EUH207 EUH208 EUH209 EUH211 EUH212",
+    1: "H400 H410 H411 H412 H413 H420 EUH066 EUH210 EUH401",
+}
+SEVERITY = {code: sev for sev, codes in SEVERITY_CODES.items() for code in codes.split()}
+CMR_CODES = {"H340", "H350", "H360"}
+# Egészségi veszély (H3xx és a kiegészítő EUH egészségi mondatok) – csak ekkor kell expozíciós nyilvántartás
+HEALTH_EUH = {"EUH029", "EUH031", "EUH032", "EUH070", "EUH071"}
+
+# Védőeszköz-igény H és P kódok alapján
+PPE_CODES = {
+    "hand": {"H310", "H311", "H312", "H314", "H315", "H317", "EUH066", "P280", "P302", "P362"},
+    "eye": {"H314", "H318", "H319", "EUH070", "P280", "P305"},
+    "resp": {"H330", "H331", "H332", "H334", "H335", "H336", "EUH071", "P260", "P261", "P284", "P285"},
+    "skin": {"H310", "H311", "H314", "P280", "P361"},
+}
+PPE_FIELDS = {"hand": "hand_protection", "eye": "eye_protection", "resp": "respiratory_protection",
+              "skin": "skin_protection"}
+
+CODE_FIELDS = ("h_statements", "euh_statements", "clp_classification", "comp1_clp", "comp2_clp", "comp3_clp")
+H_RE = re.compile(r"(?<![A-Za-z0-9])(EUH\d{3}|H\d{3})(?:[A-Za-z]{1,2})?(?!\d)")
+P_RE = re.compile(r"(?<![A-Za-z0-9])(P\d{3})(?!\d)")
+# Gáz, aeroszol, por: belélegzéssel könnyebben jut a szervezetbe → nagyobb valószínűség
+AIRBORNE_RE = re.compile(r"\b(gáz|gas|aerosol|aeroszol|aérosol|por|powder|dust|staub|pulver)", re.IGNORECASE)
+
+
+class RiskLevel(IntEnum):
+    """Kockázati szint a V×S pontszámból – nyelvfüggetlen, a színezés és az intézkedési terv ezt használja"""
+    ACCEPTABLE = 1     # 1-2, zöld
+    TOLERABLE = 2      # 3-4, sárga – intézkedés szükséges
+    SIGNIFICANT = 3    # 5-9, narancs
+    UNACCEPTABLE = 4   # 10-16, piros
+
+    @classmethod
+    def from_score(cls, score: int) -> "RiskLevel":
+        return cls(1 if score <= 2 else 2 if score <= 4 else 3 if score <= 9 else 4)
+
+
+def _int(value) -> Optional[int]:
+    try:
+        return int(float(str(value).strip().replace(",", ".")))
+    except (TypeError, ValueError):
+        return None
+
+
+def level_of(risk: Optional[dict], residual: bool = False) -> Optional[RiskLevel]:
+    """A kockázati (vagy maradék kockázati) szint: a tárolt számérték, különben a pontszámból,
+    végül a valószínűség × súlyosság szorzatból; None, ha egyik sem szám"""
+    if not risk:
+        return None
+    num_key, score_key, p_key, s_key = (("residual_risk_level_num", "residual_risk", "post_action_probability",
+                                         "post_action_severity") if residual else
+                                        ("risk_level_num", "risk_score", "probability", "severity"))
+    num = _int(risk.get(num_key))
+    if num in (1, 2, 3, 4):
+        return RiskLevel(num)
+    score = _int(risk.get(score_key))
+    if score is None:
+        p, s = _int(risk.get(p_key)), _int(risk.get(s_key))
+        score = p * s if p is not None and s is not None else None
+    return RiskLevel.from_score(score) if score is not None and score > 0 else None
+
+
+def annotate_levels(risk: dict) -> dict:
+    """risk_level_num / residual_risk_level_num (1-4) hozzáadása a modell vagy a szabályok kockázati rekordjához"""
+    for residual, key in ((False, "risk_level_num"), (True, "residual_risk_level_num")):
+        level = level_of(risk, residual)
+        if level is not None:
+            risk[key] = int(level)
+    return risk
+
+
+def hazard_codes(sds: dict) -> Set[str]:
+    return {m.group(1).upper() for f in CODE_FIELDS for m in H_RE.finditer(str(sds.get(f) or ""))}
+
+
+def _ppe(sds: dict, codes: Set[str], hints: Dict[str, str]) -> str:
+    """Az SDS saját védőeszköz-leírása, ha van; különben a kódokból adódó általános előírás"""
+    parts = []
+    for kind, triggers in PPE_CODES.items():
+        if codes & triggers:
+            parts.append(str(sds.get(PPE_FIELDS[kind]) or "").strip() or hints[kind])
+    return "; ".join(dict.fromkeys(parts))
+
+
+def prescore_batch(records: List[dict], lang: str = "hu") -> List[Optional[dict]]:
+    """Egy menetben az egész batch: rekordonként a kockázati rekord (a SYSTEM_PROMPT_RISK JSON kulcsaival,
+    '_rule_based': True), vagy None, ha az eset nem egyértelmű és a modellnek kell értékelnie."""
+    L = load_bundle(lang)
+    if not L:
+        return [None] * len(records)
+    out = []
+    for sds in records:
+        codes = hazard_codes(sds)
+        cmr = codes & CMR_CODES
+        unknown = {c for c in codes if c not in SEVERITY}
+        max_sev = max((SEVERITY.get(c, 0) for c in codes), default=0)
+        if cmr:
+            severity = 4
+            probability = 3 if AIRBORNE_RE.search(str(sds.get("physical_state") or "")) else 2
+        elif max_sev <= 1 and not unknown:
+            severity, probability = 1, 1
+        else:
+            out.append(None)
+            continue
+        codes_all = codes | {m.group(1) for m in P_RE.finditer(str(sds.get("p_statements") or ""))}
+        health = any(c.startswith("H3") or c in HEALTH_EUH for c in codes)
+        score, residual = probability * severity, severity
+        level, residual_level = RiskLevel.from_score(score), RiskLevel.from_score(residual)
+        out.append({
+            "main_hazardous_component": sds.get("comp1_name", ""),
+            "exposure_mode": sds.get("exposure_routes", ""),
+            "exposure_frequency": L["company_fills"], "exposure_duration": L["company_fills"],
+            "affected_body_parts": "", "protection_present": "",
+            "ppe_specification": _ppe(sds, codes_all, L["ppe_hints"]),
+            "probability": probability, "severity": severity, "risk_score": score,
+            "risk_level": L["level_names"][level - 1], "required_action": L["level_actions"][level - 1],
+            "bem_required": L["yes"] if cmr else L["no"],
+            "exposure_registry_required": L["yes"] if health else L["no"],
+            "post_action_probability": 1, "post_action_severity": severity, "residual_risk": residual,
+            "residual_risk_level": L["level_names"][residual_level - 1],
+            "risk_level_num": int(level), "residual_risk_level_num": int(residual_level),
+            "_rule_based": True,
+        })
+    return out
+
+
+def prescore(sds: dict, lang: str = "hu") -> Optional[dict]:
+    return prescore_batch([sds], lang)[0]
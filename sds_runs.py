@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+SDS Futások (folytatható, ellenőrzőpontos feldolgozás)
+======================================================
+Minden interaktív / parancssori futás egy run_id alatt a ~/.sds_ai/runs tárolóba kerül: a feltöltött PDF-ek
+lemezre, minden elkészült (sds, risk) pár azonnal SQLite-ba. Böngésző-frissítés, véletlen újrafuttatás vagy
+összeomlás után a futás az azonosítóval újra megnyitható, és csak a még hiányzó (vagy sikertelen) SDS-ek
+kerülnek újra feldolgozásra – a már kifizetett GPT hívások nem vesznek el.
+Háttér-feldolgozásnál ugyanez a tároló a feladatsor: a felület csak beküldi a futást ("queued"), a fájlokat
+az sds_worker.py folyamatai fájlonként foglalják le (claim) – több felhasználó futásai közös worker-készleten osztoznak.
+"""
+
+import json
+import os
+import socket
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Optional, Tuple
+from sds_pipeline import PDFFile, process_batch
+
+RUN_DIR = os.environ.get("SDS_RUN_DIR", os.path.join(os.path.expanduser("~"), ".sds_ai", "runs"))
+# Ennyi másodperc életjel nélkül a "running" futás megszakadtnak számít (folytatható)
+STALE_AFTER = 300
+# Ennyi másodperc életjel nélkül a worker halottnak számít, az általa lefoglalt fájlok újra kioszthatók
+WORKER_STALE = 90
+
+
+class RunStore:
+    """Szálbiztos SQLite futás-tároló: runs (beállítások, állapot, életjel) és items (fájlonkénti eredmény)"""
+
+    def __init__(self, root: str = RUN_DIR):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self._lock = threading.Lock()
+        # Több folyamat (felület + workerek) írja: WAL napló, zárolásnál várakozás
+        self._db = sqlite3.connect(os.path.join(root, "runs.sqlite3"), check_same_thread=False, timeout=30)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY, lang TEXT NOT NULL, label TEXT NOT NULL, settings TEXT NOT NULL,
+                total INTEGER NOT NULL, status TEXT NOT NULL, error TEXT, created REAL NOT NULL, heartbeat REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS items (
+                run_id TEXT NOT NULL, idx INTEGER NOT NULL, name TEXT NOT NULL, status TEXT NOT NULL,
+                sds TEXT, risk TEXT, updated REAL NOT NULL, worker TEXT, PRIMARY KEY (run_id, idx));
+            CREATE INDEX IF NOT EXISTS idx_items_status ON items(status);
+            CREATE TABLE IF NOT EXISTS workers (
+                worker_id TEXT PRIMARY KEY, host TEXT NOT NULL, pid INTEGER NOT NULL, threads INTEGER NOT NULL,
+                processed INTEGER NOT NULL, heartbeat REAL NOT NULL);""")
+        self._db.commit()
+
+    def _pdf_path(self, run_id: str, idx: int) -> str:
+        return os.path.join(self.root, os.path.basename(run_id), f"{idx:05d}.pdf")
+
+    def create(self, files, lang: str, label: str = "", settings: Optional[dict] = None, run_id: Optional[str] = None,
+               status: str = "created") -> str:
+        """Új futás: a PDF-ek (name, getvalue) lemezre mentése, minden fájl "pending" állapotban.
+        status="queued": háttér-feldolgozásra beküldve (a workerek innen veszik fel)"""
+        run_id = run_id or uuid.uuid4().hex[:12]
+        os.makedirs(os.path.join(self.root, run_id), exist_ok=True)
+        for idx, f in enumerate(files):
+            with open(self._pdf_path(run_id, idx), "wb") as out:
+                out.write(f.getvalue())
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT INTO runs VALUES (?,?,?,?,?,?,?,?,?)",
+                             (run_id, lang, label, json.dumps(settings or {}), len(files), status, None, now, now))
+            self._db.executemany("INSERT INTO items VALUES (?,?,?,?,?,?,?,?)",
+                                 [(run_id, idx, f.name, "pending", None, None, now, None) for idx, f in enumerate(files)])
+            self._db.commit()
+        return run_id
+
+    def submit(self, files, lang: str, label: str = "", settings: Optional[dict] = None) -> str:
+        """Futás beküldése háttér-feldolgozásra (sds_worker.py)"""
+        return self.create(files, lang, label, {**(settings or {}), "background": True}, status="queued")
+
+    def get(self, run_id: str) -> Optional[dict]:
+        """Futás adatai darabszámokkal (done / failed / pending / claimed) és az alive jelzővel; None, ha ismeretlen.
+        Háttér-futás akkor él, ha sorban áll és van aktív worker."""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM runs WHERE run_id=?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM items WHERE run_id=? GROUP BY status",
+                                           (run_id,)).fetchall())
+        run = dict(row)
+        run["settings"] = json.loads(run["settings"])
+        run.update({k: counts.get(k, 0) for k in ("done", "failed", "pending", "claimed")})
+        if run["status"] == "queued":
+            run["alive"] = bool(self.active_workers())
+        else:
+            run["alive"] = run["status"] == "running" and time.time() - run["heartbeat"] < STALE_AFTER
+        return run
+
+    def list_runs(self, limit: int = 20) -> List[dict]:
+        with self._lock:
+            ids = [r[0] for r in self._db.execute("SELECT run_id FROM runs ORDER BY created DESC LIMIT ?", (limit,))]
+        return [run for run in map(self.get, ids) if run]
+
+    def set_status(self, run_id: str, status: str, error: Optional[str] = None):
+        with self._lock:
+            self._db.execute("UPDATE runs SET status=?, error=?, heartbeat=? WHERE run_id=?",
+                             (status, error, time.time(), run_id))
+            self._db.commit()
+
+    def save_result(self, run_id: str, idx: int, sds: dict, risk: dict):
+        """Egy kész SDS ellenőrzőpontja (bármely szálból hívható); ❌ státusz esetén "failed" – folytatáskor újra fut"""
+        status = "failed" if str(sds.get("_status", "")).startswith("❌") else "done"
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE items SET status=?, sds=?, risk=?, updated=? WHERE run_id=? AND idx=?",
+                             (status, json.dumps(sds, ensure_ascii=False, default=str),
+                              json.dumps(risk or {}, ensure_ascii=False, default=str), now, run_id, idx))
+            self._db.execute("UPDATE runs SET heartbeat=? WHERE run_id=?", (now, run_id))
+            # Háttér-futás: az utolsó fájl után kész
+            self._db.execute("UPDATE runs SET status='done' WHERE run_id=? AND status='queued' AND NOT EXISTS "
+                             "(SELECT 1 FROM items WHERE run_id=? AND status IN ('pending', 'claimed'))", (run_id, run_id))
+            self._db.commit()
+
+    def pending(self, run_id: str, retry_failed: bool = True) -> List[Tuple[int, PDFFile]]:
+        """A még feldolgozandó fájlok (index, PDFFile) a lemezre mentett PDF-ekből"""
+        statuses = ("pending", "failed") if retry_failed else ("pending",)
+        with self._lock:
+            rows = self._db.execute(f"SELECT idx, name FROM items WHERE run_id=? AND status IN ({','.join('?' * len(statuses))}) "
+                                    "ORDER BY idx", (run_id, *statuses)).fetchall()
+        return [(idx, self._read_pdf(run_id, idx, name)) for idx, name in rows]
+
+    def _read_pdf(self, run_id: str, idx: int, name: str) -> PDFFile:
+        with open(self._pdf_path(run_id, idx), "rb") as f:
+            return PDFFile(name, f.read())
+
+    # --- Háttér-feldolgozás (feladatsor) ---
+
+    def claim(self, worker_id: str) -> Optional[Tuple[dict, int, PDFFile]]:
+        """A következő feldolgozandó fájl lefoglalása (a legrégebben beküldött futásból): (futás, index, PDFFile);
+        None, ha nincs munka. Halott worker (WORKER_STALE) foglalásai újra kioszthatók."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT i.run_id, i.idx, i.name FROM items i JOIN runs r ON r.run_id = i.run_id "
+                    "WHERE r.status = 'queued' AND (i.status = 'pending' OR (i.status = 'claimed' AND i.worker NOT IN "
+                    "(SELECT worker_id FROM workers WHERE heartbeat > ?))) ORDER BY r.created, i.idx LIMIT 1",
+                    (now - WORKER_STALE,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE items SET status='claimed', worker=?, updated=? WHERE run_id=? AND idx=?",
+                                     (worker_id, now, row["run_id"], row["idx"]))
+                    self._db.execute("UPDATE runs SET heartbeat=? WHERE run_id=?", (now, row["run_id"]))
+                self._db.commit()
+            except Exception:
+                self._db.rollback()
+                raise
+        if row is None:
+            return None
+        return self.get(row["run_id"]), row["idx"], self._read_pdf(row["run_id"], row["idx"], row["name"])
+
+    def requeue(self, run_id: str):
+        """Megszakított / hibás futás (újra) beküldése háttér-feldolgozásra; a sikertelen fájlok újra futnak
+        (a még lefoglalt fájlokat a worker befejezi, halott worker foglalását a claim osztja ki újra)"""
+        with self._lock:
+            self._db.execute("UPDATE items SET status='pending', worker=NULL WHERE run_id=? AND status='failed'", (run_id,))
+            settings = json.loads(self._db.execute("SELECT settings FROM runs WHERE run_id=?", (run_id,)).fetchone()[0])
+            self._db.execute("UPDATE runs SET status='queued', error=NULL, heartbeat=?, settings=? WHERE run_id=?",
+                             (time.time(), json.dumps({**settings, "background": True}), run_id))
+            self._db.commit()
+
+    def cancel(self, run_id: str):
+        """Háttér-futás leállítása: a még függő fájlokat a workerek nem veszik fel (a folyamatban lévők befejeződnek)"""
+        with self._lock:
+            self._db.execute("UPDATE runs SET status='interrupted' WHERE run_id=? AND status='queued'", (run_id,))
+            self._db.commit()
+
+    def worker_heartbeat(self, worker_id: str, threads: int, processed: int):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO workers VALUES (?,?,?,?,?,?)",
+                             (worker_id, socket.gethostname(), os.getpid(), threads, processed, time.time()))
+            self._db.commit()
+
+    def worker_exit(self, worker_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM workers WHERE worker_id=?", (worker_id,))
+            self._db.execute("UPDATE items SET status='pending', worker=NULL WHERE status='claimed' AND worker=?", (worker_id,))
+            self._db.commit()
+
+    def active_workers(self) -> List[dict]:
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM workers WHERE heartbeat > ? ORDER BY worker_id",
+                                    (time.time() - WORKER_STALE,)).fetchall()
+        return [dict(r) for r in rows]
+
+    def queue_stats(self) -> dict:
+        """A sor állapota: várakozó és folyamatban lévő fájlok, sorban álló futások"""
+        with self._lock:
+            pending, claimed = self._db.execute(
+                "SELECT COALESCE(SUM(i.status = 'pending'), 0), COALESCE(SUM(i.status = 'claimed'), 0) "
+                "FROM items i JOIN runs r ON r.run_id = i.run_id WHERE r.status = 'queued'").fetchone()
+            runs = self._db.execute("SELECT COUNT(*) FROM runs WHERE status = 'queued'").fetchone()[0]
+        return {"pending": pending, "claimed": claimed, "runs": runs}
+
+    def results(self, run_id: str) -> Tuple[List[dict], List[dict]]:
+        """Az eddig elkészült (sds, risk) párok a feltöltési sorrendben – a még függő fájlok nélkül"""
+        with self._lock:
+            rows = self._db.execute("SELECT sds, risk FROM items WHERE run_id=? AND sds IS NOT NULL ORDER BY idx",
+                                    (run_id,)).fetchall()
+        return [json.loads(r["sds"]) for r in rows], [json.loads(r["risk"]) for r in rows]
+
+    def delete(self, run_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM items WHERE run_id=?", (run_id,))
+            self._db.execute("DELETE FROM runs WHERE run_id=?", (run_id,))
+            self._db.commit()
+        shutil.rmtree(os.path.join(self.root, os.path.basename(run_id)), ignore_errors=True)
+
+
+def run_pending(store: RunStore, run_id: str, api_key: str, max_workers: int = 4, on_done=None, cache=None,
+                substances=None, metrics=None) -> Tuple[List[dict], List[dict]]:
+    """A futás függő fájljainak feldolgozása ellenőrzőpontokkal (új futás és folytatás is), majd a teljes eredmény.
+    A nyelv és a beállítások (rules, use_cache) a futás létrehozásakor rögzítettek. Megszakadáskor (kivétel,
+    Streamlit újrafuttatás) a már elindított SDS-ek is elmentődnek, az állapot "interrupted" lesz."""
+    run = store.get(run_id)
+    settings = run["settings"]
+    todo = store.pending(run_id)
+    store.set_status(run_id, "running")
+    try:
+        process_batch([f for _, f in todo], api_key, run["lang"], max_workers, on_done, cache,
+                      settings.get("use_cache", True), settings.get("rules", True), substances, metrics,
+                      checkpoint=lambda i, sds, risk: store.save_result(run_id, todo[i][0], sds, risk))
+    finally:
+        run = store.get(run_id)
+        store.set_status(run_id, "done" if run["pending"] == 0 else "interrupted")
+    return store.results(run_id)
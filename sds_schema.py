@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+SDS Kinyerési Séma
+==================
+A kinyerési JSON séma egyetlen helyen: mezőnként a forrás SDS szakasz, a kötelezőség és a formai ellenőrzés.
+Ebből készül a prompt JSON mintája, a strukturált kimenet (response_format: json_schema, strict) és az
+ellenőrzés, amely a hiányzó kötelező / hibás formátumú mezőket csak a releváns szakaszokkal kérdezi vissza
+(sds_pipeline.refill_missing) – egy teljes újrakinyerés helyett néhány száz token.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from sds_pdf import trim_sections
+
+FOLLOWUP_TOKEN_BUDGET = 2000
+SCHEMA_VERSION = "1"
+CAS_RE = re.compile(r"\b(\d{2,7})-(\d{2})-(\d)\b")
+EC_RE = re.compile(r"\b(\d{3})-(\d{3})-(\d)\b")
+
+
+def cas_ok(value: str) -> bool:
+    """Minden CAS-szám alakú részlet ellenőrző számjegye stimmel (a nem CAS szöveg, pl. „keverék” nem hiba)"""
+    for m in CAS_RE.finditer(value):
+        digits = (m.group(1) + m.group(2))[::-1]
+        if sum(i * int(d) for i, d in enumerate(digits, 1)) % 10 != int(m.group(3)):
+            return False
+    return True
+
+
+def ec_ok(value: str) -> bool:
+    for m in EC_RE.finditer(value):
+        digits = m.group(1) + m.group(2)
+        if sum(i * int(d) for i, d in enumerate(digits, 1)) % 11 != int(m.group(3)):
+            return False
+    return True
+
+
+@dataclass(frozen=True)
+class SchemaField:
+    """Egy kinyert mező: név, az SDS szakasz, ahol az adat áll (0 = fejléc), kötelező-e, formai ellenőrzés"""
+    name: str
+    section: int
+    required: bool = False
+    check: Optional[Callable[[str], bool]] = None
+
+
+def _f(names: str, section: int, required: str = "", check=None) -> List[SchemaField]:
+    req = set(required.split())
+    return [SchemaField(n, section, n in req, check) for n in names.split()]
+
+
+# A sorrend a prompt JSON mintájáé (a modell ebben a sorrendben tölti ki)
+EXTRACT_SCHEMA: Tuple[SchemaField, ...] = tuple(
+    _f("product_name product_category", 1, "product_name")
+    + _f("sds_language sds_version sds_date sds_revision_date", 0, "sds_date")
+    + _f("manufacturer manufacturer_address manufacturer_phone manufacturer_email emergency_phone ufi_code "
+         "product_form intended_use use_category", 1, "manufacturer manufacturer_address emergency_phone")
+    + _f("substance_or_mixture", 3, "substance_or_mixture")
+    + [f for n in (1, 2, 3) for f in _f(f"comp{n}_name", 3) + _f(f"comp{n}_cas", 3, check=cas_ok)
+       + (_f(f"comp{n}_ec", 3, check=ec_ok) if n < 3 else []) + _f(f"comp{n}_conc comp{n}_clp", 3)]
+    + _f("clp_classification ghs_pictograms signal_word h_statements p_statements euh_statements svhc pbt_vpvb", 2,
+         "clp_classification")
+    + _f("physical_state color odor melting_point boiling_point flash_point autoignition_temp density "
+         "water_solubility ph vapor_pressure", 9, "physical_state")
+    + _f("ak_value ck_value mk_value dnel_inhalation dnel_dermal boelv respiratory_protection hand_protection "
+         "eye_protection skin_protection engineering_controls", 8)
+    + _f("suitable_extinguishing unsuitable_extinguishing", 5)
+    + _f("hazardous_decomposition", 10)
+    + _f("firefighter_ppe", 5)
+    + _f("ld50_oral ld50_dermal lc50_inhalation skin_irritation eye_irritation sensitization cmr_effects", 11)
+    + _f("un_number shipping_name adr_class packing_group marine_pollutant", 14)
+    + _f("ewc_code disposal_method", 13)
+    + _f("exposure_routes", 11))
+FIELDS: Dict[str, SchemaField] = {f.name: f for f in EXTRACT_SCHEMA}
+REQUIRED = [f.name for f in EXTRACT_SCHEMA if f.required]
+
+
+# ============================================================
+# 1. PROMPT MINTA ÉS STRUKTURÁLT KIMENET
+# ============================================================
+
+def json_template(names: Optional[List[str]] = None) -> str:
+    """A prompt JSON mintája: {"product_name":"",...}"""
+    return json.dumps({n: "" for n in (names or FIELDS)}, separators=(",", ":"))
+
+
+def response_format(names: Optional[List[str]] = None, name: str = "sds_extract") -> dict:
+    """OpenAI structured outputs: minden mező kötelező szöveg, más kulcs nem megengedett"""
+    names = list(names or FIELDS)
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": {
+        "type": "object", "properties": {n: {"type": "string"} for n in names},
+        "required": names, "additionalProperties": False}}}
+
+
+# ============================================================
+# 2. ELLENŐRZÉS
+# ============================================================
+
+def coerce(sds: dict) -> dict:
+    """Nem szöveg értékek (szám, lista, objektum – json_object módban előfordul) szöveggé, helyben"""
+    for k, v in sds.items():
+        if k in FIELDS and isinstance(v, list):
+            sds[k] = "; ".join(map(str, v))
+        elif k in FIELDS and isinstance(v, dict):
+            sds[k] = json.dumps(v, ensure_ascii=False)
+        elif k in FIELDS and v is not None and not isinstance(v, str):
+            sds[k] = str(v)
+    return sds
+
+
+def validate(sds: dict) -> Tuple[List[str], List[str]]:
+    """(hiányzó kötelező mezők, hibás formátumú mezők) a séma sorrendjében"""
+    missing = [n for n in REQUIRED if not str(sds.get(n) or "").strip()]
+    malformed = [f.name for f in EXTRACT_SCHEMA if f.check and sds.get(f.name) and not f.check(str(sds[f.name]))]
+    return missing, malformed
+
+
+def followup_text(pdf, names: List[str], token_budget: int = FOLLOWUP_TOKEN_BUDGET) -> Optional[str]:
+    """A kért mezők forrás-szakaszai (az 1. szakasz mellé a fejléc, a fejléc mellé a 16. szakasz is) a keret ~4 karakter/token becslésével;
+    None, ha a PDF-ben nem ismerhetők fel a szakaszok (ilyenkor nincs olcsó pótlás)"""
+    wanted = {FIELDS[n].section for n in names}
+    if 1 in wanted:
+        wanted.add(0)
+    if 0 in wanted:
+        wanted.add(16)  # verzió / dátum: a fejlécben vagy a 16. szakaszban
+    picked = {k: v for k, v in (pdf.sections or {}).items() if k in wanted}
+    if not picked:
+        return None
+    return trim_sections(picked, token_budget * 4)
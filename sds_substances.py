@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+SDS Anyag-index (CAS / EC)
+==========================
+A feldolgozott SDS-ek összetevőiből épülő helyi SQLite index: anyagonként CLP osztályozás, H kódok,
+CMR jelölés és munkahelyi határértékek, valamint hogy mely termékek tartalmazzák.
+Ugyanazt az anyagot (pl. toluol, 108-88-3) így nem kell termékenként újra levezetni: a kockázatértékelés
+előtt az index pótolja az SDS-ből hiányzó összetevő-adatokat, az Excel expozíciós nyilvántartása pedig innen töltődik.
+Lekérdezés: python sds_substances.py 108-88-3
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import List, Optional
+from sds_risk_rules import H_RE, SEVERITY
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    "SDS_SUBSTANCE_DB", os.path.join(os.path.expanduser("~"), ".sds_ai", "substances.sqlite3"))
+
+CAS_RE = re.compile(r"(?<!\d)(\d{2,7})-(\d{2})-(\d)(?!\d)")
+EC_RE = re.compile(r"(?<!\d)(\d{3})-(\d{3})-(\d)(?!\d)")
+# Összetevő-mezők: (név, CAS, EC, koncentráció, CLP) – a 3. összetevőnek nincs EC mezője
+COMPONENTS = [(f"comp{i}_name", f"comp{i}_cas", f"comp{i}_ec" if i < 3 else None, f"comp{i}_conc", f"comp{i}_clp")
+              for i in (1, 2, 3)]
+# Termékszintű határértékek; csak egykomponensű terméknél rendelhetők egyértelműen az anyaghoz
+OEL_FIELDS = ("ak_value", "ck_value", "mk_value", "boelv")
+# CMR: kód → (betű, kategória)
+CMR_CODES = {"H350": ("C", 1), "H351": ("C", 2), "H340": ("M", 1), "H341": ("M", 2), "H360": ("R", 1), "H361": ("R", 2)}
+
+
+def normalize_cas(value) -> Optional[str]:
+    """Az első érvényes (ellenőrző számjegyes) CAS szám a mezőből; None, ha nincs."""
+    for m in CAS_RE.finditer(str(value or "")):
+        digits = (m.group(1) + m.group(2))[::-1]
+        if sum(i * int(d) for i, d in enumerate(digits, 1)) % 10 == int(m.group(3)):
+            return "-".join(m.groups()).lstrip("0") or None
+    return None
+
+
+def normalize_ec(value) -> Optional[str]:
+    m = EC_RE.search(str(value or ""))
+    return "-".join(m.groups()) if m else None
+
+
+def classify(clp) -> tuple:
+    """CLP szövegből: (H kódok szóközzel, CMR jelölés pl. "C1 R2", legnagyobb súlyosság)"""
+    codes = sorted({m.group(1).upper() for m in H_RE.finditer(str(clp or ""))})
+    cmr = {}
+    for code in codes:
+        if code in CMR_CODES:
+            letter, cat = CMR_CODES[code]
+            cmr[letter] = min(cat, cmr.get(letter, cat))
+    return " ".join(codes), " ".join(f"{k}{cmr[k]}" for k in "CMR" if k in cmr), max((SEVERITY.get(c, 0) for c in codes), default=0)
+
+
+def _product_key(sds: dict) -> str:
+    return "|".join(str(sds.get(f) or "").strip().lower() for f in ("product_name", "manufacturer"))
+
+
+class SubstanceIndex:
+    """Szálbiztos SQLite anyag-index: substances (CAS/EC indexszel) és occurrences (anyag ↔ termék)"""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        # Több folyamat (sds_worker.py) is írhatja: zárolásnál várakozás
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS substances (
+                key TEXT PRIMARY KEY, cas TEXT, ec TEXT, name TEXT NOT NULL, clp TEXT NOT NULL,
+                h_codes TEXT NOT NULL, cmr TEXT NOT NULL, severity INTEGER NOT NULL,
+                ak_value TEXT NOT NULL, ck_value TEXT NOT NULL, mk_value TEXT NOT NULL, boelv TEXT NOT NULL,
+                updated REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS idx_substances_cas ON substances(cas);
+            CREATE INDEX IF NOT EXISTS idx_substances_ec ON substances(ec);
+            CREATE TABLE IF NOT EXISTS occurrences (
+                key TEXT NOT NULL, product TEXT NOT NULL, product_name TEXT NOT NULL, manufacturer TEXT NOT NULL,
+                source_file TEXT NOT NULL, conc TEXT NOT NULL, sds_version TEXT NOT NULL, sds_date TEXT NOT NULL,
+                updated REAL NOT NULL, PRIMARY KEY (key, product));
+            CREATE INDEX IF NOT EXISTS idx_occurrences_product ON occurrences(product);""")
+        self._db.commit()
+
+    def _find(self, cas=None, ec=None) -> Optional[sqlite3.Row]:
+        if cas:
+            row = self._db.execute("SELECT * FROM substances WHERE cas=?", (cas,)).fetchone()
+            if row:
+                return row
+        if ec:
+            return self._db.execute("SELECT * FROM substances WHERE ec=? ORDER BY cas IS NULL LIMIT 1", (ec,)).fetchone()
+        return None
+
+    def lookup(self, value) -> Optional[dict]:
+        """Anyag CAS vagy EC szám alapján (a mezőből kiszűrve); None, ha nincs az indexben."""
+        with self._lock:
+            row = self._find(normalize_cas(value), normalize_ec(value))
+        return dict(row) if row else None
+
+    def add_record(self, sds: dict) -> int:
+        """Egy sikeresen kinyert SDS összetevőinek felvétele; a felvett anyagok száma.
+        Eltérő osztályozásnál a súlyosabb (több H kódot tartalmazó) marad meg – óvatos irányba tévedünk."""
+        if str(sds.get("_status", "✅")).startswith("❌"):
+            return 0
+        comps = [(c, normalize_cas(sds.get(c[1])), normalize_ec(sds.get(c[2])) if c[2] else None) for c in COMPONENTS]
+        comps = [c for c in comps if c[1] or c[2]]
+        single = len(comps) == 1
+        product = _product_key(sds)
+        now = time.time()
+        with self._lock:
+            # Keresés + beszúrás egy írási tranzakcióban, hogy párhuzamos folyamatok ne vegyék fel kétszer ugyanazt
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for (name_f, _, _, conc_f, clp_f), cas, ec in comps:
+                    clp = str(sds.get(clp_f) or "").strip()
+                    h_codes, cmr, severity = classify(clp)
+                    oel = {f: str(sds.get(f) or "").strip() if single else "" for f in OEL_FIELDS}
+                    row = self._find(cas, ec)
+                    if row is None:
+                        key = cas or f"EC:{ec}"
+                        self._db.execute("INSERT INTO substances VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                                         (key, cas, ec, str(sds.get(name_f) or "").strip(), clp, h_codes, cmr, severity,
+                                          *[oel[f] for f in OEL_FIELDS], now))
+                    else:
+                        key = row["key"]
+                        better = (severity, len(h_codes.split())) > (row["severity"], len(row["h_codes"].split()))
+                        self._db.execute(
+                            "UPDATE substances SET cas=COALESCE(cas, ?), ec=COALESCE(ec, ?), name=?, clp=?, h_codes=?, cmr=?, "
+                            "severity=?, ak_value=?, ck_value=?, mk_value=?, boelv=?, updated=? WHERE key=?",
+                            (cas, ec, row["name"] or str(sds.get(name_f) or "").strip(),
+                             clp if better else row["clp"], h_codes if better else row["h_codes"],
+                             cmr if better else row["cmr"], severity if better else row["severity"],
+                             *[row[f] or oel[f] for f in OEL_FIELDS], now, key))
+                    self._db.execute("INSERT OR REPLACE INTO occurrences VALUES (?,?,?,?,?,?,?,?,?)",
+                                     (key, product, str(sds.get("product_name") or ""), str(sds.get("manufacturer") or ""),
+                                      str(sds.get("_source_file") or ""), str(sds.get(conc_f) or ""),
+                                      str(sds.get("sds_version") or ""), str(sds.get("sds_date") or ""), now))
+                self._db.commit()
+            except Exception:
+                self._db.rollback()
+                raise
+        return len(comps)
+
+    def add_records(self, records: List[dict]) -> int:
+        return sum(self.add_record(sds) for sds in records)
+
+    def enrich(self, sds: dict) -> dict:
+        """Az SDS-ből hiányzó összetevő-adatok (CLP, EC, egykomponensű terméknél határértékek) pótlása az indexből, helyben.
+        Meglévő értéket nem ír felül; a pótolt mezők listája: sds['_from_index']."""
+        filled, rows = [], []
+        with self._lock:
+            for name_f, cas_f, ec_f, _, clp_f in COMPONENTS:
+                row = self._find(normalize_cas(sds.get(cas_f)), normalize_ec(sds.get(ec_f)) if ec_f else None)
+                if row is None:
+                    continue
+                rows.append(row)
+                for field, value in ((clp_f, row["clp"]), (ec_f, row["ec"]), (name_f, row["name"])):
+                    if field and value and not str(sds.get(field) or "").strip():
+                        sds[field] = value; filled.append(field)
+        if len(rows) == 1 and sum(1 for c in COMPONENTS if str(sds.get(c[1]) or "").strip()) == 1:
+            for field in OEL_FIELDS:
+                if rows[0][field] and not str(sds.get(field) or "").strip():
+                    sds[field] = rows[0][field]; filled.append(field)
+        if filled:
+            sds["_from_index"] = filled
+        return sds
+
+    def products_with(self, value) -> List[dict]:
+        """Minden termék, amely az adott CAS/EC számú anyagot tartalmazza (legutóbb frissített elöl)."""
+        with self._lock:
+            row = self._find(normalize_cas(value), normalize_ec(value))
+            if row is None:
+                return []
+            rows = self._db.execute("SELECT product_name, manufacturer, source_file, conc, sds_version, sds_date "
+                                    "FROM occurrences WHERE key=? ORDER BY updated DESC", (row["key"],)).fetchall()
+        return [dict(r) for r in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            n = self._db.execute("SELECT COUNT(*) FROM substances").fetchone()[0]
+            cmr = self._db.execute("SELECT COUNT(*) FROM substances WHERE cmr != ''").fetchone()[0]
+            products = self._db.execute("SELECT COUNT(DISTINCT product) FROM occurrences").fetchone()[0]
+        return {"substances": n, "cmr": cmr, "products": products}
+
+    def clear(self):
+        with self._lock:
+            self._db.executescript("DELETE FROM occurrences; DELETE FROM substances;")
+            self._db.commit()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Használat: python sds_substances.py <CAS vagy EC szám>", file=sys.stderr)
+        sys.exit(2)
+    index = SubstanceIndex()
+    sub = index.lookup(sys.argv[1])
+    if sub is None:
+        print(f"Nincs az indexben: {sys.argv[1]}")
+        sys.exit(1)
+    print(f"{sub['name']} (CAS {sub['cas'] or '—'}, EC {sub['ec'] or '—'}) | {sub['clp'] or '—'}"
+          + (f" | CMR: {sub['cmr']}" if sub['cmr'] else "") + (f" | ÁK: {sub['ak_value']}" if sub['ak_value'] else ""))
+    for p in index.products_with(sys.argv[1]):
+        print(f"  {p['product_name']} – {p['manufacturer'] or '?'} ({p['conc'] or '?'}) {p['source_file']}")
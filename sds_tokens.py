@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+SDS Token Keretezés
+===================
+Tokenszámlálás (tiktoken, ha elérhető – különben ~4 karakter/token becslés), szakasz-alapú bemenet-válogatás
+a kinyeréshez és tömör mezőkészlet a kockázatértékeléshez. Fele annyi token / SDS = fele késleltetés és költség.
+"""
+
+import json
+import threading
+from typing import Dict, Optional
+from sds_pdf import trim_sections
+
+# Kinyeréshez: elsődleges szakaszok teljes súllyal (0 = az 1. szakasz előtti fejléc, benne a terméknév)
+EXTRACT_SECTIONS = (0, 1, 2, 3, 8, 9, 11)
+# A séma néhány mezője csak ezekben van (oltóanyag, bomlástermékek, PBT, hulladék/EWC, szállítás) – rövid kivonat
+EXTRACT_SECTIONS_BRIEF = (5, 10, 12, 13, 14)
+BRIEF_SECTION_CHARS = 1500
+EXTRACT_TOKEN_BUDGET = 6000
+
+# Kockázatértékeléshez elég mezők (a teljes 84 mezős rekord helyett)
+RISK_FIELDS = ["product_name", "product_category", "intended_use", "physical_state", "substance_or_mixture",
+               "comp1_name", "comp1_cas", "comp1_conc", "comp1_clp", "comp2_name", "comp2_cas", "comp2_conc", "comp2_clp",
+               "comp3_name", "comp3_cas", "comp3_conc", "comp3_clp", "clp_classification", "ghs_pictograms",
+               "signal_word", "h_statements", "euh_statements", "flash_point", "boiling_point", "vapor_pressure",
+               "ak_value", "ck_value", "mk_value", "boelv", "respiratory_protection", "hand_protection",
+               "eye_protection", "skin_protection", "engineering_controls", "sensitization", "cmr_effects",
+               "exposure_routes"]
+
+# USD / 1M token (bemenet, kimenet)
+PRICES_PER_1M = {"gpt-4o": (2.50, 10.00)}
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+# ============================================================
+# 1. TOKENSZÁMLÁLÁS
+# ============================================================
+
+def _get_encoder():
+    """tiktoken kódoló egyszer betöltve; ha nincs telepítve vagy offline nem tölthető le, False"""
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            try:
+                import tiktoken
+                try:
+                    _encoder = tiktoken.encoding_for_model("gpt-4o")
+                except KeyError:
+                    _encoder = tiktoken.get_encoding("o200k_base")
+            except Exception:
+                _encoder = False
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    enc = _get_encoder()
+    if enc:
+        return len(enc.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def estimate_cost(prompt_tokens: int, completion_tokens: int, model: str = "gpt-4o") -> float:
+    price_in, price_out = PRICES_PER_1M.get(model, PRICES_PER_1M["gpt-4o"])
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+
+# ============================================================
+# 2. BEMENET VÁLOGATÁS
+# ============================================================
+
+def select_extract_text(pdf, token_budget: int = EXTRACT_TOKEN_BUDGET) -> str:
+    """PDFText → kinyeréshez küldött szöveg a token kereten belül: elsődleges szakaszok + rövid kivonatok.
+    Ha nincs felismert szakasz, vagy egyik sem kell a kinyeréshez, a teljes szöveg globálisan rövidítve."""
+    picked: Dict[int, str] = {k: v for k, v in pdf.sections.items() if k in EXTRACT_SECTIONS}
+    picked.update({k: v[:BRIEF_SECTION_CHARS] for k, v in pdf.sections.items() if k in EXTRACT_SECTIONS_BRIEF})
+    if picked:
+        text = "".join(picked[k] for k in sorted(picked))
+    else:
+        picked, text = None, pdf.text
+    tokens = count_tokens(text)
+    # karakter/token arány a tényleges szövegen mérve, majd egy korrekciós kör, ha még mindig túl hosszú
+    for _ in range(2):
+        if tokens <= token_budget:
+            return text
+        char_budget = int(len(text) * token_budget / tokens * 0.97)
+        text = trim_sections(picked, char_budget) if picked else text[:char_budget] + "\n[...]"
+        tokens = count_tokens(text)
+    return text
+
+
+def compact_risk_input(sds: dict) -> str:
+    """A kockázatértékeléshez szükséges, nem üres mezők tömör JSON-ként (behúzás és szóközök nélkül)"""
+    return json.dumps({k: sds[k] for k in RISK_FIELDS if sds.get(k)}, ensure_ascii=False, separators=(",", ":"))
+
+
+def usage_tokens(r: Optional[dict]) -> tuple:
+    """call_gpt eredményből (prompt, completion) tokenszám"""
+    r = r or {}
+    return r.get("_prompt_tokens", 0), r.get("_completion_tokens", 0)
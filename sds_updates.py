@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+SDS Frissítések Letöltése és Újrafeldolgozása
+==============================================
+A verzió-ellenőrző által talált újabb SDS-ek (download_url) letöltése párhuzamosan, közös HTTP kapcsolatkészlettel
+(méret- és időkorláttal), PDF ellenőrzéssel (%PDF- fejléc) és tartalom-hash szerinti duplikátumszűréssel.
+Az új PDF-ek ugyanazon a feldolgozási láncon mennek végig, mint a feltöltöttek; az eredmény rekordonként
+a régi és az új kinyert adatok különbsége, a nyilvántartásba átvéve a régi sor helyére kerül.
+"""
+
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, unquote
+from sds_cache import content_hash
+from sds_registry import DB_KEYS
+
+MAX_BYTES = int(float(os.environ.get("SDS_DOWNLOAD_MAX_MB", 25)) * 1024 * 1024)
+TIMEOUT = (5, 30)  # kapcsolódás, olvasás (mp)
+USER_AGENT = "SDS-AI/3.1 (SDS version checker)"
+# A PDF fejléc a specifikáció szerint az első 1024 bájton belül bárhol kezdődhet
+PDF_MAGIC = b"%PDF-"
+# Összevetett mezők: az adatbázis munkalap oszlopai (a vállalat által kitöltöttek nélkül)
+DIFF_FIELDS = [k for k in DB_KEYS if k and not k.startswith("_")]
+
+
+class DownloadError(Exception):
+    """Sikertelen vagy elutasított letöltés (hálózati hiba, HTTP státusz, méretkorlát, nem PDF)"""
+
+
+@dataclass
+class UpdateItem:
+    """Egy frissítendő nyilvántartási sor letöltése és újrafeldolgozása"""
+    row: int                      # index a nyilvántartás rekordlistájában
+    product_name: str
+    url: str
+    status: str = "⏳ Függőben"
+    content_hash: Optional[str] = None
+    size: int = 0
+    seconds: float = 0.0
+    duplicate_of: Optional[int] = None   # az azonos tartalmú PDF első sora
+    sds: Dict = field(default_factory=dict)
+    risk: Dict = field(default_factory=dict)
+    changes: List[dict] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.status.startswith("✅")
+
+
+# ============================================================
+# 1. LETÖLTÉS
+# ============================================================
+
+def make_session(pool_size: int = 8, retries: int = 2):
+    """requests.Session közös kapcsolatkészlettel; 429/5xx és kapcsolódási hiba esetén visszalépéses újrapróbálás"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter); session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def is_pdf(data: bytes) -> bool:
+    return PDF_MAGIC in data[:1024]
+
+
+def fetch_pdf(session, url: str, max_bytes: int = MAX_BYTES, timeout=TIMEOUT) -> bytes:
+    """Egy PDF letöltése folyamatosan olvasva: a méretkorlát a Content-Length és a tényleges bájtok alapján is él"""
+    import requests
+    if urlparse(url).scheme not in ("http", "https"):
+        raise DownloadError(f"Nem támogatott URL: {url}")
+    try:
+        with session.get(url, stream=True, timeout=timeout) as resp:
+            if resp.status_code != 200:
+                raise DownloadError(f"HTTP {resp.status_code}")
+            if int(resp.headers.get("Content-Length") or 0) > max_bytes:
+                raise DownloadError(f"Túl nagy ({int(resp.headers['Content-Length']) // 1024 // 1024} MB)")
+            chunks, size = [], 0
+            for chunk in resp.iter_content(64 * 1024):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise DownloadError(f"Túl nagy (> {max_bytes // 1024 // 1024} MB)")
+                chunks.append(chunk)
+    except requests.RequestException as e:
+        raise DownloadError(f"Letöltési hiba: {e.__class__.__name__}") from e
+    data = b"".join(chunks)
+    if not is_pdf(data):
+        raise DownloadError("Nem PDF (pl. HTML bejelentkezési oldal)")
+    return data
+
+
+def _file_name(item: UpdateItem) -> str:
+    name = unquote(os.path.basename(urlparse(item.url).path))
+    if not name.lower().endswith(".pdf"):
+        name = re.sub(r"[^\w.-]+", "_", item.product_name).strip("_")[:60] + ".pdf"
+    return name
+
+
+def download_updates(version_results: list, max_workers: int = 8, session=None, max_bytes: int = MAX_BYTES,
+                     timeout=TIMEOUT, rows=None) -> Tuple[List[UpdateItem], Dict[str, object]]:
+    """Az újabb verziójú (online_version_found, download_url) SDS-ek letöltése (rows: csak ezek a sorok).
+    Ugyanaz az URL egyszer töltődik le; az azonos tartalmú PDF-ek (hash) közül csak az első kerül feldolgozásra.
+    Visszaad: (tételek a sorrendben, hash → PDFFile)."""
+    from sds_pipeline import PDFFile
+    items = [UpdateItem(i, r.product_name, r.download_url) for i, r in enumerate(version_results)
+             if r.online_version_found and r.download_url and (rows is None or i in rows)]
+    session = session or make_session(max_workers)
+
+    def get(url):
+        t0 = time.perf_counter()
+        try:
+            return fetch_pdf(session, url, max_bytes, timeout), None, time.perf_counter() - t0
+        except DownloadError as e:
+            return None, str(e), time.perf_counter() - t0
+
+    urls = list(dict.fromkeys(item.url for item in items))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        fetched = dict(zip(urls, pool.map(get, urls)))
+    files, first = {}, {}
+    for item in items:
+        data, error, item.seconds = fetched[item.url]
+        if error:
+            item.status = f"❌ {error}"
+            continue
+        item.content_hash, item.size = content_hash(data), len(data)
+        if item.content_hash in first:
+            item.duplicate_of = first[item.content_hash]
+        else:
+            first[item.content_hash] = item.row
+            files[item.content_hash] = PDFFile(_file_name(item), data)
+        item.status = "📥 Letöltve"
+    return items, files
+
+
+# ============================================================
+# 2. ÚJRAFELDOLGOZÁS ÉS KÜLÖNBSÉG
+# ============================================================
+
+def _norm(value) -> str:
+    return re.sub(r"\s+", " ", str(value or "")).strip().casefold()
+
+
+def diff_records(old: dict, new: dict, fields: List[str] = DIFF_FIELDS) -> List[dict]:
+    """A régi és az új kinyert rekord eltérő mezői (szóköz- és kisbetű-érzéketlen összevetés)"""
+    return [{"field": f, "old": old.get(f, ""), "new": new.get(f, "")} for f in fields
+            if _norm(old.get(f)) != _norm(new.get(f))]
+
+
+def process_updates(items: List[UpdateItem], files: Dict[str, object], records: List[dict], api_key: str,
+                    lang: str = "hu", max_workers: int = 4, cache=None, substances=None, on_done: Optional[Callable] = None):
+    """A letöltött egyedi PDF-ek feldolgozása (process_batch), majd tételenként az eredmény és a diff.
+    Ha a kinyert verzió és dátum megegyezik a nyilvántartásbelivel, a tétel "nem újabb" – nem kerül átvételre."""
+    from sds_pipeline import process_batch
+    hashes = list(files)
+    pairs = dict(zip(hashes, process_batch([files[h] for h in hashes], api_key, lang, max_workers, on_done, cache,
+                                           substances=substances)))
+    for item in items:
+        if item.content_hash not in pairs:
+            continue
+        sds, risk = pairs[item.content_hash]
+        item.sds, item.risk = dict(sds), dict(risk or {})
+        old = records[item.row]
+        if item.sds.get("_status", "").startswith("❌"):
+            item.status = item.sds["_status"]
+            continue
+        item.changes = diff_records(old, item.sds)
+        same = {c["field"] for c in item.changes}.isdisjoint({"sds_version", "sds_date", "sds_revision_date"})
+        item.status = "= Nem újabb verzió" if same else "✅ Új verzió" + (" (duplikátum)" if item.duplicate_of is not None else "")
+    return items
+
+
+def apply_updates(records: List[dict], risks: List[dict], items: List[UpdateItem]) -> Tuple[List[dict], List[dict], int]:
+    """Az új verziók átvétele: a nyilvántartás érintett sora helyben cserélődik (a sorrend és a többi sor marad)"""
+    records, risks = list(records), list(risks) + [{}] * (len(records) - len(risks))
+    n = 0
+    for item in items:
+        if item.ok:
+            records[item.row] = dict(item.sds); risks[item.row] = dict(item.risk)
+            n += 1
+    return records, risks, n
+
+
+def update_outdated(version_results: list, records: List[dict], api_key: str, lang: str = "hu", max_workers: int = 4,
+                    cache=None, substances=None, on_done: Optional[Callable] = None, rows=None) -> List[UpdateItem]:
+    """Letöltés + újrafeldolgozás + diff egy lépésben (ütemező, felület)"""
+    items, files = download_updates(version_results, max_workers=max(4, max_workers), rows=rows)
+    return process_updates(items, files, records, api_key, lang, max_workers, cache, substances, on_done)
+
+
+def update_summary(items: List[UpdateItem]) -> Dict[str, int]:
+    return {"downloaded": sum(1 for i in items if i.content_hash), "new": sum(1 for i in items if i.ok),
+            "same": sum(1 for i in items if i.status.startswith("=")),
+            "duplicates": sum(1 for i in items if i.duplicate_of is not None),
+            "failed": sum(1 for i in items if i.status.startswith("❌"))}
@@ -12,229 +12,37 @@ Az adatbázis felépítése UTÁN automatikusan:
 Telepítés:
     pip install streamlit openai requests beautifulsoup4 openpyxl
 
-Ez a modul a sds_processor_v2.py kiegészítése.
+Ez a modul a sds_processor_v2.py kiegészítése; a keresés és az állapot meghatározása (UI nélkül, az ütemező is
+ezt használja) a sds_version_lookup.py-ban van.
 """
 
 import streamlit as st
-import json
-import time
-import re
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict
-from dataclasses import dataclass
-from openai import OpenAI
+from datetime import datetime
+from typing import Optional, List
+from sds_version_lookup import SDSVersionInfo
 
 
 # ============================================================
-# 1. ADATMODELL
+# 1. STREAMLIT UI – VERZIÓ-ELLENŐRZŐ DASHBOARD
 # ============================================================
 
-@dataclass
-class SDSVersionInfo:
-    """Egy SDS verzió-ellenőrzés eredménye"""
-    ssz: int
-    product_name: str
-    manufacturer: str
-    current_version: str
-    current_date: str
-    current_date_parsed: Optional[datetime]
-
-    # Online keresés eredménye
-    online_version_found: bool = False
-    online_version: Optional[str] = None
-    online_date: Optional[str] = None
-    online_date_parsed: Optional[datetime] = None
-    online_source_url: Optional[str] = None
-    online_source_name: Optional[str] = None
-    download_url: Optional[str] = None
-
-    # Státusz
-    is_outdated: bool = False
-    days_difference: Optional[int] = None
-    age_years: Optional[float] = None
-    status: str = "Nem ellenőrzött"  # OK / Frissítés elérhető / Elavult (>5 év) / Nem található
-    status_icon: str = "⬜"
-
-    # Keresési jegyzet
-    search_notes: Optional[str] = None
+def _run_updates(results: List[SDSVersionInfo], records: list, api_key: str, lang: str, rows=None):
+    """Letöltés + újrafeldolgozás; az eredmény a munkamenetben (sds_updates: sor → UpdateItem)"""
+    from sds_updates import update_outdated, update_summary
+    with st.spinner("📥 Letöltés és feldolgozás..."):
+        items = update_outdated(results, records, api_key, lang, rows=rows)
+    st.session_state.setdefault("sds_updates", {}).update({item.row: item for item in items})
+    summary = update_summary(items)
+    st.success(f"📥 {summary['downloaded']}/{len(items)} letöltve • ✅ {summary['new']} új verzió • "
+               f"= {summary['same']} nem újabb • ♻️ {summary['duplicates']} duplikátum • ❌ {summary['failed']} hiba")
 
 
-# ============================================================
-# 2. VERZIÓ-ELLENŐRZŐ LOGIKA
-# ============================================================
-
-def check_sds_version_online(product_name: str, manufacturer: str,
-                              current_version: str, current_date: str,
-                              cas_numbers: List[str],
-                              client: OpenAI) -> dict:
-    """
-    Online keresés egy SDS legújabb verziójáért.
-    GPT-4o web_search tool-t használ a kereséshez.
-    """
-
-    search_query = f"""Keress rá a következő termék biztonsági adatlapjára (SDS/MSDS):
-
-Termék neve: {product_name}
-Gyártó: {manufacturer}
-CAS számok: {', '.join(cas_numbers) if cas_numbers else 'nem ismert'}
-Jelenlegi SDS verzió: {current_version}
-Jelenlegi SDS dátum: {current_date}
-
-FELADAT:
-1. Keresd meg a gyártó ({manufacturer}) hivatalos weboldalán az SDS letöltési oldalát
-2. Keresd meg a terméket az alábbi SDS adatbázisokon is:
-   - msds.com / msds-europe.com
-   - Google: "{product_name} {manufacturer} safety data sheet PDF"
-   - ECHA regisztrációs adatbázis (ha releváns)
-3. Állapítsd meg, hogy a jelenlegi verzió ({current_version}, dátum: {current_date}) a legfrissebb-e
-4. Ha újabb verzió érhető el, add meg:
-   - Az új verzió számát és dátumát
-   - A letöltési URL-t (direkt PDF link ha lehetséges)
-   - A forrás nevét
-
-VÁLASZOLJ az alábbi JSON formátumban:
-{{
-    "newer_version_found": true/false,
-    "latest_version": "verzió szám vagy null",
-    "latest_date": "YYYY-MM-DD vagy szöveges dátum",
-    "download_url": "URL vagy null",
-    "source_name": "forrás neve",
-    "source_url": "forrás weboldal URL",
-    "notes": "megjegyzések magyarul"
-}}
-"""
-
-    response = client.responses.create(
-        model="gpt-4o",
-        tools=[{
-            "type": "web_search",
-            "user_location": {
-                "type": "approximate",
-                "country": "HU",
-                "city": "Budapest",
-            }
-        }],
-        input=[
-            {"role": "system", "content": """Te egy veszélyes anyag nyilvántartási szakértő vagy.
-A feladatod, hogy megkeresd egy adott termék legfrissebb biztonsági adatlapját (SDS/MSDS) az interneten.
-Légy alapos: ellenőrizd a gyártó weboldalát, a nagy SDS adatbázisokat, és a Google-t is.
-MINDIG adj vissza érvényes JSON-t a kért formátumban."""},
-            {"role": "user", "content": search_query}
-        ],
-    )
-
-    # Válasz feldolgozása
-    result_text = response.output_text
-
-    # JSON kinyerése a válaszból
-    try:
-        json_match = re.search(r'\{[^{}]*"newer_version_found"[^{}]*\}', result_text, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
-    except:
-        pass
-
-    return {
-        "newer_version_found": False,
-        "notes": result_text[:300],
-        "source_name": "Keresés sikertelen",
-    }
-
-
-def check_all_sds_versions(sds_database: list, client: OpenAI,
-                            progress_callback=None) -> List[SDSVersionInfo]:
-    """Az összes SDS verzió-ellenőrzése batch módban"""
-
-    results = []
-
-    for i, sds in enumerate(sds_database):
-        # Dátum feldolgozása
-        current_date_str = sds.get('sds_date', '') or sds.get('sds_revision_date', '')
-        current_date_parsed = None
-        age_years = None
-
-        if current_date_str:
-            for fmt in ['%Y-%m-%d', '%Y.%m.%d', '%d.%m.%Y', '%d/%m/%Y', '%m/%d/%Y']:
-                try:
-                    current_date_parsed = datetime.strptime(current_date_str.strip(), fmt)
-                    age_years = (datetime.now() - current_date_parsed).days / 365.25
-                    break
-                except:
-                    continue
-
-        # CAS számok összegyűjtése
-        cas_numbers = []
-        for comp_key in ['component_1', 'component_2', 'component_3']:
-            comp = sds.get(comp_key, {})
-            if isinstance(comp, dict) and comp.get('cas_number'):
-                cas_numbers.append(comp['cas_number'])
-
-        # Verzió-ellenőrzés
-        version_info = SDSVersionInfo(
-            ssz=sds.get('ssz', i+1),
-            product_name=sds.get('product_name', 'Ismeretlen'),
-            manufacturer=sds.get('manufacturer', 'Ismeretlen'),
-            current_version=sds.get('sds_version', '?'),
-            current_date=current_date_str,
-            current_date_parsed=current_date_parsed,
-            age_years=age_years,
-        )
-
-        # Online keresés
-        try:
-            online_result = check_sds_version_online(
-                product_name=version_info.product_name,
-                manufacturer=version_info.manufacturer,
-                current_version=version_info.current_version,
-                current_date=version_info.current_date,
-                cas_numbers=cas_numbers,
-                client=client,
-            )
-
-            version_info.online_version_found = online_result.get('newer_version_found', False)
-            version_info.online_version = online_result.get('latest_version')
-            version_info.online_date = online_result.get('latest_date')
-            version_info.download_url = online_result.get('download_url')
-            version_info.online_source_url = online_result.get('source_url')
-            version_info.online_source_name = online_result.get('source_name')
-            version_info.search_notes = online_result.get('notes')
-
-            # Státusz meghatározása
-            if version_info.online_version_found:
-                version_info.status = "🔄 Frissítés elérhető"
-                version_info.status_icon = "🔄"
-                version_info.is_outdated = True
-            elif age_years and age_years > 5:
-                version_info.status = "⚠️ Elavult (>5 év)"
-                version_info.status_icon = "⚠️"
-                version_info.is_outdated = True
-            elif age_years and age_years > 3:
-                version_info.status = "🟡 Ellenőrzés javasolt"
-                version_info.status_icon = "🟡"
-            else:
-                version_info.status = "✅ Aktuális"
-                version_info.status_icon = "✅"
-
-        except Exception as e:
-            version_info.status = "❌ Keresés sikertelen"
-            version_info.search_notes = str(e)
-
-        results.append(version_info)
-
-        if progress_callback:
-            progress_callback(i + 1, len(sds_database), version_info.product_name)
-
-        time.sleep(2)  # Rate limit
-
-    return results
-
-
-# ============================================================
-# 3. STREAMLIT UI – VERZIÓ-ELLENŐRZŐ DASHBOARD
-# ============================================================
-
-def render_version_dashboard(results: List[SDSVersionInfo]):
-    """Verzió-ellenőrzési eredmények megjelenítése"""
+def render_version_dashboard(results: List[SDSVersionInfo], records: Optional[list] = None, risks: Optional[list] = None,
+                             api_key: Optional[str] = None, lang: str = "hu"):
+    """Verzió-ellenőrzési eredmények megjelenítése.
+    records / risks: az ellenőrzött nyilvántartás (a results sorrendjében) – megadásukkor (API kulccsal) az új verziók
+    letölthetők, újrafeldolgozhatók és a régi sor helyére átvehetők."""
+    can_update = bool(api_key) and records is not None
 
     st.header("📋 SDS Verzió-ellenőrzés Eredményei")
 
@@ -259,6 +67,11 @@ def render_version_dashboard(results: List[SDSVersionInfo]):
     if updates_available:
         st.subheader("🔄 Frissítések letöltése")
         st.warning(f"**{len(updates_available)} termékhez újabb SDS verzió érhető el az interneten!**")
+        if can_update and st.button(f"📥 Összes frissítés letöltése és feldolgozása "
+                                    f"({sum(1 for r in updates_available if r.download_url)})", type="primary"):
+            _run_updates(results, records, api_key, lang)
+        updates = st.session_state.get("sds_updates", {})
+        row_of = {id(r): i for i, r in enumerate(results)}
 
         for r in updates_available:
             with st.expander(f"{r.status_icon} {r.product_name} ({r.manufacturer})", expanded=True):
@@ -283,18 +96,43 @@ def render_version_dashboard(results: List[SDSVersionInfo]):
                     col_dl1, col_dl2 = st.columns(2)
                     with col_dl1:
                         if st.button(f"📥 Letöltés és feldolgozás", key=f"dl_{r.ssz}"):
-                            st.info("Letöltés és újrafeldolgozás folyamatban...")
+                            if can_update:
+                                _run_updates(results, records, api_key, lang, rows={row_of[id(r)]})
+                                updates = st.session_state.get("sds_updates", {})
+                            else:
+                                st.info("Az újrafeldolgozáshoz API kulcs és a betöltött nyilvántartás szükséges.")
                     with col_dl2:
                         if st.button(f"🔗 Megnyitás böngészőben", key=f"open_{r.ssz}"):
                             st.markdown(f'<meta http-equiv="refresh" content="0;url={r.download_url}">',
                                        unsafe_allow_html=True)
 
+                item = updates.get(row_of[id(r)])
+                if item:
+                    st.markdown(f"**{item.status}**" + (f" – {item.size // 1024} kB, {item.seconds:.1f} s" if item.size else ""))
+                    if item.changes:
+                        st.dataframe([{"Mező": c["field"], "Régi": c["old"], "Új": c["new"]} for c in item.changes],
+                                     use_container_width=True, hide_index=True)
+
                 if r.online_source_url:
                     st.caption(f"Forrás: [{r.online_source_name}]({r.online_source_url})")
 
                 if r.search_notes:
                     st.caption(f"Megjegyzés: {r.search_notes[:200]}")
 
+        accepted = [item for item in updates.values() if item.ok]
+        if can_update and accepted and st.button(f"✅ {len(accepted)} új verzió átvétele a nyilvántartásba"):
+            from sds_updates import apply_updates
+            from sds_records import compact_records, compact_risks
+            new_r, new_k, n = apply_updates(records, risks or [], accepted)
+            if st.session_state.get("results") is records:
+                st.session_state.results, st.session_state.risk_results = compact_records(new_r), compact_risks(new_k)
+            else:
+                records[:] = new_r
+                if risks is not None: risks[:] = new_k
+            for item in accepted:
+                del st.session_state.sds_updates[item.row]
+            st.success(f"✅ {n} sor frissítve – az Excel a következő letöltéskor már az új verziókkal készül.")
+
     st.divider()
 
     # ---- TELJES LISTA ----
@@ -333,21 +171,37 @@ def render_version_dashboard(results: List[SDSVersionInfo]):
     st.divider()
     st.subheader("⏰ Ütemezett ellenőrzés beállítása")
 
+    from sds_version_scheduler import VersionStore, FREQUENCY_DAYS
+    store = VersionStore()
+    saved = store.load_settings()
+    frequencies = list(FREQUENCY_DAYS)
+
     col_sched1, col_sched2 = st.columns(2)
     with col_sched1:
-        check_frequency = st.selectbox("Ellenőrzés gyakorisága", 
-            ["Hetente", "Havonta", "Negyedévente", "Félévente"])
-        auto_download = st.checkbox("Automatikus letöltés (ha elérhető)", value=False)
+        check_frequency = st.selectbox("Ellenőrzés gyakorisága", frequencies,
+            index=frequencies.index(saved["check_frequency"]))
+        auto_download = st.checkbox("Automatikus letöltés (ha elérhető)", value=saved["auto_download"])
+        registry_path = st.text_input("Nyilvántartás fájl (SDS_Database_*.xlsx) az ütemezett futáshoz",
+            value=saved["registry_path"], placeholder="/srv/sds/SDS_Database.xlsx")
     with col_sched2:
-        email_notify = st.text_input("E-mail értesítés címe", placeholder="safety@company.hu")
-        notify_threshold = st.slider("Figyelmeztetés ennyi év után", 1, 10, 3)
+        email_notify = st.text_input("E-mail értesítés címe", value=saved["email_notify"],
+            placeholder="safety@company.hu")
+        notify_threshold = st.slider("Figyelmeztetés ennyi év után", 1, 10, saved["notify_threshold"])
 
     if st.button("💾 Beállítások mentése"):
-        st.success("Ütemezett ellenőrzés beállítva!")
+        store.save_settings(check_frequency=check_frequency, auto_download=auto_download,
+                            email_notify=email_notify.strip(), notify_threshold=notify_threshold,
+                            registry_path=registry_path.strip())
+        st.success(f"Ütemezett ellenőrzés beállítva! Egy keresési eredmény {FREQUENCY_DAYS[check_frequency]} "
+                   f"napig érvényes, a futtatás cron-ból: `python sds_version_scheduler.py run`")
+    last = store.last_run()
+    if last:
+        st.caption(f"Utolsó ütemezett futás: {datetime.fromtimestamp(last['finished']):%Y-%m-%d %H:%M} – "
+                   f"{last['queried']} online keresés, {last['reused']} tárolt eredmény újrahasznosítva")
 
 
 # ============================================================
-# 4. INTEGRÁCIÓ A FŐ ALKALMAZÁSSAL
+# 2. INTEGRÁCIÓ A FŐ ALKALMAZÁSSAL
 # ============================================================
 
 def add_version_check_tab():
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+SDS Verzió-keresés
+==================
+Az SDS verzió-ellenőrzés UI nélküli része: rekordonkénti adatmodell, csoportosítás (termék / gyártó / CAS),
+párhuzamos online keresés (GPT-4o web_search) és az állapot meghatározása. A Streamlit dashboard
+(sds_version_checker.py) és a cron-ból futó ütemező (sds_version_scheduler.py) is ezt használja –
+streamlit / openai importja nincs, a kliens paraméterként érkezik.
+"""
+
+import json
+import re
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional, List, Dict
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sds_rate_limit import get_limiter, call_with_retry, estimate_tokens
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+# ============================================================
+# 1. ADATMODELL
+# ============================================================
+
+@dataclass
+class SDSVersionInfo:
+    """Egy SDS verzió-ellenőrzés eredménye"""
+    ssz: int
+    product_name: str
+    manufacturer: str
+    current_version: str
+    current_date: str
+    current_date_parsed: Optional[datetime]
+
+    # Online keresés eredménye
+    online_version_found: bool = False
+    online_version: Optional[str] = None
+    online_date: Optional[str] = None
+    online_date_parsed: Optional[datetime] = None
+    online_source_url: Optional[str] = None
+    online_source_name: Optional[str] = None
+    download_url: Optional[str] = None
+
+    # Státusz
+    is_outdated: bool = False
+    days_difference: Optional[int] = None
+    age_years: Optional[float] = None
+    status: str = "Nem ellenőrzött"  # OK / Frissítés elérhető / Elavult (>5 év) / Nem található
+    status_icon: str = "⬜"
+
+    # Keresési jegyzet
+    search_notes: Optional[str] = None
+
+
+# ============================================================
+# 2. VERZIÓ-ELLENŐRZŐ LOGIKA
+# ============================================================
+
+def check_sds_version_online(product_name: str, manufacturer: str,
+                              current_version: str, current_date: str,
+                              cas_numbers: List[str],
+                              client: "OpenAI") -> dict:
+    """
+    Online keresés egy SDS legújabb verziójáért.
+    GPT-4o web_search tool-t használ a kereséshez.
+    """
+
+    search_query = f"""Keress rá a következő termék biztonsági adatlapjára (SDS/MSDS):
+
+Termék neve: {product_name}
+Gyártó: {manufacturer}
+CAS számok: {', '.join(cas_numbers) if cas_numbers else 'nem ismert'}
+Jelenlegi SDS verzió: {current_version}
+Jelenlegi SDS dátum: {current_date}
+
+FELADAT:
+1. Keresd meg a gyártó ({manufacturer}) hivatalos weboldalán az SDS letöltési oldalát
+2. Keresd meg a terméket az alábbi SDS adatbázisokon is:
+   - msds.com / msds-europe.com
+   - Google: "{product_name} {manufacturer} safety data sheet PDF"
+   - ECHA regisztrációs adatbázis (ha releváns)
+3. Állapítsd meg, hogy a jelenlegi verzió ({current_version}, dátum: {current_date}) a legfrissebb-e
+4. Ha újabb verzió érhető el, add meg:
+   - Az új verzió számát és dátumát
+   - A letöltési URL-t (direkt PDF link ha lehetséges)
+   - A forrás nevét
+
+VÁLASZOLJ az alábbi JSON formátumban:
+{{
+    "newer_version_found": true/false,
+    "latest_version": "verzió szám vagy null",
+    "latest_date": "YYYY-MM-DD vagy szöveges dátum",
+    "download_url": "URL vagy null",
+    "source_name": "forrás neve",
+    "source_url": "forrás weboldal URL",
+    "notes": "megjegyzések magyarul"
+}}
+"""
+
+    response = call_with_retry(lambda: client.responses.create(
+        model="gpt-4o",
+        tools=[{
+            "type": "web_search",
+            "user_location": {
+                "type": "approximate",
+                "country": "HU",
+                "city": "Budapest",
+            }
+        }],
+        input=[
+            {"role": "system", "content": """Te egy veszélyes anyag nyilvántartási szakértő vagy.
+A feladatod, hogy megkeresd egy adott termék legfrissebb biztonsági adatlapját (SDS/MSDS) az interneten.
+Légy alapos: ellenőrizd a gyártó weboldalát, a nagy SDS adatbázisokat, és a Google-t is.
+MINDIG adj vissza érvényes JSON-t a kért formátumban."""},
+            {"role": "user", "content": search_query}
+        ],
+    ), get_limiter(client.api_key), estimate_tokens(search_query, max_output=3000))
+
+    # Válasz feldolgozása
+    result_text = response.output_text
+
+    # JSON kinyerése a válaszból
+    try:
+        json_match = re.search(r'\{[^{}]*"newer_version_found"[^{}]*\}', result_text, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group())
+    except:
+        pass
+
+    return {
+        "newer_version_found": False,
+        "notes": result_text[:300],
+        "source_name": "Keresés sikertelen",
+    }
+
+
+DATE_FORMATS = ['%Y-%m-%d', '%Y.%m.%d', '%Y.%m.%d.', '%d.%m.%Y', '%d/%m/%Y', '%m/%d/%Y']
+# A _norm() utáni alakra illeszt: az írásjelek már szóközök ("S.A." → "s a", "B.V." → "b v"); csak a név végén
+# ("Henkel AG & Co. KG" → "henkel"), a név elején / közepén álló "Co", "SE" a gyártó nevének része marad
+LEGAL_SUFFIXES = re.compile(r"(?:\s+(?:gmbh|kft|zrt|nyrt|bt|ltd|limited|inc|corp|llc|s ?a|s ?r ?l|ag|se|b ?v|n ?v|plc|co|kg))+$")
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime((value or '').strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _norm(value: Optional[str]) -> str:
+    return re.sub(r"[\W_]+", " ", (value or "").casefold()).strip()
+
+
+def _record_cas(sds: dict) -> List[str]:
+    """CAS számok a rekordból (comp1_cas…comp3_cas, illetve régi component_N formátum)"""
+    cas_numbers = []
+    for n in (1, 2, 3):
+        comp = sds.get(f'component_{n}', {})
+        cas = sds.get(f'comp{n}_cas') or (comp.get('cas_number') if isinstance(comp, dict) else None)
+        if cas:
+            cas_numbers.append(str(cas).strip())
+    return cas_numbers
+
+
+def lookup_key(product_name: str, manufacturer: str, cas_numbers: List[str]) -> tuple:
+    """Normalizált (termék, gyártó, CAS halmaz) – ugyanaz a termék több telephelyen csak egyszer kerül keresésre"""
+    maker = re.sub(r"\s+", " ", LEGAL_SUFFIXES.sub("", _norm(manufacturer))).strip()
+    return _norm(product_name), maker, frozenset(re.sub(r"\s", "", c) for c in cas_numbers)
+
+
+def _version_info(i: int, sds: dict) -> SDSVersionInfo:
+    current_date_str = sds.get('sds_date', '') or sds.get('sds_revision_date', '')
+    current_date_parsed = _parse_date(current_date_str) if current_date_str else None
+    return SDSVersionInfo(
+        ssz=sds.get('ssz', i+1),
+        product_name=sds.get('product_name', 'Ismeretlen'),
+        manufacturer=sds.get('manufacturer', 'Ismeretlen'),
+        current_version=sds.get('sds_version', '?'),
+        current_date=current_date_str,
+        current_date_parsed=current_date_parsed,
+        age_years=(datetime.now() - current_date_parsed).days / 365.25 if current_date_parsed else None,
+    )
+
+
+def _apply_online_result(version_info: SDSVersionInfo, online_result: dict):
+    """Egy csoport keresési eredményének ráírása egy rekordra. Ha a rekord verziója eltér a kereséskor
+    használttól (_queried), a saját dátumát hasonlítjuk az online legfrissebb dátumhoz."""
+    newer_found = bool(online_result.get('newer_version_found', False))
+    latest_date = _parse_date(online_result.get('latest_date'))
+    same_as_queried = [version_info.current_version, version_info.current_date] == online_result.get('_queried')
+    if not same_as_queried and latest_date and version_info.current_date_parsed:
+        newer_found = latest_date > version_info.current_date_parsed
+
+    version_info.online_version_found = newer_found
+    version_info.online_version = online_result.get('latest_version')
+    version_info.online_date = online_result.get('latest_date')
+    version_info.online_date_parsed = latest_date
+    version_info.download_url = online_result.get('download_url')
+    version_info.online_source_url = online_result.get('source_url')
+    version_info.online_source_name = online_result.get('source_name')
+    version_info.search_notes = online_result.get('notes')
+    if latest_date and version_info.current_date_parsed:
+        version_info.days_difference = (latest_date - version_info.current_date_parsed).days
+
+    # Státusz meghatározása
+    age_years = version_info.age_years
+    if version_info.online_version_found:
+        version_info.status = "🔄 Frissítés elérhető"
+        version_info.status_icon = "🔄"
+        version_info.is_outdated = True
+    elif age_years and age_years > 5:
+        version_info.status = "⚠️ Elavult (>5 év)"
+        version_info.status_icon = "⚠️"
+        version_info.is_outdated = True
+    elif age_years and age_years > 3:
+        version_info.status = "🟡 Ellenőrzés javasolt"
+        version_info.status_icon = "🟡"
+    else:
+        version_info.status = "✅ Aktuális"
+        version_info.status_icon = "✅"
+
+
+def check_all_sds_versions(sds_database: list, client: "OpenAI",
+                            progress_callback=None, max_workers: int = 4,
+                            store=None, ttl_days: Optional[int] = None) -> List[SDSVersionInfo]:
+    """Az összes SDS verzió-ellenőrzése: azonos termék/gyártó/CAS csoportonként egy keresés,
+    a keresések párhuzamosan (max_workers), az eredmény rekordonként, az eredeti sorrendben.
+    store (pl. sds_version_scheduler.VersionStore) megadásakor a ttl_days-nél frissebb korábbi
+    keresési eredmény újrahasznosul. A progress_callback a hívó szálában fut."""
+
+    results = [_version_info(i, sds) for i, sds in enumerate(sds_database)]
+    cas_lists = [_record_cas(sds) for sds in sds_database]
+
+    groups: Dict[tuple, List[int]] = {}
+    for i, (info, cas_numbers) in enumerate(zip(results, cas_lists)):
+        groups.setdefault(lookup_key(info.product_name, info.manufacturer, cas_numbers), []).append(i)
+
+    def lookup(key: tuple, indices: List[int]) -> dict:
+        if store is not None and ttl_days:
+            cached = store.get_lookup(key, ttl_days)
+            if cached is not None:
+                return cached
+        # A csoport legfrissebb ismert verziójával keresünk
+        rep = max(indices, key=lambda i: results[i].current_date_parsed or datetime.min)
+        online_result = check_sds_version_online(
+            product_name=results[rep].product_name,
+            manufacturer=results[rep].manufacturer,
+            current_version=results[rep].current_version,
+            current_date=results[rep].current_date,
+            cas_numbers=cas_lists[rep],
+            client=client,
+        )
+        online_result['_queried'] = [results[rep].current_version, results[rep].current_date]
+        if store is not None and online_result.get('source_name') != "Keresés sikertelen":
+            store.put_lookup(key, online_result)
+        return online_result
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(lookup, key, indices): indices for key, indices in groups.items()}
+        for fut in as_completed(futures):
+            indices = futures[fut]
+            try:
+                online_result = fut.result()
+                for i in indices:
+                    _apply_online_result(results[i], online_result)
+            except Exception as e:
+                for i in indices:
+                    results[i].status = "❌ Keresés sikertelen"
+                    results[i].search_notes = str(e)
+            done += len(indices)
+            if progress_callback:
+                progress_callback(done, len(sds_database), results[indices[0]].product_name)
+
+    return results
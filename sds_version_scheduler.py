@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+SDS Verzió-ellenőrzés Ütemező
+=============================
+A verzió-ellenőrző dashboard "Ütemezett ellenőrzés" beállításai és az online keresések eredményei
+egy helyi SQLite adatbázisban. Egy keresési eredmény a választott gyakoriságnak megfelelő ideig érvényes,
+így egy heti futás csak a lejárt rekordokat kérdezi le újra.
+
+Streamlit nélkül, cron-ból futtatható:
+    python sds_version_scheduler.py run                    # ha esedékes (gyakoriság szerint)
+    python sds_version_scheduler.py run --force --registry SDS_Database_2025.xlsx
+    python sds_version_scheduler.py settings --frequency Havonta --email safety@company.hu
+    python sds_version_scheduler.py status
+
+Ha az "auto_download" beállítás be van kapcsolva, a run az újabb verziókat le is tölti, újrafeldolgozza
+(sds_updates.py), és a frissített nyilvántartást új munkafüzetbe menti (--output, alapértelmezés: <név>_frissitett_<dátum>.xlsx).
+
+    crontab:  0 6 * * *  OPENAI_API_KEY=sk-... python /path/sds_version_scheduler.py run
+"""
+
+import argparse
+import json
+import os
+import smtplib
+import sqlite3
+import sys
+import threading
+import time
+from email.message import EmailMessage
+from typing import Optional, List
+
+DEFAULT_DB_PATH = os.environ.get(
+    "SDS_VERSION_DB", os.path.join(os.path.expanduser("~"), ".sds_ai", "version_checks.sqlite3"))
+
+# Gyakoriság → egy keresési eredmény érvényessége (nap)
+FREQUENCY_DAYS = {"Hetente": 7, "Havonta": 30, "Negyedévente": 91, "Félévente": 182}
+
+DEFAULT_SETTINGS = {
+    "check_frequency": "Havonta",
+    "auto_download": False,
+    "email_notify": "",
+    "notify_threshold": 3,
+    "registry_path": "",
+    "max_workers": 4,
+}
+
+
+# ============================================================
+# 1. TÁROLÓ
+# ============================================================
+
+def _key_text(key: tuple) -> str:
+    """lookup_key (termék, gyártó, CAS halmaz) → stabil szöveges kulcs"""
+    product, maker, cas = key
+    return json.dumps([product, maker, sorted(cas)], ensure_ascii=False)
+
+
+class VersionStore:
+    """Szálbiztos SQLite tároló: keresési eredmények (TTL-lel), beállítások és a futások naplója"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS lookups (key TEXT PRIMARY KEY, result TEXT NOT NULL, checked REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS runs (
+                started REAL NOT NULL, finished REAL NOT NULL, records INTEGER NOT NULL,
+                queried INTEGER NOT NULL, reused INTEGER NOT NULL, outdated INTEGER NOT NULL);""")
+        self._db.commit()
+
+    # ---- keresési eredmények ----
+
+    def get_lookup(self, key: tuple, ttl_days: float) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute("SELECT result, checked FROM lookups WHERE key=?", (_key_text(key),)).fetchone()
+            if row is None or time.time() - row[1] > ttl_days * 86400:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put_lookup(self, key: tuple, result: dict):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO lookups VALUES (?,?,?)",
+                             (_key_text(key), json.dumps(result, ensure_ascii=False), time.time()))
+            self._db.commit()
+
+    def purge(self, older_than_days: float):
+        with self._lock:
+            self._db.execute("DELETE FROM lookups WHERE checked < ?", (time.time() - older_than_days * 86400,))
+            self._db.commit()
+
+    # ---- beállítások ----
+
+    def load_settings(self) -> dict:
+        with self._lock:
+            rows = self._db.execute("SELECT name, value FROM settings").fetchall()
+        settings = dict(DEFAULT_SETTINGS)
+        settings.update({name: json.loads(value) for name, value in rows if name in DEFAULT_SETTINGS})
+        return settings
+
+    def save_settings(self, **values):
+        unknown = set(values) - set(DEFAULT_SETTINGS)
+        if unknown:
+            raise ValueError(f"Ismeretlen beállítás: {', '.join(sorted(unknown))}")
+        if "check_frequency" in values and values["check_frequency"] not in FREQUENCY_DAYS:
+            raise ValueError(f"Ismeretlen gyakoriság: {values['check_frequency']}")
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO settings VALUES (?,?)",
+                                 [(k, json.dumps(v, ensure_ascii=False)) for k, v in values.items()])
+            self._db.commit()
+
+    def ttl_days(self) -> int:
+        return FREQUENCY_DAYS[self.load_settings()["check_frequency"]]
+
+    # ---- futások ----
+
+    def record_run(self, started: float, records: int, queried: int, reused: int, outdated: int):
+        with self._lock:
+            self._db.execute("INSERT INTO runs VALUES (?,?,?,?,?,?)",
+                             (started, time.time(), records, queried, reused, outdated))
+            self._db.commit()
+
+    def last_run(self) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM runs ORDER BY finished DESC LIMIT 1").fetchone()
+        if row is None:
+            return None
+        return dict(zip(("started", "finished", "records", "queried", "reused", "outdated"), row))
+
+    def next_due(self) -> float:
+        """A következő esedékes futás időpontja (epoch); ha még nem volt futás, most"""
+        last = self.last_run()
+        return last["started"] + self.ttl_days() * 86400 if last else time.time()
+
+    def stats(self) -> dict:
+        with self._lock:
+            n = self._db.execute("SELECT COUNT(*) FROM lookups").fetchone()[0]
+        return {"entries": n, "hits": self.hits, "misses": self.misses}
+
+
+# ============================================================
+# 2. ÜTEMEZETT FUTÁS
+# ============================================================
+
+def notify(settings: dict, results: list) -> Optional[str]:
+    """E-mail a frissítendő / a küszöbnél régebbi SDS-ekről. SMTP: SDS_SMTP_HOST, SDS_SMTP_PORT,
+    SDS_SMTP_USER, SDS_SMTP_PASSWORD, SDS_SMTP_FROM. Visszatér a hibaüzenettel, vagy None."""
+    threshold = settings["notify_threshold"]
+    flagged = [r for r in results if r.online_version_found or (r.age_years or 0) > threshold]
+    if not settings["email_notify"] or not flagged:
+        return None
+    host = os.environ.get("SDS_SMTP_HOST")
+    if not host:
+        return "Nincs SMTP szerver beállítva (SDS_SMTP_HOST) – az értesítés nem ment ki"
+    lines = [f"{r.status_icon} {r.product_name} ({r.manufacturer}) – {r.current_version}, {r.current_date}"
+             + (f" → {r.online_version or '?'}, {r.online_date or '?'}" if r.online_version_found else "")
+             + (f"\n    {r.download_url}" if r.download_url else "") for r in flagged]
+    msg = EmailMessage()
+    msg["Subject"] = f"SDS verzió-ellenőrzés: {len(flagged)} adatlap figyelmet igényel"
+    msg["From"] = os.environ.get("SDS_SMTP_FROM", settings["email_notify"])
+    msg["To"] = settings["email_notify"]
+    msg.set_content(f"Frissítés elérhető vagy {threshold} évnél régebbi SDS:\n\n" + "\n".join(lines))
+    try:
+        with smtplib.SMTP(host, int(os.environ.get("SDS_SMTP_PORT", 587)), timeout=30) as smtp:
+            smtp.starttls()
+            if os.environ.get("SDS_SMTP_USER"):
+                smtp.login(os.environ["SDS_SMTP_USER"], os.environ.get("SDS_SMTP_PASSWORD", ""))
+            smtp.send_message(msg)
+    except (OSError, smtplib.SMTPException) as e:
+        return f"E-mail küldés sikertelen: {e}"
+    return None
+
+
+def run_scheduled(store: VersionStore, client, records: List[dict], progress_callback=None) -> list:
+    """Verzió-ellenőrzés a tárolt beállításokkal: csak a lejárt keresési eredmények kérdeződnek le újra"""
+    from sds_version_lookup import check_all_sds_versions
+    settings = store.load_settings()
+    started, hits, misses = time.time(), store.hits, store.misses
+    results = check_all_sds_versions(records, client, progress_callback, max_workers=settings["max_workers"],
+                                     store=store, ttl_days=FREQUENCY_DAYS[settings["check_frequency"]])
+    store.record_run(started, len(records), store.misses - misses, store.hits - hits,
+                     sum(1 for r in results if r.is_outdated))
+    return results
+
+
+def download_and_reprocess(results: list, records: List[dict], risks: List[dict], api_key: str, lang: str,
+                           settings: dict, output: str):
+    """auto_download: az újabb verziók letöltése és újrafeldolgozása, átvétel a nyilvántartásba, új munkafüzet.
+    Visszaadja a tételeket (UpdateItem) – új verzió híján munkafüzet sem készül."""
+    from datetime import date
+    from sds_cache import SDSCache
+    from sds_updates import update_outdated, apply_updates
+    from sds_excel import generate_full_excel
+    items = update_outdated(results, records, api_key, lang, settings["max_workers"], SDSCache())
+    new_r, new_k, n = apply_updates(records, risks, items)
+    if n:
+        today = date.today()
+        generate_full_excel(new_r, new_k, "", today, today.replace(year=today.year + 1, day=28 if (today.month, today.day) == (2, 29) else today.day),
+                            date(today.year, 6, 30), lang, out=output)
+    return items
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="SDS verzió-ellenőrzés ütemező (cron / parancssor)")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite adatbázis (SDS_VERSION_DB)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Ellenőrzés futtatása, ha esedékes")
+    p_run.add_argument("--registry", help="SDS_Database_*.xlsx (alapértelmezés: a mentett útvonal)")
+    p_run.add_argument("--force", action="store_true", help="Futtatás az esedékességtől függetlenül")
+    p_run.add_argument("--report", help="Eredmények mentése JSON fájlba")
+    p_run.add_argument("--lang", default="hu", help="Automatikus letöltésnél az újrafeldolgozás nyelve")
+    p_run.add_argument("--output", help="Automatikus letöltésnél a frissített nyilvántartás (.xlsx)")
+
+    p_set = sub.add_parser("settings", help="Beállítások megjelenítése / módosítása")
+    p_set.add_argument("--frequency", choices=list(FREQUENCY_DAYS))
+    p_set.add_argument("--auto-download", choices=["igen", "nem"])
+    p_set.add_argument("--email")
+    p_set.add_argument("--threshold", type=int)
+    p_set.add_argument("--registry")
+    p_set.add_argument("--workers", type=int)
+
+    sub.add_parser("status", help="Utolsó futás és a következő esedékesség")
+    args = parser.parse_args(argv)
+    store = VersionStore(args.db)
+
+    if args.command == "settings":
+        changes = {k: v for k, v in (("check_frequency", args.frequency),
+                                     ("email_notify", args.email),
+                                     ("notify_threshold", args.threshold),
+                                     ("registry_path", os.path.abspath(args.registry) if args.registry else None),
+                                     ("max_workers", args.workers)) if v is not None}
+        if args.auto_download:
+            changes["auto_download"] = args.auto_download == "igen"
+        if changes:
+            store.save_settings(**changes)
+        print(json.dumps(store.load_settings(), ensure_ascii=False, indent=2))
+        return 0
+
+    if args.command == "status":
+        last = store.last_run()
+        print(f"Utolsó futás: {time.strftime('%Y-%m-%d %H:%M', time.localtime(last['finished']))} – "
+              f"{last['records']} rekord, {last['queried']} keresés, {last['reused']} tárolt, "
+              f"{last['outdated']} frissítendő" if last else "Utolsó futás: még nem volt")
+        print(f"Következő esedékes: {time.strftime('%Y-%m-%d %H:%M', time.localtime(store.next_due()))}")
+        print(f"Tárolt keresési eredmények: {store.stats()['entries']}")
+        return 0
+
+    settings = store.load_settings()
+    due = store.next_due()   # előbb: első futásnál a next_due() "most", ami az összehasonlításkor már elmúlt
+    if not args.force and time.time() < due:
+        print(f"Nem esedékes ({settings['check_frequency']}); következő: "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(due))}")
+        return 0
+    registry = args.registry or settings["registry_path"]
+    if not registry or not os.path.exists(registry):
+        print("Nincs nyilvántartás megadva (--registry vagy settings --registry)", file=sys.stderr)
+        return 2
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        print("Hiányzó OPENAI_API_KEY környezeti változó", file=sys.stderr)
+        return 2
+
+    from sds_registry import load_registry
+    from sds_rate_limit import get_client
+    records, risks = load_registry(registry)
+    results = run_scheduled(store, get_client(api_key), records,
+                            lambda done, total, name: print(f"[{done}/{total}] {name}", file=sys.stderr))
+    last = store.last_run()
+    print(f"{last['records']} rekord: {last['queried']} online keresés, {last['reused']} tárolt eredmény, "
+          f"{last['outdated']} frissítendő")
+    for r in results:
+        if r.is_outdated:
+            print(f"  {r.status_icon} {r.product_name} ({r.manufacturer}) – {r.status}"
+                  + (f" – {r.download_url}" if r.download_url else ""))
+    updates = {}
+    if settings["auto_download"]:
+        from sds_updates import update_summary
+        output = args.output or f"{os.path.splitext(registry)[0]}_frissitett_{time.strftime('%Y%m%d')}.xlsx"
+        items = download_and_reprocess(results, records, risks, api_key, args.lang, settings, output)
+        updates = {item.row: item for item in items}
+        summary = update_summary(items)
+        print(f"Automatikus letöltés: {summary['downloaded']}/{len(items)} letöltve, {summary['new']} új verzió, "
+              f"{summary['same']} nem újabb, {summary['duplicates']} duplikátum, {summary['failed']} hiba"
+              + (f" → {output}" if summary['new'] else ""))
+        for item in items:
+            print(f"  {item.status} {item.product_name}" + "".join(
+                f"\n    {c['field']}: {c['old']} → {c['new']}" for c in item.changes if not item.status.startswith("=")))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump([{**{k: v for k, v in vars(r).items() if not k.endswith("_parsed")},
+                        **({"update": {"status": updates[i].status, "content_hash": updates[i].content_hash,
+                                       "changes": updates[i].changes}} if i in updates else {})}
+                       for i, r in enumerate(results)], f, ensure_ascii=False, indent=2)
+    error = notify(settings, results)
+    if error:
+        print(error, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+SDS Háttér-worker
+=================
+A felületről háttér-feldolgozásra beküldött futások (sds_runs.RunStore, "queued") fájljait dolgozza fel,
+így a Streamlit oldal nem blokkol, csak az állapotot kérdezi le. Több worker folyamat (akár több gépen,
+közös SDS_RUN_DIR-rel) ugyanabból a sorból foglal fájlonként; az áteresztőképesség a workerek számával nő.
+    python sds_worker.py --processes 4 --threads 4      # 4 folyamat × 4 szál
+    python sds_worker.py --once                         # a sor kiürítése, majd kilépés (cron)
+
+Az OpenAI kulcs a worker környezetéből jön (OPENAI_API_KEY); az RPM/TPM keret a folyamatok között egyenlően oszlik el.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import uuid
+from typing import Optional, List
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="sds_worker.py", description="SDS háttér-feldolgozó worker")
+    parser.add_argument("--processes", type=int, default=1, help="Worker folyamatok száma")
+    parser.add_argument("--threads", type=int, default=4, help="Párhuzamosan feldolgozott SDS-ek folyamatonként")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY", ""),
+                        help="OpenAI API kulcs (alapértelmezés: OPENAI_API_KEY)")
+    parser.add_argument("--rpm", type=int, help="OpenAI kérés / perc keret (az összes folyamatra)")
+    parser.add_argument("--tpm", type=int, help="OpenAI token / perc keret (az összes folyamatra)")
+    parser.add_argument("--no-index", action="store_true", help="Anyag-index (CAS/EC) kihagyása")
+    parser.add_argument("--once", action="store_true", help="Kilépés, ha a sor kiürült")
+    parser.add_argument("--poll", type=float, default=2.0, help="Üres sornál a lekérdezések közti szünet (mp)")
+    return parser
+
+
+def run_worker(api_key: str, threads: int = 4, rpm: Optional[int] = None, tpm: Optional[int] = None,
+               use_index: bool = True, once: bool = False, poll: float = 2.0) -> int:
+    """Egy worker folyamat: threads szál foglal és dolgoz fel fájlokat a futás-tárolóból; a feldolgozott SDS-ek száma"""
+    from sds_cache import SDSCache
+    from sds_substances import SubstanceIndex
+    from sds_rate_limit import get_limiter
+    from sds_runs import RunStore, WORKER_STALE
+    from sds_pipeline import process_single_sds
+    if rpm and tpm:
+        get_limiter(api_key, rpm, tpm)
+    store, cache = RunStore(), SDSCache()
+    index = SubstanceIndex() if use_index else None
+    worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    processed = [0]
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(WORKER_STALE / 3):
+            store.worker_heartbeat(worker_id, threads, processed[0])
+
+    def loop():
+        while not stop.is_set():
+            job = store.claim(worker_id)
+            if job is None:
+                if once:
+                    return
+                stop.wait(poll)
+                continue
+            run, idx, pdf = job
+            settings = run["settings"]
+            try:
+                sds, risk = process_single_sds(pdf, api_key, run["lang"], cache, settings.get("use_cache", True),
+                                               settings.get("rules", True), index)
+            except Exception as e:
+                sds, risk = {"_source_file": pdf.name, "_status": f"❌ {e}"}, {}
+            store.save_result(run["run_id"], idx, sds, risk)
+            processed[0] += 1
+            print(f"[{worker_id}] {sds.get('_status', '?')} {run['run_id']}/{pdf.name} – {sds.get('product_name', '?')}",
+                  file=sys.stderr, flush=True)
+
+    store.worker_heartbeat(worker_id, threads, 0)
+    threading.Thread(target=heartbeat, daemon=True).start()
+    pool = [threading.Thread(target=loop, daemon=True) for _ in range(max(1, threads))]
+    try:
+        for t in pool:
+            t.start()
+        for t in pool:
+            while t.is_alive():
+                t.join(1.0)
+    except KeyboardInterrupt:
+        stop.set()
+    finally:
+        stop.set()
+        store.worker_exit(worker_id)
+    return processed[0]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if not args.api_key:
+        print("Hiányzó OpenAI API kulcs (--api-key vagy OPENAI_API_KEY)", file=sys.stderr)
+        return 2
+    n = max(1, args.processes)
+    from sds_rate_limit import DEFAULT_RPM, DEFAULT_TPM
+    rpm = max(1, (args.rpm or DEFAULT_RPM) // n); tpm = max(1000, (args.tpm or DEFAULT_TPM) // n)
+    kwargs = dict(threads=args.threads, rpm=rpm, tpm=tpm, use_index=not args.no_index, once=args.once, poll=args.poll)
+    print(f"SDS worker: {n} folyamat × {args.threads} szál ({rpm} RPM / {tpm} TPM folyamatonként)", file=sys.stderr)
+    if n == 1:
+        run_worker(args.api_key, **kwargs)
+        return 0
+    procs = [multiprocessing.Process(target=run_worker, args=(args.api_key,), kwargs=kwargs) for _ in range(n)]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.join(30)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
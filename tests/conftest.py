@@ -0,0 +1,39 @@
+"""
+Közös pytest beállítás
+======================
+A modulok a tároló gyökerében vannak (sds_*.py), ezért az útvonalra kerül. A ~/.sds_ai tárolók (gyorsítótár,
+futások, batch jobok, anyag-index) az importkor rögzülnek – a HOME egy ideiglenes könyvtárra mutat, hogy a tesztek
+ne a felhasználó adataiba írjanak.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["HOME"] = os.environ["USERPROFILE"] = tempfile.mkdtemp(prefix="sds_tests_")
+for _var in [v for v in os.environ if v.startswith("SDS_")]:
+    del os.environ[_var]
+
+
+@pytest.fixture
+def http_server():
+    """Helyi HTTP szerver egy BaseHTTPRequestHandler osztállyal: serve(handler) → "http://127.0.0.1:<port>" """
+    servers = []
+
+    def serve(handler):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,140 @@
+"""Batch mód egy helyi /files + /batches stub szerveren (OPENAI_BASE_URL), a job JSON újratöltésével lépésenként"""
+
+import json
+import os
+import re
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import sds_batch
+from sds_batch import BatchJob, advance_job, start_job
+from sds_rate_limit import get_client
+from sds_schema import REQUIRED
+
+EXTRACTED = {"product_name": "Aceton", "manufacturer": "Stub Kft.", "sds_date": "2024.01.15",
+             "h_statements": "H225, H319", "comp1_name": "aceton", "comp1_cas": "67-64-1"}
+RISK = {"risk_level": "Közepes", "risk_score": 4, "probability": 2, "severity": 2,
+        "residual_risk": 2, "residual_risk_level": "Alacsony"}
+
+
+def stub_handler(state):
+    """OpenAI Batch API stub: feltöltött JSONL → batch; minden lekérdezés egy állapottal lép (in_progress → completed)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def reply(self, body, ctype="application/json"):
+            data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def batch(self, batch_id):
+            b = state["batches"][batch_id]
+            return {"id": batch_id, "object": "batch", "endpoint": "/v1/chat/completions", "completion_window": "24h",
+                    "created_at": 0, "input_file_id": b["input"], "status": b["status"],
+                    "output_file_id": b.get("output"), "error_file_id": None}
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            if self.path == "/v1/files":
+                file_id = f"file-{len(state['files'])}"
+                state["files"][file_id] = [json.loads(line) for line in body.decode("utf-8").splitlines()
+                                           if line.startswith('{"custom_id"')]
+                return self.reply({"id": file_id, "object": "file", "bytes": len(body), "created_at": 0,
+                                   "filename": "in.jsonl", "purpose": "batch", "status": "processed"})
+            if self.path == "/v1/batches":
+                batch_id = f"batch-{len(state['batches'])}"
+                state["batches"][batch_id] = {"input": json.loads(body)["input_file_id"], "status": "validating"}
+                return self.reply(self.batch(batch_id))
+            self.send_error(404)
+
+        def do_GET(self):
+            m = re.fullmatch(r"/v1/batches/([\w-]+)", self.path)
+            if m:
+                b = state["batches"][m.group(1)]
+                if b["status"] == "in_progress":
+                    b["status"], b["output"] = "completed", self.answer(b["input"])
+                elif b["status"] == "validating":
+                    b["status"] = "in_progress"
+                return self.reply(self.batch(m.group(1)))
+            m = re.fullmatch(r"/v1/files/([\w-]+)/content", self.path)
+            if m:
+                return self.reply("\n".join(json.dumps(r) for r in state["files"][m.group(1)]).encode("utf-8"),
+                                  "application/octet-stream")
+            self.send_error(404)
+
+        def answer(self, input_id):
+            file_id = f"file-{len(state['files'])}"
+            state["files"][file_id] = [
+                {"custom_id": r["custom_id"], "response": {"status_code": 200, "body": {
+                    "choices": [{"message": {"content": json.dumps(
+                        state.get("extracted", EXTRACTED) if r["custom_id"].startswith("extract") else RISK)}}],
+                    "usage": {"total_tokens": 42}}}} for r in state["files"][input_id]]
+            return file_id
+
+    return Handler
+
+
+@pytest.fixture
+def state():
+    return {"files": {}, "batches": {}}
+
+
+@pytest.fixture
+def client(http_server, monkeypatch, tmp_path, state):
+    monkeypatch.setenv("OPENAI_BASE_URL", http_server(stub_handler(state)) + "/v1")
+    monkeypatch.setattr(sds_batch, "JOB_DIR", str(tmp_path / ".sds_ai" / "batch_jobs"))
+    return get_client(f"sk-batch-test-{tmp_path.name}")
+
+
+def test_default_job_dir_is_under_home():
+    assert sds_batch.JOB_DIR == os.path.join(os.path.expanduser("~"), ".sds_ai", "batch_jobs")
+
+
+def test_job_runs_through_batch_states_and_survives_reload(client):
+    job = start_job(client, [("a.pdf", "SDS a"), ("b.pdf", "SDS b"), ("hibas.pdf", None)], "hu", "gpt-4o", "EXTRACT")
+    assert job.stage == "extract" and job.extract_batch_id
+    assert os.path.exists(os.path.join(sds_batch.JOB_DIR, f"{job.job_id}.json"))
+    assert job.results[2]["_status"] == "❌ PDF hiba"
+
+    def step():
+        # Minden lépés a lemezről újratöltött állapotból indul (böngésző-frissítés)
+        return advance_job(BatchJob.load(job.job_id), client, "RISK", lambda sds: f"risk {sds['product_name']}")
+
+    job = step()
+    assert (job.stage, job.batch_status) == ("extract", "in_progress")
+    job = step()
+    assert job.stage == "risk" and job.risk_batch_id and job.batch_status == ""
+    assert [r["_status"] for r in job.results] == ["✅", "✅", "❌ PDF hiba"]
+    assert job.results[0]["product_name"] == "Aceton" and job.results[0]["_source_file"] == "a.pdf"
+    job = step()
+    assert (job.stage, job.batch_status) == ("risk", "in_progress")
+    job = step()
+    assert job.stage == "done" and job.finished
+
+    reloaded = BatchJob.load(job.job_id)
+    assert reloaded.stage == "done"
+    assert [r.get("risk_level") for r in reloaded.risk_results] == ["Közepes", "Közepes", None]
+    assert reloaded.results[1]["_source_file"] == "b.pdf"
+    assert advance_job(reloaded, client, "RISK", str).stage == "done"   # kész job: nincs további hívás
+
+
+def test_unknown_job_loads_as_none(client):
+    assert BatchJob.load("nincs-ilyen") is None
+
+
+@pytest.mark.parametrize("complete", [False, True])
+def test_only_complete_records_reach_the_cache(client, state, complete):
+    if complete:
+        state["extracted"] = {**{n: "x" for n in REQUIRED}, **EXTRACTED}
+    cached = []
+    job = start_job(client, [("a.pdf", "SDS a")], "hu", "gpt-4o", "EXTRACT")
+    while not job.finished:
+        job = advance_job(job, client, "RISK", str, lambda i, sds, risk: cached.append(i))
+    assert bool(job.results[0].get("_missing")) is not complete
+    assert cached == ([0] if complete else [])
@@ -0,0 +1,24 @@
+"""Benchmark szakaszmérés: a memória szakaszonként mérve, nem a folyamat korábbi csúcsa öröklődik"""
+
+import time
+
+import pytest
+
+from sds_bench import Stage, rss_mb
+
+pytestmark = pytest.mark.skipif(rss_mb() is None, reason="nincs /proc/self/statm")
+
+
+def test_stage_reports_its_own_rss_growth():
+    report = {"products": 1, "stages": {}}
+    with Stage("heavy", report):
+        block = bytearray(80 * 2**20)
+        block[::4096] = b"x" * len(block[::4096])   # a lapok ténylegesen lefoglalódnak
+        time.sleep(0.05)
+        del block
+    with Stage("light", report):
+        time.sleep(0.05)
+    heavy, light = report["stages"]["heavy"], report["stages"]["light"]
+    assert heavy["stage_rss_growth_mb"] >= 60
+    assert light["stage_rss_growth_mb"] < 10 and light["stage_peak_rss_mb"] < heavy["stage_peak_rss_mb"]
+    assert light["process_peak_rss_mb"] >= heavy["stage_peak_rss_mb"] - 1
@@ -0,0 +1,53 @@
+"""Eredmény-gyorsítótár: találat, lejárat, a méretkorlát futás közben, és külön bejegyzés szabály-alapú / modell értékelésre"""
+
+import time
+
+import sds_cache
+from sds_bench import ReplayClient, synthetic_pdf, synthetic_record
+from sds_cache import SDSCache
+from sds_pipeline import PDFFile, process_single_sds
+from sds_rate_limit import set_client
+
+
+def test_put_get_roundtrip(tmp_path):
+    cache = SDSCache(str(tmp_path / "c.sqlite3"))
+    assert cache.get("k") is None
+    cache.put("k", {"product_name": "Aceton"}, {"risk_level": "Közepes"})
+    assert cache.get("k") == ({"product_name": "Aceton"}, {"risk_level": "Közepes"})
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_size_limit_applies_to_long_lived_instance(tmp_path, monkeypatch):
+    monkeypatch.setattr(sds_cache, "EVICT_EVERY", 5)
+    cache = SDSCache(str(tmp_path / "c.sqlite3"), max_mb=0.01)   # ~10 KB
+    for i in range(40):
+        cache.put(f"k{i}", {"text": "x" * 1000}, {})
+    stats = cache.stats()
+    assert stats["size_mb"] * 1024 * 1024 <= cache.max_bytes + 5 * 1010
+    assert stats["entries"] < 40
+    assert cache.get("k39") is not None and cache.get("k0") is None   # a legrégebben használtak mennek
+
+
+def test_expired_entries_are_evicted_after_interval(tmp_path, monkeypatch):
+    cache = SDSCache(str(tmp_path / "c.sqlite3"), max_age_days=1)
+    cache.put("old", {"a": 1}, {})
+    cache._db.execute("UPDATE results SET created = ?", (time.time() - 2 * 86400,))
+    cache._db.commit()
+    monkeypatch.setattr(sds_cache, "EVICT_INTERVAL", 0)
+    cache.put("new", {"a": 2}, {})
+    assert cache.stats()["entries"] == 1 and cache.get("new") is not None
+
+
+def test_rules_switch_is_part_of_the_key(tmp_path):
+    client = ReplayClient()
+    set_client("sk-cache-rules", client)
+    cache = SDSCache(str(tmp_path / "c.sqlite3"))
+    pdf = PDFFile("cmr.pdf", synthetic_pdf(synthetic_record(17)))   # H350: a szabályok döntenek
+    sds, risk = process_single_sds(pdf, "sk-cache-rules", "en", cache, rules=True)
+    assert risk["_rule_based"] and client.synthetic == 1
+    sds, risk = process_single_sds(pdf, "sk-cache-rules", "en", cache, rules=False)
+    assert sds["_status"] == "✅" and "_rule_based" not in risk and client.synthetic == 3
+    for rules in (True, False):
+        sds, risk = process_single_sds(pdf, "sk-cache-rules", "en", cache, rules=rules)
+        assert sds["_status"] == "✅ ♻️" and bool(risk.get("_rule_based")) == rules
+    assert client.synthetic == 3
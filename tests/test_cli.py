@@ -0,0 +1,47 @@
+"""Parancssor: a --help gyors marad (a nehéz modulok csak az argumentumok után töltődnek be), hibás bemenetre 2-es kód"""
+
+import os
+import subprocess
+import sys
+import time
+
+import sds_cli
+from conftest import ROOT
+
+HELP_BUDGET_S = 1.0
+HEAVY_MODULES = ("streamlit", "openai", "openpyxl", "pypdfium2", "numpy")
+
+
+def run_cli(*args, **env):
+    return subprocess.run([sys.executable, os.path.join(ROOT, "sds_cli.py"), *args], capture_output=True, text=True,
+                          cwd=ROOT, env={**os.environ, **env}, timeout=60)
+
+
+def test_help_starts_within_budget():
+    run_cli("--help")   # első futás: .pyc fordítás, lemez-gyorsítótár
+    t0 = time.perf_counter()
+    proc = run_cli("--help")
+    elapsed = time.perf_counter() - t0
+    assert proc.returncode == 0 and "--resume" in proc.stdout
+    assert elapsed < HELP_BUDGET_S, f"sds_cli.py --help: {elapsed:.2f} s (keret: {HELP_BUDGET_S} s)"
+
+
+def test_import_does_not_load_heavy_modules():
+    code = f"import sys, sds_cli; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == ""
+
+
+def test_invalid_arguments_exit_with_2_before_processing():
+    assert run_cli("--lang", "xx", "a.pdf", OPENAI_API_KEY="sk-x").returncode == 2
+    assert run_cli("--format", "docx", "a.pdf", OPENAI_API_KEY="sk-x").returncode == 2
+    assert run_cli("nincs.pdf", OPENAI_API_KEY="sk-x").returncode == 2
+    assert run_cli("a.pdf", OPENAI_API_KEY="").returncode == 2
+
+
+def test_expand_paths_keeps_order_without_duplicates(tmp_path):
+    for name in ("b.pdf", "a.pdf"):
+        (tmp_path / name).write_bytes(b"%PDF-1.4")
+    paths = sds_cli.expand_paths([str(tmp_path / "b.pdf"), str(tmp_path / "*.pdf")])
+    assert [os.path.basename(p) for p in paths] == ["b.pdf", "a.pdf"]
@@ -0,0 +1,92 @@
+"""Közel-duplikátumok: azonos fájl, közös UFI és fordítás egy klaszterbe kerül, eltérő UFI kódú termékek soha"""
+
+from sds_dedup import RegistryIndex, cluster, fingerprint_text, link_reason
+
+SECTIONS = {
+    "en": ["SECTION 1: Identification", "SECTION 2: Hazards identification", "SECTION 3: Composition",
+           "SECTION 9: Physical and chemical properties", "SECTION 14: Transport information", "SECTION 16: Other information"],
+    "hu": ["1. SZAKASZ: Azonosítás", "2. SZAKASZ: A veszély meghatározása", "3. SZAKASZ: Összetétel",
+           "9. SZAKASZ: Fizikai és kémiai tulajdonságok", "14. SZAKASZ: Szállítási információk", "16. SZAKASZ: Egyéb információk"],
+}
+BODY = {
+    "en": ["Product: {name} Article no. {article} Supplier phone +36 1 234 5678 {ufi}",
+           "Highly flammable liquid and vapour H225 H319 H336 P210 P233 P240 P305+P351+P338",
+           "acetone CAS 67-64-1 EC 200-662-2 content 80-100 % ethyl acetate CAS 141-78-6",
+           "Flash point -20 °C density 0.791 g/cm3 boiling point 56.05 °C vapour pressure 233 hPa",
+           "UN1090 acetone class 3 packing group II",
+           "Revision date {date} replaces version 2019.05.20 prepared by the safety department"],
+    "hu": ["Termék: {name} Cikkszám {article} Szállító telefonszáma +36 1 234 5678 {ufi}",
+           "Fokozottan tűzveszélyes folyadék és gőz H225 H319 H336 P210 P233 P240 P305+P351+P338",
+           "aceton CAS 67-64-1 EK 200-662-2 tartalom 80-100 % etil-acetát CAS 141-78-6",
+           "Lobbanáspont -20 °C sűrűség 0,791 g/cm3 forráspont 56,05 °C gőznyomás 233 hPa",
+           "UN1090 aceton 3. osztály II. csomagolási csoport",
+           "Felülvizsgálat dátuma {date}, a 2019.05.20 változat helyett, készítette a biztonsági osztály"],
+}
+
+# Másik termék: eltérő összetétel, H/P kódok és fizikai adatok
+OTHER_PRODUCT = {"67-64-1": "64-17-5", "200-662-2": "200-578-6", "141-78-6": "108-88-3", "H336": "H302", "P240": "P280",
+                 "0.791": "0.789", "0,791": "0,789", "56.05": "78.37", "56,05": "78,37", "233": "59", "UN1090": "UN1170",
+                 "-20": "13", "4711": "0815", "5678": "9999"}
+
+
+def sds_text(lang="en", name="Hígító 100", ufi="", date="2024.03.01", article="ART-4711"):
+    ufi = f"UFI: {ufi}" if ufi else ""
+    return "\n".join(f"{head}\n{body.format(name=name, ufi=ufi, date=date, article=article)}"
+                     for head, body in zip(SECTIONS[lang], BODY[lang]))
+
+
+def other_product(text):
+    for old, new in OTHER_PRODUCT.items():
+        text = text.replace(old, new)
+    return text
+
+
+def fp(name, text, digest=""):
+    return fingerprint_text(name, text, digest)
+
+
+def test_fingerprint_reads_language_ufi_cas_and_date():
+    f = fp("a.pdf", sds_text("hu", ufi="N1QV-R0EP-E00K-TTGK"))
+    assert (f.lang, f.ufi, f.newest) == ("hu", {"N1QV-R0EP-E00K-TTGK"}, "2024-03-01")
+    assert f.cas == {"67-64-1", "141-78-6"} and f.code_sig is not None
+
+
+def test_hash_ufi_and_translated_copies_share_a_cluster():
+    original = fp("eredeti.pdf", sds_text("en"), "hash-1")
+    same_file = fp("masolat.pdf", "egészen más szöveg", "hash-1")
+    translated = fp("magyar.pdf", sds_text("hu"))
+    # Másik termék és egy szinte szöveg nélküli (szkennelt) példánya: csak a UFI köti össze őket
+    by_ufi = [fp("festek.pdf", other_product(sds_text("en", name="Festék", ufi="N1QV-R0EP-E00K-TTGK"))),
+              fp("szkennelt.pdf", "Festék UFI: N1QV-R0EP-E00K-TTGK")]
+    result = cluster([original, same_file, translated, *by_ufi], lang="en")
+    assert sorted(map(sorted, result.clusters)) == [[0, 1, 2], [3, 4]]
+    assert link_reason(original, same_file) == "azonos fájl"
+    assert link_reason(*by_ufi) == "azonos UFI"
+    assert link_reason(original, translated).startswith("más nyelv (hu)")
+    assert by_ufi[1].code_sig is None and link_reason(original, by_ufi[0]) == ""
+    assert result.keep() == [0, 3] and result.summary()["duplicates"] == 3
+
+
+def test_newest_revision_represents_its_cluster():
+    old, new = fp("2022.pdf", sds_text("en", date="2022.01.10")), fp("2024.pdf", sds_text("en", date="2024.03.01"))
+    result = cluster([old, new], lang="en")
+    assert result.clusters == [[1, 0]] and new.representative and not old.representative
+    assert old.reason.startswith("revízió")
+
+
+def test_different_ufi_codes_are_never_merged():
+    # Azonos összetételű változatok (pl. színek) saját UFI kóddal
+    a = fp("a.pdf", sds_text("en", ufi="N1QV-R0EP-E00K-TTGK"))
+    b = fp("b.pdf", sds_text("en", ufi="XC6S-G0M8-U00T-1WYJ"))
+    bridge = fp("hid.pdf", sds_text("en"))   # UFI nélkül mindkettőhöz hasonló – nem kötheti össze őket
+    assert link_reason(a, b) == "" and link_reason(a, bridge) and link_reason(bridge, b)
+    result = cluster([a, bridge, b], lang="en")
+    assert len(result.clusters) == 2 and a.cluster != b.cluster
+
+
+def test_registry_match_by_ufi_and_same_date():
+    records = [{"product_name": "Hígító 100", "ufi_code": "N1QV-R0EP-E00K-TTGK", "sds_revision_date": "2024.03.01"}]
+    f = fp("a.pdf", sds_text("hu", ufi="N1QV-R0EP-E00K-TTGK"))
+    result = cluster([f], registry=RegistryIndex(records))
+    assert (f.registry_row, f.registry_reason, f.registry_same) == (0, "UFI", True)
+    assert result.keep() == [0] and result.keep(skip_registry=True) == []
@@ -0,0 +1,82 @@
+"""CSV / JSON Lines / Parquet export: táblánként ugyanazok a sorok, mint az Excel munkafüzet munkalapjain"""
+
+import csv
+import io
+import json
+import zipfile
+from datetime import date
+
+import pytest
+
+from sds_bench import synthetic_record
+from sds_excel import generate_full_excel
+from sds_export import COLUMNS, TABLES, available_formats, export_name, export_zip, table_rows
+from sds_languages import get_lang
+from sds_records import compact_records
+
+DATES = ("Teszt Értékelő", date(2024, 3, 1), date(2025, 3, 1), date(2024, 6, 1))
+# Excel munkalap indexe a sheet_names listában táblánként
+SHEETS = {"database": 2, "risk": 3, "actions": 5}
+
+
+@pytest.fixture(scope="module")
+def registry():
+    results = [synthetic_record(i) for i in range(6)]
+    results[1]["product_name"] = 'Hígító "B", 2. változat\nsortöréssel'
+    results = results[:3] + compact_records(results[3:])
+    risks = [{"probability": p, "severity": s, "risk_level": f"szint {p * s}", "required_action": "Elszívás"}
+             for p, s in ((1, 1), (2, 3), (4, 4), (3, 2))] + [{}]   # az utolsó terméknek nincs értékelése
+    return results, risks
+
+
+def excel_rows(results, risks, lang):
+    import openpyxl
+    wb = openpyxl.load_workbook(io.BytesIO(generate_full_excel(results, risks, *DATES, lang_code=lang)), read_only=True)
+    names = get_lang(lang)["sheet_names"]
+    return {table: [["" if v is None else v for v in row]
+                    for row in wb[names[SHEETS[table]]].iter_rows(min_row=2, values_only=True)] for table in TABLES}
+
+
+def unzip(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        return {name.split("_", 1)[1].rsplit(".", 1)[0]: zf.read(name) for name in zf.namelist()}
+
+
+@pytest.mark.parametrize("lang", ["hu", "en"])
+def test_csv_matches_excel(registry, lang):
+    expected = excel_rows(*registry, lang)
+    L = get_lang(lang)
+    for table, data in unzip(export_zip(*registry, "csv", *DATES, lang_code=lang)).items():
+        assert data.startswith(b"\xef\xbb\xbf")
+        header, *rows = list(csv.reader(io.StringIO(data.decode("utf-8-sig"), newline="")))
+        assert header == L[{"database": "db_headers", "risk": "risk_headers", "actions": "action_headers"}[table]]
+        assert rows == expected[table], table
+    assert len(expected["database"]) == 6 and len(expected["actions"]) == 3
+
+
+def test_jsonl_matches_excel(registry):
+    expected = excel_rows(*registry, "hu")
+    for table, data in unzip(export_zip(*registry, "jsonl", *DATES)).items():
+        rows = [json.loads(line) for line in data.decode("utf-8").splitlines()]
+        assert all(list(r) == COLUMNS[table] for r in rows)
+        assert [list(r.values()) for r in rows] == expected[table], table
+
+
+@pytest.mark.skipif("parquet" not in available_formats(), reason="pyarrow nincs telepítve")
+def test_parquet_matches_excel(registry, monkeypatch):
+    import pyarrow.parquet as pq
+    import sds_export
+    monkeypatch.setattr(sds_export, "PARQUET_BATCH", 2)   # több row group
+    expected = excel_rows(*registry, "hu")
+    for table, data in unzip(export_zip(*registry, "parquet", *DATES)).items():
+        t = pq.read_table(io.BytesIO(data))
+        assert t.column_names == COLUMNS[table]
+        assert [list(r.values()) for r in t.to_pylist()] == expected[table], table
+
+
+def test_table_rows_pad_missing_risks_and_names(registry):
+    results, risks = registry
+    rows = list(table_rows("risk", results, risks[:2], get_lang("hu"), *DATES))
+    assert len(rows) == len(results) and rows[-1][15] == ""
+    assert export_name("csv", "hu", "20240301") == "SDS_Database_hu_20240301_csv.zip"
+    assert export_name("xlsx", "en", "20240301").endswith(".xlsx")
@@ -0,0 +1,34 @@
+"""Nyelvi szótárak: azonos kulcskészlet, a fejlécsorok hossza a nyilvántartás és a kockázati sor oszlopaival egyezik"""
+
+import glob
+import json
+import os
+
+import pytest
+
+from sds_export import COLUMNS
+from sds_languages import LANG_DIR, LANG_NAMES, get_lang, validate_bundles
+from sds_registry import DB_KEYS
+
+BUNDLES = sorted(glob.glob(os.path.join(LANG_DIR, "*.json")))
+
+
+def test_validate_bundles_reports_nothing():
+    assert validate_bundles() == []
+
+
+def test_every_language_has_a_bundle():
+    assert {os.path.basename(p)[:-5] for p in BUNDLES} == set(LANG_NAMES)
+
+
+@pytest.mark.parametrize("path", BUNDLES, ids=lambda p: os.path.basename(p))
+def test_bundle_matches_reference_layout(path):
+    with open(path, encoding="utf-8") as f:
+        L = json.load(f)
+    assert L.keys() == get_lang("en").keys()
+    assert len(L["db_headers"]) == len(DB_KEYS)
+    assert len(L["risk_headers"]) == len(COLUMNS["risk"])
+
+
+def test_unknown_language_falls_back_to_english():
+    assert get_lang("xx") is get_lang("en")
@@ -0,0 +1,58 @@
+"""Futás-mérés: span és GPT hívás felvétele, szakaszösszesítő a szűk keresztmetszettel, JSON/CSV jelentés"""
+
+import csv
+import json
+
+import pytest
+
+from sds_metrics import NO_METRICS, RunMetrics, format_eta
+
+
+def make_metrics():
+    m = RunMetrics(total=4, label="Festőüzem", run_id="teszt")
+    m.add("pdf_text", 0.2, "a.pdf")
+    m.add("pdf_text", 0.4, "b.pdf")
+    m.llm("extract_llm", "a.pdf", {"_latency": 1.5, "_prompt_tokens": 1000, "_completion_tokens": 200, "_retries": 1})
+    m.llm("extract_llm", "b.pdf", {"_latency": 2.5, "_error": "timeout"})
+    m.done(2)
+    return m
+
+
+def test_span_records_time_and_failure():
+    m = RunMetrics()
+    with m.span("excel") as s:
+        s["rows"] = 3
+    with pytest.raises(ValueError), m.span("risk_rules", "x.pdf"):
+        raise ValueError
+    assert [(s["stage"], s["ok"]) for s in m.spans] == [("excel", True), ("risk_rules", False)]
+    assert m.spans[0]["rows"] == 3 and m.spans[0]["seconds"] >= 0
+
+
+def test_summary_per_stage_and_bottleneck():
+    m = make_metrics()
+    m.finish()
+    s = m.summary()
+    assert list(s["stages"]) == ["pdf_text", "extract_llm"] and s["bottleneck"] == "extract_llm"
+    ext = s["stages"]["extract_llm"]
+    assert (ext["count"], ext["seconds"], ext["prompt_tokens"], ext["retries"], ext["errors"]) == (2, 4.0, 1000, 1, 1)
+    assert s["stages"]["pdf_text"]["p95"] == 0.4 and s["done"] == 2 and s["tokens_in"] == 1000
+    assert abs(sum(st["share"] for st in s["stages"].values()) - 1.0) < 0.01
+
+
+def test_save_json_and_csv(tmp_path):
+    m = make_metrics()
+    m.save(str(tmp_path / "run.json"))
+    m.save(str(tmp_path / "run.csv"))
+    report = json.loads((tmp_path / "run.json").read_text(encoding="utf-8"))
+    assert report["label"] == "Festőüzem" and len(report["spans"]) == 4
+    with open(tmp_path / "run.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["stage"] for r in rows] == ["pdf_text", "pdf_text", "extract_llm", "extract_llm"]
+    assert rows[3]["ok"] == "False" and rows[0]["run_id"] == "teszt"
+
+
+def test_disabled_metrics_and_eta_format():
+    NO_METRICS.add("pdf_text", 1.0)
+    NO_METRICS.done()
+    assert NO_METRICS.spans == [] and NO_METRICS.done_count == 0
+    assert format_eta(75) == "1:15" and format_eta(3725) == "1:02:05"
@@ -0,0 +1,50 @@
+"""PDF szövegkinyerés: szakaszok felismerése és a közös folyamat-pool egyszeri létrehozása több szálból"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import sds_pdf
+from sds_bench import synthetic_pdf, synthetic_record
+from sds_pdf import extract_pdf, split_sections
+
+
+def test_extract_pdf_splits_sixteen_sections():
+    pdf = extract_pdf(synthetic_pdf(synthetic_record(1), lines_per_section=8))
+    assert pdf.error is None and pdf.pages == 16
+    assert sorted(pdf.sections) == list(range(1, 17))
+    assert "BENCH-00001" in pdf.sections[1]
+
+
+def test_split_sections_ignores_out_of_order_headings():
+    text = "SECTION 1: Identification\nfoo\nSECTION 2: Hazards\nsee SECTION 1\nSECTION 3: Composition\nbar\n"
+    assert sorted(split_sections(text)) == [1, 2, 3]
+
+
+def test_pool_is_created_once_under_concurrent_access(monkeypatch):
+    created, registered = [], []
+
+    class SlowPool:
+        def __init__(self, **kw):
+            time.sleep(0.05)   # szélesebb versenyablak a kettős létrehozáshoz
+            created.append(self)
+
+        def shutdown(self, **kw):
+            self.down = True
+
+    monkeypatch.setattr(sds_pdf, "ProcessPoolExecutor", SlowPool)
+    monkeypatch.setattr(sds_pdf, "PDF_PROCESSES", 2)
+    monkeypatch.setattr(sds_pdf, "_pool", None)
+    monkeypatch.setattr(sds_pdf.atexit, "register", registered.append)
+    start = threading.Barrier(8)
+
+    def get(_):
+        start.wait()
+        return sds_pdf._get_pool()
+
+    with ThreadPoolExecutor(8) as pool:
+        pools = list(pool.map(get, range(8)))
+    assert len(created) == 1 and all(p is created[0] for p in pools)
+    assert registered == [sds_pdf._shutdown_pool]
+    sds_pdf._shutdown_pool()
+    assert created[0].down and sds_pdf._pool is None
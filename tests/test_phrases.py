@@ -0,0 +1,33 @@
+"""H/EUH/P mondattár: a kódok mellé a hivatalos szöveg kerül, a már kifejtett vagy ismeretlen kód érintetlen marad"""
+
+from sds_phrases import expand_record, expand_text, has_phrases, load_phrases, phrase, validate_phrases
+
+
+def test_phrase_tables_are_consistent():
+    assert validate_phrases() == []
+
+
+def test_codes_only_field_becomes_labelled_list():
+    out = expand_text("H225, H319", "en")
+    assert out == "H225 (Highly flammable liquid and vapour); H319 (Causes serious eye irritation)"
+
+
+def test_combined_code_falls_back_to_parts():
+    table = load_phrases("en")
+    assert phrase("P303 + P361 + P353", table).startswith(table["P303"])
+    assert expand_text("P303+P361+P353", "en").startswith("P303+P361+P353 (IF ON SKIN")
+
+
+def test_already_expanded_and_unknown_codes_are_left_alone():
+    text = "H225 Highly flammable liquid and vapour."
+    assert expand_text(text, "en") == text
+    assert expand_text("H999", "en") == "H999"
+
+
+def test_record_expansion_only_with_phrase_table():
+    sds = {"h_statements": "H319", "p_statements": "P280", "comp1_clp": "Flam. Liq. 2, H225", "product_name": "H319"}
+    expand_record(sds, "hu")
+    assert sds["h_statements"].startswith("H319 (") and sds["p_statements"].startswith("P280 (")
+    assert sds["comp1_clp"].startswith("Flam. Liq. 2, H225 (") and sds["product_name"] == "H319"
+    assert not has_phrases("xx")
+    assert expand_record({"h_statements": "H319"}, "xx") == {"h_statements": "H319"}
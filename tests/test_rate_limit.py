@@ -0,0 +1,83 @@
+"""Sebességkorlát: token-bucket, Retry-After értelmezés, a nem számlázott kísérletek visszatérítése, közös szünet 429 után"""
+
+import time
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from sds_rate_limit import RateLimiter, TokenBucket, _retry_after, call_with_retry
+
+
+def http_error(cls, status, headers=None, body=None):
+    """OpenAI státuszhiba egy minimális válasz-objektummal (csak a request / status_code / headers kell)"""
+    response = SimpleNamespace(request=None, status_code=status, headers=headers or {})
+    return cls("teszt", response=response, body=body)
+
+
+class FakeRequest:
+    """Hívható kérés: sorban a megadott kivételeket dobja, utána egy usage-es választ ad; a hívások idejét megjegyzi"""
+
+    def __init__(self, *errors, total_tokens=120):
+        self.errors, self.calls = list(errors), []
+        self.resp = SimpleNamespace(usage=SimpleNamespace(total_tokens=total_tokens))
+
+    def __call__(self):
+        self.calls.append(time.monotonic())
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.resp
+
+
+def test_bucket_take_and_adjust():
+    bucket = TokenBucket(60000)
+    bucket.take(1000)
+    assert 58990 < bucket.level <= 59010
+    bucket.adjust(-500)                 # a becslésnél kevesebb fogyott: visszajár
+    assert 59490 < bucket.level <= 59510
+    bucket.adjust(200000)               # túlfogyasztás: legfeljebb egy teljes keretnyi tartozás
+    assert bucket.level == pytest.approx(-60000, abs=10)
+    bucket = TokenBucket(600)           # 10 / mp
+    bucket.take(600)
+    t0 = time.monotonic()
+    bucket.take(2)
+    assert time.monotonic() - t0 >= 0.15
+
+
+def test_retry_after_headers():
+    assert _retry_after(http_error(openai.RateLimitError, 429, {"retry-after-ms": "250"})) == 0.25
+    assert _retry_after(http_error(openai.RateLimitError, 429, {"retry-after": "3"})) == 3.0
+    assert _retry_after(http_error(openai.RateLimitError, 429, {"retry-after": "Wed, 21 Oct 2026"})) is None
+    assert _retry_after(ValueError("nincs válasz")) is None
+
+
+def test_unbilled_attempts_are_refunded():
+    limiter = RateLimiter(rpm=6000, tpm=60000)
+    request = FakeRequest(openai.APIConnectionError(request=None), openai.APIConnectionError(request=None))
+    assert call_with_retry(request, limiter, 5000, base_delay=0.001, max_delay=0.001) is request.resp
+    assert limiter.tokens.level > 60000 - 200   # csak a ténylegesen számlázott 120 token fogyott
+    with pytest.raises(openai.APIConnectionError):
+        call_with_retry(FakeRequest(openai.APIConnectionError(request=None)), limiter, 5000, max_retries=0)
+    assert limiter.tokens.level > 60000 - 200
+
+
+def test_insufficient_quota_is_not_retried():
+    limiter = RateLimiter(rpm=6000, tpm=60000)
+    request = FakeRequest(http_error(openai.RateLimitError, 429, body={"code": "insufficient_quota"}))
+    with pytest.raises(openai.RateLimitError):
+        call_with_retry(request, limiter, 100, base_delay=0.001)
+    assert len(request.calls) == 1
+
+
+def test_rate_limit_pauses_all_callers():
+    limiter = RateLimiter(rpm=6000, tpm=60000)
+    request, stats = FakeRequest(http_error(openai.RateLimitError, 429, {"retry-after-ms": "200"})), {}
+    t0 = time.monotonic()
+    call_with_retry(request, limiter, 100, stats=stats)
+    assert stats["retries"] == 1 and stats["wait"] >= 0.2
+    assert request.calls[1] - request.calls[0] >= 0.2
+    assert limiter._paused_until >= t0 + 0.2   # a közös korlátozón: a többi szál is kivárja
+    limiter.pause(0.15)
+    t1 = time.monotonic()
+    limiter.acquire(1)
+    assert time.monotonic() - t1 >= 0.14
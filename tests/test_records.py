@@ -0,0 +1,48 @@
+"""Tömör rekordok: dict-szerű viselkedés, pickle oda-vissza, internált értékek és az Excel sor értékei"""
+
+import copy
+import pickle
+
+from sds_records import RiskRecord, SDSRecord, compact_records, compact_risks, row_values
+from sds_registry import DB_KEYS
+
+SDS = {"product_name": "Aceton", "manufacturer": "Teszt Vegyipari Korlátolt Felelősségű Társaság", "sds_date": "2024.01.15",
+       "comp1_name": "aceton", "comp1_cas": "67-64-1", "_status": "✅", "_error": "ritka kulcs", "_pdf_pages": 4}
+
+
+def test_record_behaves_like_dict():
+    rec = SDSRecord(SDS)
+    assert rec == SDS and dict(rec) == SDS and len(rec) == len(SDS)
+    assert rec["_error"] == "ritka kulcs" and rec.get("color", "-") == "-" and "color" not in rec
+    rec["color"] = "színtelen"
+    rec["comp1_cas"] = None   # None = törlés
+    rec["_error"] = None
+    assert "comp1_cas" not in rec and "_error" not in rec and rec["color"] == "színtelen"
+    assert {**rec}.keys() == rec.keys() and rec.components[0].name == "aceton"
+
+
+def test_iteration_follows_field_order_then_extras():
+    keys = list(SDSRecord({"_error": "x", "sds_date": "2024", "product_name": "A"}))
+    assert keys == ["product_name", "sds_date", "_error"]
+
+
+def test_pickle_and_copy_round_trip():
+    rec, risk = SDSRecord(SDS), RiskRecord({"risk_level": "Magas", "risk_score": 9, "_extra_note": "x"})
+    for original in (rec, risk):
+        for clone in (pickle.loads(pickle.dumps(original)), copy.deepcopy(original), original.copy()):
+            assert type(clone) is type(original) and clone == original and clone is not original
+    clone = rec.copy()
+    clone["_error"] = "más"
+    assert rec["_error"] == "ritka kulcs"
+
+
+def test_repeated_values_are_interned():
+    # Két külön beolvasott (nem azonos objektumú) szöveg
+    a, b = compact_records([{**SDS, "manufacturer": "".join(SDS["manufacturer"])} for _ in range(2)])
+    assert a["manufacturer"] is b["manufacturer"]
+    assert compact_records([a])[0] is a and compact_risks([None])[0] == {}
+
+
+def test_row_values_match_dict_rows():
+    rec = SDSRecord(SDS)
+    assert row_values(rec) == row_values(dict(SDS)) and len(row_values(rec)) == len(DB_KEYS)
@@ -0,0 +1,80 @@
+"""Szabály-alapú előértékelés (CMR és veszélytelen esetek a modell nélkül), V×S sávok, szint szerinti színezés és terv"""
+
+import io
+from datetime import date
+
+import pytest
+
+from sds_excel import action_rows, generate_full_excel
+from sds_languages import get_lang
+from sds_risk_rules import RiskLevel, annotate_levels, hazard_codes, level_of, prescore, prescore_batch
+
+
+@pytest.mark.parametrize("h_statements, state, probability", [
+    ("H225, H350i", "folyadék", 2), ("H360FD", "por", 3), ("H340, H319", "gáz", 3), ("H350", "Aerosol", 3),
+])
+def test_cmr_is_severe_with_health_surveillance(h_statements, state, probability):
+    risk = prescore({"h_statements": h_statements, "physical_state": state, "comp1_name": "x"})
+    assert (risk["severity"], risk["probability"], risk["risk_score"]) == (4, probability, 4 * probability)
+    assert risk["bem_required"] == "Igen" and risk["exposure_registry_required"] == "Igen"
+    assert risk["risk_level_num"] == int(RiskLevel.from_score(4 * probability)) and risk["_rule_based"]
+
+
+@pytest.mark.parametrize("sds", [{}, {"h_statements": "H410"}, {"euh_statements": "EUH066"},
+                                 {"h_statements": "H412", "euh_statements": "EUH210"}])
+def test_no_or_environment_only_codes_are_acceptable(sds):
+    risk = prescore(sds)
+    assert (risk["probability"], risk["severity"], risk["risk_level_num"]) == (1, 1, RiskLevel.ACCEPTABLE)
+    assert risk["risk_level"] == "Elfogadható"
+    assert risk["bem_required"] == "Nem" and risk["exposure_registry_required"] == "Nem"
+
+
+def test_unknown_or_mid_severity_codes_go_to_the_model():
+    records = [{"h_statements": "H225"}, {"h_statements": "H410, H999"}, {"comp1_clp": "Skin Irrit. 2, H315"},
+               {"h_statements": "H410"}]
+    assert [r is None for r in prescore_batch(records)] == [True, True, True, False]
+    assert prescore({"h_statements": "H350"}, "xx") is None
+
+
+def test_hazard_codes_strip_suffixes():
+    assert hazard_codes({"h_statements": "H350i, H360FD; EUH066", "comp2_clp": "Repr. 1B H360Df"}) == \
+        {"H350", "H360", "EUH066"}
+
+
+@pytest.mark.parametrize("score, level", [(1, 1), (2, 1), (3, 2), (4, 2), (5, 3), (9, 3), (10, 4), (16, 4)])
+def test_score_bands(score, level):
+    assert RiskLevel.from_score(score) == level
+
+
+# Régi munkafüzetek / gyorsítótár: csak a (nyelvfüggő) szöveg és a pontszám, risk_level_num nélkül
+OLD_RISKS = [{"risk_level": "Elfogadhatatlan", "risk_score": 12, "residual_risk": 2},
+             {"risk_level": "Jelentős", "probability": 2, "severity": 3},
+             {"risk_level": "elfogadható", "risk_score": "2"}, {}]
+
+
+def test_level_from_score_or_probability_times_severity():
+    assert [level_of(r) for r in OLD_RISKS] == [4, 3, 1, None]
+    assert level_of(OLD_RISKS[0], residual=True) == RiskLevel.ACCEPTABLE
+    assert level_of({"risk_level_num": 2, "risk_score": 16}) == RiskLevel.TOLERABLE
+    assert level_of({"risk_score": "n/a", "probability": "3", "severity": 4}) == RiskLevel.UNACCEPTABLE
+    assert annotate_levels({"probability": 1, "severity": 4, "post_action_probability": 1, "post_action_severity": 2}) \
+        == {"probability": 1, "severity": 4, "post_action_probability": 1, "post_action_severity": 2,
+            "risk_level_num": 2, "residual_risk_level_num": 1}
+
+
+def test_unacceptable_label_only_row_is_coloured_red():
+    import openpyxl
+    results = [{"product_name": f"Termék {i}"} for i in range(len(OLD_RISKS))]
+    data = generate_full_excel(results, OLD_RISKS, "Teszt", date(2024, 3, 1), date(2025, 3, 1), date(2024, 6, 1))
+    ws = openpyxl.load_workbook(io.BytesIO(data))[get_lang("hu")["sheet_names"][3]]
+    assert [ws.cell(row, 16).style for row in range(2, 6)] == ["sds_data_red", "sds_data_orange", "sds_data_green",
+                                                              "sds_data"]
+    assert ws.cell(2, 25).style == "sds_data_green"
+
+
+def test_action_plan_lists_scores_from_three():
+    risks = [{"risk_score": s, "risk_level": str(s)} for s in (1, 2, 3, 4, 12)] + \
+            [{"probability": 1, "severity": 2}, {"probability": 3, "severity": 1, "risk_level": "3"}, {}]
+    results = [{"product_name": f"P{i}"} for i in range(len(risks))]
+    rows = list(action_rows(results, risks, get_lang("hu"), date(2024, 6, 1)))
+    assert [(r[0], r[1]) for r in rows] == [("1", "P2"), ("2", "P3"), ("3", "P4"), ("4", "P6")]
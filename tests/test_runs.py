@@ -0,0 +1,84 @@
+"""Folytatható futások: a már kész fájlok nem futnak újra, a sikertelenek és a függők igen; háttér-sor és worker"""
+
+import pytest
+
+import sds_pipeline
+import sds_runs
+from sds_pipeline import PDFFile
+from sds_runs import RunStore, run_pending
+from sds_worker import run_worker
+
+FILES = [PDFFile(f"{n}.pdf", f"%PDF-1.4 {n}".encode()) for n in "abc"]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RunStore(str(tmp_path / "runs"))
+
+
+@pytest.fixture
+def processed(monkeypatch):
+    """A GPT-s feldolgozás helyett: a fájlnév naplózása; a fail halmazban lévő fájlok ❌ státuszt kapnak"""
+    calls, fail = [], set()
+
+    def fake(f, *args, **kwargs):
+        calls.append(f.name)
+        status = "❌ GPT hiba" if f.name in fail else "✅"
+        return {"_source_file": f.name, "_status": status, "product_name": f.name[0].upper()}, {"risk_level": "Alacsony"}
+
+    monkeypatch.setattr(sds_pipeline, "process_single_sds", fake)
+    return calls, fail
+
+
+def test_resume_skips_done_rows(store, processed):
+    calls, _ = processed
+    run_id = store.create(FILES, "hu", settings={"rules": True})
+    assert store.pending(run_id)[0][1].getvalue() == FILES[0].getvalue()
+    # Összeomlás előtti ellenőrzőpont: csak az első fájl készült el
+    store.save_result(run_id, 0, {"_source_file": "a.pdf", "_status": "✅", "product_name": "A"}, {})
+    sds, risks = run_pending(store, run_id, "sk-x", max_workers=2)
+    assert sorted(calls) == ["b.pdf", "c.pdf"]
+    assert [s["_source_file"] for s in sds] == ["a.pdf", "b.pdf", "c.pdf"] and len(risks) == 3
+    run = store.get(run_id)
+    assert (run["status"], run["done"], run["pending"]) == ("done", 3, 0)
+
+
+def test_failed_rows_run_again_on_resume(store, processed):
+    calls, fail = processed
+    run_id = store.create(FILES, "hu")
+    fail.add("b.pdf")
+    run_pending(store, run_id, "sk-x")
+    assert store.get(run_id)["failed"] == 1
+    calls.clear(); fail.clear()
+    sds, _ = run_pending(store, run_id, "sk-x")
+    assert calls == ["b.pdf"] and all(s["_status"] == "✅" for s in sds)
+    calls.clear()
+    run_pending(store, run_id, "sk-x")
+    assert calls == []
+
+def test_queue_claim_and_finish(store):
+    run_id = store.submit(FILES[:2], "en", label="Raktár")
+    assert store.queue_stats() == {"pending": 2, "claimed": 0, "runs": 1}
+    for worker in ("w1", "w2"):
+        store.worker_heartbeat(worker, threads=1, processed=0)
+    run, idx, pdf = store.claim("w1")
+    assert (run["run_id"], idx, pdf.name, run["settings"]["background"]) == (run_id, 0, "a.pdf", True)
+    store.claim("w2")
+    assert store.claim("w3") is None and store.queue_stats()["claimed"] == 2
+    store.worker_exit("w2")   # leálló worker: a foglalása visszakerül a sorba
+    assert store.claim("w3")[1] == 1
+    store.save_result(run_id, 0, {"_status": "✅"}, {})
+    store.save_result(run_id, 1, {"_status": "✅"}, {})
+    assert store.get(run_id)["status"] == "done" and store.queue_stats()["runs"] == 0
+
+
+def test_worker_drains_queue_once(store, processed, monkeypatch):
+    calls, fail = processed
+    monkeypatch.setattr(sds_runs, "RunStore", lambda: store)
+    first = store.submit(FILES[:2], "hu")
+    second = store.submit(FILES[2:], "de")
+    fail.add("c.pdf")
+    assert run_worker("sk-x", threads=2, use_index=False, once=True) == 3
+    assert sorted(calls) == ["a.pdf", "b.pdf", "c.pdf"]
+    assert store.get(first)["status"] == "done" and store.get(second)["failed"] == 1
+    assert store.active_workers() == [] and store.queue_stats()["pending"] == 0
@@ -0,0 +1,72 @@
+"""Séma szerinti ellenőrzés: hiányzó kötelező és hibás formátumú mezők, pótlás egy kis utólagos kérésben"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from sds_pdf import PDFText
+from sds_pipeline import refill_missing
+from sds_rate_limit import set_client
+from sds_schema import REQUIRED, coerce, response_format, validate
+
+COMPLETE = {n: "x" for n in REQUIRED}
+
+
+class FakeClient:
+    """chat.completions.create helyettesítő: a megadott JSON-t adja vissza, a kéréseket megjegyzi"""
+
+    def __init__(self, answer):
+        self.answer, self.requests = answer, []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kw):
+        self.requests.append(kw)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(self.answer)))],
+                               usage=SimpleNamespace(prompt_tokens=300, completion_tokens=20, total_tokens=320))
+
+
+@pytest.fixture
+def fake(request):
+    client = FakeClient(request.param)
+    set_client(f"sk-schema-{request.node.name}", client)
+    return f"sk-schema-{request.node.name}", client
+
+
+PDF = PDFText("...", sections={0: "Verzió: 3.0", 1: "1. SZAKASZ Aceton\nSürgősségi telefon: +36 80 201 199",
+                               3: "3. SZAKASZ aceton CAS 67-64-1", 9: "9. SZAKASZ folyadék"})
+
+
+def test_validate_reports_missing_and_malformed():
+    assert validate(COMPLETE) == ([], [])
+    sds = {**COMPLETE, "manufacturer": " ", "emergency_phone": None, "comp1_cas": "67-64-2", "comp1_ec": "200-662-2"}
+    assert validate(sds) == (["manufacturer", "emergency_phone"], ["comp1_cas"])
+
+
+def test_coerce_and_strict_format():
+    sds = coerce({"ghs_pictograms": ["GHS02", "GHS07"], "ph": 7, "comp1_conc": {"min": 10}, "_tokens": 5})
+    assert sds == {"ghs_pictograms": "GHS02; GHS07", "ph": "7", "comp1_conc": '{"min": 10}', "_tokens": 5}
+    schema = response_format(["ph"], "sds_refill")["json_schema"]
+    assert schema["strict"] and schema["schema"]["required"] == ["ph"]
+
+
+@pytest.mark.parametrize("fake", [{"emergency_phone": "+36 80 201 199", "comp1_cas": "67-64-1", "manufacturer": ""}],
+                         indirect=True)
+def test_refill_missing_fills_required_fields(fake):
+    key, client = fake
+    sds = {**COMPLETE, "manufacturer": "", "emergency_phone": "", "comp1_cas": "67-64-2", "_tokens": 1000}
+    msg = refill_missing(key, PDF, sds, "hu")
+    assert "KÉRT MEZŐK: manufacturer, emergency_phone, comp1_cas" in msg and "9. SZAKASZ" not in msg
+    assert client.requests[0]["response_format"]["json_schema"]["name"] == "sds_refill"
+    assert sds["emergency_phone"] == "+36 80 201 199" and sds["comp1_cas"] == "67-64-1"
+    assert sds["_refilled"] == ["emergency_phone", "comp1_cas"] and sds["_missing"] == ["manufacturer"]
+    assert sds["_tokens"] == 1320 and validate(sds) == (["manufacturer"], [])
+
+
+@pytest.mark.parametrize("fake", [{}], indirect=True)
+def test_no_request_without_missing_fields_or_sections(fake):
+    key, client = fake
+    assert refill_missing(key, PDF, dict(COMPLETE)) is None
+    sds = {**COMPLETE, "physical_state": ""}
+    assert refill_missing(key, PDFText("olvashatatlan"), sds) is None
+    assert sds["_missing"] == ["physical_state"] and client.requests == []
@@ -0,0 +1,76 @@
+"""Anyag-index: CAS/EC felvétel, keresés, hiányzó összetevő-adatok pótlása és a súlyosabb osztályozás megtartása"""
+
+from datetime import date
+
+import pytest
+
+from sds_bench import ReplayClient, synthetic_pdf, synthetic_record
+from sds_cache import SDSCache
+from sds_excel import risk_rows
+from sds_languages import get_lang
+from sds_pipeline import PDFFile, process_single_sds
+from sds_rate_limit import set_client
+from sds_substances import SubstanceIndex, classify, normalize_cas
+
+ACETONE = {"product_name": "Hígító A", "manufacturer": "Teszt Kft.", "_source_file": "a.pdf",
+           "comp1_name": "aceton", "comp1_cas": "CAS: 67-64-1", "comp1_ec": "200-662-2", "comp1_conc": "80-100%",
+           "comp1_clp": "Flam. Liq. 2, H225; Eye Irrit. 2, H319", "ak_value": "1210 mg/m3"}
+DATES = (date(2024, 3, 1), date(2025, 3, 1), date(2024, 6, 1))
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SubstanceIndex(str(tmp_path / "substances.db"))
+
+
+def test_normalize_cas_checks_digit():
+    assert normalize_cas("CAS 0067-64-1") == "67-64-1"
+    assert normalize_cas("67-64-2") is None
+    assert classify("Carc. 1B H350, Repr. 2 H361d, H225")[:2] == ("H225 H350 H361", "C1 R2")
+
+
+def test_add_and_lookup_by_cas_or_ec(index):
+    assert index.add_record(dict(ACETONE)) == 1
+    assert index.add_record({**ACETONE, "_status": "❌ PDF hiba"}) == 0
+    row = index.lookup("67-64-1")
+    assert row["name"] == "aceton" and row["h_codes"] == "H225 H319" and row["ak_value"] == "1210 mg/m3"
+    assert index.lookup("EC 200-662-2")["key"] == "67-64-1"
+    assert index.lookup("64-17-5") is None
+    assert [p["product_name"] for p in index.products_with("67-64-1")] == ["Hígító A"]
+
+
+def test_enrich_fills_only_missing_fields(index):
+    index.add_record(dict(ACETONE))
+    sds = index.enrich({"comp1_name": "Acetone", "comp1_cas": "67-64-1", "comp1_clp": ""})
+    assert sds["comp1_clp"] == ACETONE["comp1_clp"] and sds["comp1_ec"] == "200-662-2"
+    assert sds["comp1_name"] == "Acetone" and sds["ak_value"] == "1210 mg/m3"
+    assert set(sds["_from_index"]) == {"comp1_clp", "comp1_ec", "ak_value"}
+
+
+def test_more_severe_classification_is_kept(index):
+    index.add_record(dict(ACETONE))
+    index.add_record({**ACETONE, "product_name": "Hígító B", "comp1_clp": "H225"})
+    assert index.lookup("67-64-1")["h_codes"] == "H225 H319"
+    assert index.stats() == {"substances": 1, "cmr": 0, "products": 2}
+
+
+def test_empty_main_component_is_filled_from_index(index):
+    index.add_record(dict(ACETONE))
+    index.add_record({**ACETONE, "comp1_name": "benzol", "comp1_cas": "71-43-2", "comp1_ec": "200-753-7",
+                      "comp1_clp": "Carc. 1A H350; Muta. 1B H340; H225"})
+    sds = {"product_name": "Hígító C", "comp1_name": "aceton", "comp1_cas": "67-64-1", "comp2_cas": "71-43-2"}
+    risks = [{"main_hazardous_component": ""}, {"main_hazardous_component": "xilol"}, None]
+    rows = list(risk_rows([sds, sds, {"comp1_name": "etanol"}], risks, get_lang("hu"), "", *DATES, substances=index))
+    assert [r[2] for r in rows] == ["benzol", "xilol", "etanol"]
+
+
+def test_cache_hit_is_added_to_index(index, tmp_path):
+    set_client("sk-index-cache", ReplayClient())
+    cache = SDSCache(str(tmp_path / "c.sqlite3"))
+    rec = synthetic_record(1)
+    pdf = PDFFile("b.pdf", synthetic_pdf(rec))
+    process_single_sds(pdf, "sk-index-cache", "en", cache)             # az index előtt gyorsítótárazva
+    for _ in range(2):
+        sds, _ = process_single_sds(pdf, "sk-index-cache", "en", cache, substances=index)
+        assert sds["_status"] == "✅ ♻️"
+    assert [p["product_name"] for p in index.products_with(rec["comp1_cas"])] == [rec["product_name"]]
@@ -0,0 +1,45 @@
+"""Kinyerési bemenet a token kereten belül: szakasz-válogatás, rövidítés, és a teljes szöveg, ha egyik szakasz sem kell"""
+
+from sds_pdf import PDFText
+from sds_tokens import BRIEF_SECTION_CHARS, count_tokens, select_extract_text
+
+
+def section(n, words=2000):
+    return f"{n}. SZAKASZ\n" + " ".join(f"s{n}w{i}" for i in range(words)) + "\n"
+
+
+def sectioned(*numbers, words=2000):
+    sections = {n: section(n, words) for n in numbers}
+    return PDFText("".join(sections[n] for n in numbers), sections=sections)
+
+
+def test_short_input_is_sent_whole():
+    pdf = sectioned(0, 1, 2, 3, 4, 9, words=20)
+    text = select_extract_text(pdf)
+    assert "s4w" not in text
+    assert text == "".join(pdf.sections[n] for n in (0, 1, 2, 3, 9))
+
+
+def test_sectioned_text_is_trimmed_per_section_within_budget():
+    pdf = sectioned(1, 2, 3, 4, 7, 9, 14)
+    text = select_extract_text(pdf, token_budget=1500)
+    assert count_tokens(text) <= 1500
+    assert all(f"{n}. SZAKASZ" in text for n in (1, 2, 3, 9, 14))
+    assert "s4w" not in text and "s7w" not in text
+    assert text.count("[...]") == 5
+    brief = text[text.index("14. SZAKASZ"):]
+    assert len(brief) <= BRIEF_SECTION_CHARS + 10
+
+
+def test_unsectioned_text_is_cut_globally_within_budget():
+    pdf = PDFText(section(1, words=5000))
+    text = select_extract_text(pdf, token_budget=1000)
+    assert count_tokens(text) <= 1000
+    assert pdf.text.startswith(text[:-len("\n[...]")]) and text.endswith("\n[...]")
+
+
+def test_no_wanted_section_falls_back_to_full_text():
+    pdf = sectioned(4, 6, 7, words=50)
+    assert select_extract_text(pdf) == pdf.text
+    text = select_extract_text(sectioned(4, 6, 7), token_budget=1000)
+    assert count_tokens(text) <= 1000 and text.startswith("4. SZAKASZ") and text.endswith("\n[...]")
@@ -0,0 +1,98 @@
+"""Frissítések letöltése egy helyi HTTP szerverről: PDF, méretkorlát, HTML bejelentkezési oldal, 404, azonos tartalom"""
+
+from http.server import BaseHTTPRequestHandler
+from types import SimpleNamespace
+
+import pytest
+
+from sds_bench import synthetic_pdf, synthetic_record
+from sds_cache import content_hash
+from sds_updates import DownloadError, diff_records, download_updates, fetch_pdf, make_session
+
+PDF = synthetic_pdf(synthetic_record(0), lines_per_section=2)
+LIMIT = len(PDF) + 1024
+LOGIN = "<!DOCTYPE html><html><body><form action='/login'>Bejelentkezés</form></body></html>".encode("utf-8")
+
+
+def fixture_handler(hits):
+    """Útvonal → válasz; /unsized: Content-Length nélküli (kapcsolat zárásáig tartó) törzs; /flaky: először 503"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def send(self, body, ctype="application/pdf", sized=True, status=200):
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            if sized:
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            hits.append(self.path)
+            if self.path in ("/sds/aceton.pdf", "/mirror/aceton-copy.pdf"):
+                return self.send(PDF)
+            if self.path == "/big.pdf":
+                return self.send(PDF + b"\0" * 2 * LIMIT)
+            if self.path == "/unsized.pdf":
+                return self.send(PDF + b"\0" * 2 * LIMIT, sized=False)
+            if self.path == "/login":
+                return self.send(LOGIN, "text/html")
+            if self.path == "/flaky.pdf":
+                return self.send(PDF) if hits.count(self.path) > 1 else self.send(b"", status=503)
+            self.send_error(404)
+
+    return Handler
+
+
+@pytest.fixture
+def server(http_server):
+    hits = []
+    return SimpleNamespace(url=http_server(fixture_handler(hits)), hits=hits, session=make_session(4))
+
+
+def test_fetch_pdf_served_normally(server):
+    assert fetch_pdf(server.session, server.url + "/sds/aceton.pdf", LIMIT) == PDF
+
+
+@pytest.mark.parametrize("path", ["/big.pdf", "/unsized.pdf"], ids=["content-length", "no-content-length"])
+def test_oversized_body_is_rejected(server, path):
+    with pytest.raises(DownloadError, match="Túl nagy"):
+        fetch_pdf(server.session, server.url + path, LIMIT)
+
+
+@pytest.mark.parametrize("path, message", [("/login", "Nem PDF"), ("/nincs.pdf", "HTTP 404")])
+def test_login_page_and_missing_file_are_rejected(server, path, message):
+    with pytest.raises(DownloadError, match=message):
+        fetch_pdf(server.session, server.url + path, LIMIT)
+
+
+def test_unsupported_scheme_and_retry_on_503(server):
+    with pytest.raises(DownloadError, match="Nem támogatott URL"):
+        fetch_pdf(server.session, "file:///etc/passwd", LIMIT)
+    assert fetch_pdf(server.session, server.url + "/flaky.pdf", LIMIT) == PDF
+    assert server.hits.count("/flaky.pdf") == 2
+
+
+def test_download_updates_deduplicates_same_content(server):
+    def result(name, path, found=True):
+        return SimpleNamespace(product_name=name, download_url=server.url + path if path else "", online_version_found=found)
+
+    results = [result("Aceton", "/sds/aceton.pdf"), result("Aceton tükör", "/mirror/aceton-copy.pdf"),
+               result("Hígító", "/login"), result("Festék", "/nincs.pdf"), result("Régi", "/sds/aceton.pdf", False),
+               result("Nincs link", None), result("Aceton újra", "/sds/aceton.pdf")]
+    items, files = download_updates(results, max_workers=4, session=server.session, max_bytes=LIMIT)
+    assert [i.row for i in items] == [0, 1, 2, 3, 6]
+    assert list(files) == [content_hash(PDF)] and files[content_hash(PDF)].name == "aceton.pdf"
+    by_row = {i.row: i for i in items}
+    assert by_row[0].duplicate_of is None and by_row[1].duplicate_of == 0 and by_row[6].duplicate_of == 0
+    assert by_row[1].status == "📥 Letöltve" and by_row[1].size == len(PDF)
+    assert by_row[2].status.startswith("❌ Nem PDF") and by_row[3].status == "❌ HTTP 404"
+    assert server.hits.count("/sds/aceton.pdf") == 1   # ugyanaz az URL csak egyszer töltődik le
+
+
+def test_diff_ignores_case_and_whitespace():
+    old = {"product_name": "Aceton  ", "sds_version": "2.0", "sds_date": "2023.01.01"}
+    new = {"product_name": "ACETON", "sds_version": "3.0", "sds_date": "2023.01.01"}
+    assert diff_records(old, new) == [{"field": "sds_version", "old": "2.0", "new": "3.0"}]
@@ -0,0 +1,45 @@
+"""Verzió-ellenőrzés: azonos termék / gyártó / CAS csoportonként egyetlen online keresés"""
+
+import pytest
+
+import sds_version_lookup as vc
+from sds_version_lookup import lookup_key
+
+
+@pytest.mark.parametrize("variant, base", [
+    ("BASF S.A.", "BASF"), ("BASF SA", "BASF"), ("Sika BV", "Sika"), ("Sika B.V.", "Sika"), ("Akzo Nobel N.V.", "Akzo Nobel"),
+    ("Mapei S.r.l.", "Mapei"), ("Henkel AG & Co. KG", "Henkel"), ("Würth Kft.", "Würth"),
+    ("3M Ltd", "3M"), ("Dow Chemical Inc.", "Dow Chemical"), ("Bostik GmbH", "Bostik"),
+])
+def test_legal_suffixes_group_with_plain_name(variant, base):
+    assert lookup_key("Termék", variant, []) == lookup_key("Termék", base, [])
+
+
+def test_suffix_letters_inside_words_are_kept():
+    assert lookup_key("X", "Sabo Sealants", [])[1] == "sabo sealants"
+    assert lookup_key("X", "Vanco", [])[1] == "vanco"
+
+
+def test_suffix_words_before_the_end_are_kept():
+    assert lookup_key("X", "Co Chemicals", []) != lookup_key("X", "Chemicals", [])
+    assert lookup_key("X", "SE Tylose GmbH & Co. KG", [])[1] == "se tylose"
+    assert lookup_key("X", "Sa Coatings S.A.", [])[1] == "sa coatings"
+
+
+def test_one_online_lookup_per_group(monkeypatch):
+    calls = []
+
+    def fake_lookup(product_name, manufacturer, current_version, current_date, cas_numbers, client):
+        calls.append((product_name, manufacturer, current_date))
+        return {"newer_version_found": False, "latest_date": current_date, "source_name": "stub"}
+
+    monkeypatch.setattr(vc, "check_sds_version_online", fake_lookup)
+    db = [{"product_name": "Sikaflex 11FC", "manufacturer": "Sika B.V.", "sds_date": "2021.03.01", "comp1_cas": "1330-20-7"},
+          {"product_name": "SIKAFLEX 11FC", "manufacturer": "Sika", "sds_date": "2023.05.10", "comp1_cas": "1330-20-7"},
+          {"product_name": "Glasurit", "manufacturer": "BASF S.A.", "sds_date": "2022.01.01"},
+          {"product_name": "Glasurit", "manufacturer": "BASF", "sds_date": "2022.01.01"},
+          {"product_name": "Glasurit", "manufacturer": "BASF", "sds_date": "2022.01.01", "comp1_cas": "64-17-5"}]
+    results = vc.check_all_sds_versions(db, client=None, max_workers=2)
+    assert len(results) == 5 and [r.product_name for r in results] == [d["product_name"] for d in db]
+    assert len(calls) == 3
+    assert ("SIKAFLEX 11FC", "Sika", "2023.05.10") in calls   # a csoport legfrissebb verziójával keres
@@ -0,0 +1,81 @@
+"""Ütemezett verzió-ellenőrzés: TTL szerinti újrakeresés, beállítások, esedékesség, és UI importok nélküli futás"""
+
+import subprocess
+import sys
+import time
+
+import pytest
+
+import sds_version_lookup
+from conftest import ROOT
+from sds_version_lookup import lookup_key
+from sds_version_scheduler import VersionStore, _key_text, main, run_scheduled
+
+DB = [{"product_name": "Sikaflex 11FC", "manufacturer": "Sika", "sds_date": "2023.05.10", "comp1_cas": "1330-20-7"},
+      {"product_name": "Glasurit", "manufacturer": "BASF", "sds_date": "2022.01.01"}]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return VersionStore(str(tmp_path / "versions.sqlite3"))
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    calls = []
+
+    def fake_lookup(product_name, manufacturer, current_version, current_date, cas_numbers, client):
+        calls.append(product_name)
+        return {"newer_version_found": False, "latest_date": current_date, "source_name": "stub"}
+
+    monkeypatch.setattr(sds_version_lookup, "check_sds_version_online", fake_lookup)
+    return calls
+
+
+def test_only_expired_lookups_are_queried_again(store, lookups):
+    run_scheduled(store, None, DB)
+    assert sorted(lookups) == ["Glasurit", "Sikaflex 11FC"]
+    assert store.last_run()["queried"] == 2 and store.stats()["entries"] == 2
+
+    key = lookup_key("Glasurit", "BASF", [])
+    store._db.execute("UPDATE lookups SET checked=? WHERE key=?",
+                      (time.time() - 31 * 86400, _key_text(key)))
+    assert store.get_lookup(key, 30) is None and store.get_lookup(key, 60) is not None
+    lookups.clear()
+    results = run_scheduled(store, None, DB)
+    assert lookups == ["Glasurit"] and [r.product_name for r in results] == ["Sikaflex 11FC", "Glasurit"]
+    assert (store.last_run()["queried"], store.last_run()["reused"]) == (1, 1)
+
+
+def test_settings_round_trip(store):
+    assert store.load_settings()["check_frequency"] == "Havonta" and store.ttl_days() == 30
+    store.save_settings(check_frequency="Hetente", auto_download=True, email_notify="safety@company.hu",
+                        notify_threshold=5)
+    reopened = VersionStore(store.path)
+    settings = reopened.load_settings()
+    assert (settings["check_frequency"], settings["auto_download"], settings["email_notify"],
+            settings["notify_threshold"], settings["max_workers"]) == ("Hetente", True, "safety@company.hu", 5, 4)
+    assert reopened.ttl_days() == 7
+    with pytest.raises(ValueError):
+        store.save_settings(check_frequency="Naponta")
+    with pytest.raises(ValueError):
+        store.save_settings(smtp_host="localhost")
+
+
+def test_run_is_skipped_when_not_yet_due(store, capsys):
+    assert main(["--db", store.path, "run"]) == 2   # még nem volt futás: esedékes, de nincs nyilvántartás
+    store.record_run(time.time(), 2, 2, 0, 0)
+    assert main(["--db", store.path, "run"]) == 0
+    assert "Nem esedékes (Havonta)" in capsys.readouterr().out
+    store.save_settings(check_frequency="Hetente")
+    assert store.next_due() == pytest.approx(store.last_run()["started"] + 7 * 86400)
+
+
+def test_scheduled_run_does_not_load_ui_modules():
+    code = ("import sys, sds_version_scheduler as s, sds_version_lookup\n"
+            "sds_version_lookup.check_sds_version_online = lambda *a, **k: {'source_name': 'stub'}\n"
+            "s.run_scheduled(s.VersionStore(':memory:'), None, [{'product_name': 'X'}])\n"
+            "print(','.join(m for m in ('streamlit', 'openai') if m in sys.modules))")
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == ""